@@ -1,8 +1,18 @@
-from app import create_app
+from werkzeug.serving import run_simple
+from app.config import Config
+from app.startup import create_wsgi_app, init_server_mode
 import os
 
-app = create_app()
+# SERVER_MODE=gevent serves many concurrent requests per process (see gunicorn.conf.py)
+init_server_mode(Config.SERVER_MODE)
+
+# STARTUP_MODE=lazy|background defers Firebase/Firestore until first use (faster cold start)
+app = create_wsgi_app(Config.STARTUP_MODE)
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=False) 
\ No newline at end of file
+    if Config.SERVER_MODE == 'gevent':
+        from gevent.pywsgi import WSGIServer
+        WSGIServer(('0.0.0.0', port), app).serve_forever()
+    else:
+        run_simple('0.0.0.0', port, app, threaded=True)
@@ -1,32 +1,16 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import firebase_admin
-from firebase_admin import credentials, auth, firestore
 import os
 from dotenv import load_dotenv
 from .config import Config
-from .routes.auth import auth_bp
-from .users.routes import users_bp
-from .events.routes import events_bp
 
 load_dotenv()
 
-def create_app():
-    app = Flask(__name__)
-    
-    # Simple CORS configuration for development
-    CORS(app, 
-         resources={r"/*": {
-             "origins": "*",
-             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-             "allow_headers": ["Content-Type", "Authorization", "Accept"],
-             "expose_headers": ["Content-Type", "Authorization"],
-             "max_age": 3600
-         }})
-    
-    app.config.from_object(Config)
+def init_firebase():
+    """Initialize the default Firebase Admin app if that has not happened yet"""
+    import firebase_admin
+    from firebase_admin import credentials
 
-    # Initialize Firebase Admin
     try:
         # Check if Firebase is already initialized
         firebase_admin.get_app()
@@ -45,9 +29,66 @@ def create_app():
             
         cred = credentials.Certificate(service_account_path)
         firebase_admin.initialize_app(cred)
+
+def create_app():
+    # Firebase, Firestore and the blueprints are imported here rather than at
+    # module import, so a lazily started worker (see startup.py) defers them too
+    from . import metrics
+    from .compression import compress_response
+    from .db import init_app as init_firestore
+    from .routes.auth import auth_bp
+    from .users.routes import users_bp
+    from .events.routes import events_bp
+
+    app = Flask(__name__)
+    
+    # Simple CORS configuration for development
+    CORS(app, 
+         resources={r"/*": {
+             "origins": "*",
+             "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+             "allow_headers": ["Content-Type", "Authorization", "Accept", "If-None-Match"],
+             "expose_headers": ["Content-Type", "Content-Encoding", "Authorization", "ETag", "Server-Timing"],
+             "max_age": 3600
+         }})
     
-    # Initialize Firestore
-    db = firestore.client()
+    app.config.from_object(Config)
+
+    # Initialize Firebase Admin
+    init_firebase()
+    
+    # Initialize the shared Firestore client (configured channel, warmed up at boot)
+    init_firestore(app)
+
+    # Request latency and Firestore/Auth call metrics (registered first so
+    # every request is timed, preflights included)
+    @app.before_request
+    def start_timer():
+        metrics.start_request()
+
+    @app.after_request
+    def record_request(response):
+        trace = metrics.current_trace()
+        if trace is None:
+            return response
+        # Streamed bodies (SSE, ?stream=1) are timed until the response starts
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        elapsed = trace.elapsed()
+        metrics.request_latency.observe(elapsed, request.method, route, str(response.status_code))
+        if elapsed * 1000 >= app.config['METRICS_SLOW_REQUEST_MS']:
+            timing = trace.server_timing()
+            existing = response.headers.get('Server-Timing')
+            response.headers['Server-Timing'] = f'{existing}, {timing}' if existing else timing
+        return response
+
+    @app.teardown_request
+    def end_timer(exc):
+        metrics.end_request()
+
+    # gzip/brotli for large buffered responses (runs before the metrics hook)
+    @app.after_request
+    def compress(response):
+        return compress_response(response, app.config['COMPRESS_MIN_SIZE'], app.config['COMPRESS_LEVEL'])
 
     # Global OPTIONS handler
     @app.before_request
@@ -55,8 +96,8 @@ def create_app():
         if request.method == "OPTIONS":
             response = jsonify()
             response.headers.add('Access-Control-Allow-Origin', '*')
-            response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization, Accept')
-            response.headers.add('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
+            response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization, Accept, If-None-Match')
+            response.headers.add('Access-Control-Allow-Methods', 'GET, POST, PUT, PATCH, DELETE, OPTIONS')
             response.headers.add('Access-Control-Max-Age', '3600')
             return response
 
@@ -70,6 +111,11 @@ def create_app():
     def health_check():
         return {'status': 'ok'}, 200
 
+    # Prometheus scrape endpoint
+    @app.route('/metrics', methods=['GET'])
+    def prometheus_metrics():
+        return metrics.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
     return app
 
 
@@ -0,0 +1,42 @@
+import gzip
+from flask import request
+
+# brotli is optional; without it responses are only ever gzip-compressed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _accepts(encoding):
+    return request.accept_encodings[encoding] > 0
+
+
+def compress_response(response, min_size, level=6):
+    """Compress a buffered response body with br or gzip if the client accepts it.
+
+    Streamed bodies, small bodies and anything already encoded are left alone.
+    A strong ETag becomes weak, since the bytes now depend on the encoding.
+    """
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if len(body) < min_size:
+        return response
+
+    if brotli is not None and _accepts('br'):
+        encoding, body = 'br', brotli.compress(body, quality=min(level, 11))
+    elif _accepts('gzip'):
+        encoding, body = 'gzip', gzip.compress(body, compresslevel=level)
+    else:
+        return response
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
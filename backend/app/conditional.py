@@ -0,0 +1,31 @@
+import hashlib
+from flask import request, make_response
+
+# Let browsers keep responses but revalidate them with If-None-Match every time
+REVALIDATE = 'private, no-cache'
+
+
+def make_etag(*parts):
+    """Strong ETag value built from version markers (update times, aggregate versions, ...)"""
+    raw = '|'.join(str(part) for part in parts)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+
+def not_modified(etag):
+    """Return a 304 response if the request's If-None-Match matches etag, else None"""
+    # Weak comparison, so compressed (weak-tagged) responses revalidate too
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = make_response('', 304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = REVALIDATE
+    return response
+
+
+def with_etag(response, etag, status=200):
+    response = make_response(response, status)
+    if etag is None:
+        return response
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = REVALIDATE
+    return response
@@ -15,4 +15,76 @@ class Config:
         'https://your-app-name.vercel.app',  # Production - UPDATE THIS
         'https://freetogether.vercel.app',  # Example production URL
     ]
-    CORS_SUPPORTS_CREDENTIALS = True
\ No newline at end of file
+    CORS_SUPPORTS_CREDENTIALS = True
+
+    # Owner/respondent profile lookups (Firebase Auth)
+    PROFILE_CACHE_SIZE = int(os.getenv('PROFILE_CACHE_SIZE', 5000))
+    PROFILE_CACHE_TTL = int(os.getenv('PROFILE_CACHE_TTL', 300))
+
+    # Verified ID tokens kept in memory (entries expire with the token)
+    TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 10000))
+
+    # Event documents kept in memory between requests; EVENT_CACHE_WATCH adds a
+    # Firestore listener per hot event (at most EVENT_CACHE_WATCH_MAX) so other
+    # processes' writes are seen immediately
+    EVENT_CACHE_SIZE = int(os.getenv('EVENT_CACHE_SIZE', 2000))
+    EVENT_CACHE_TTL = int(os.getenv('EVENT_CACHE_TTL', 30))
+    EVENT_CACHE_WATCH = os.getenv('EVENT_CACHE_WATCH', 'false').lower() == 'true'
+    EVENT_CACHE_WATCH_MAX = int(os.getenv('EVENT_CACHE_WATCH_MAX', 200))
+
+    # `flask events compact-responses`: events closed/scheduled this many days
+    # ago (or past their end date) get their responses folded into archive
+    # documents of at most COMPACT_CHUNK_SIZE responses
+    COMPACT_CLOSED_DAYS = int(os.getenv('COMPACT_CLOSED_DAYS', 30))
+    COMPACT_CHUNK_SIZE = int(os.getenv('COMPACT_CHUNK_SIZE', 500))
+
+    # Merged cross-event availability per user (/users/me/availability);
+    # dropped when the user saves a response, otherwise kept for the TTL
+    AVAILABILITY_CACHE_SIZE = int(os.getenv('AVAILABILITY_CACHE_SIZE', 1000))
+    AVAILABILITY_CACHE_TTL = int(os.getenv('AVAILABILITY_CACHE_TTL', 60))
+
+    # List events from the per-user index (users/{uid}/events) instead of the
+    # createdBy/invitees queries; off until `flask events backfill-user-index`
+    # has run (see the README)
+    USER_EVENT_INDEX = os.getenv('USER_EVENT_INDEX', 'false').lower() == 'true'
+
+    # Cursor pagination / streaming for list endpoints
+    PAGE_SIZE_DEFAULT = int(os.getenv('PAGE_SIZE_DEFAULT', 50))
+    PAGE_SIZE_MAX = int(os.getenv('PAGE_SIZE_MAX', 500))
+    STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', 200))
+
+    # Events with more responses than this are deleted in a background thread
+    DELETE_BACKGROUND_THRESHOLD = int(os.getenv('DELETE_BACKGROUND_THRESHOLD', 500))
+
+    # Server-Sent Events: seconds between keepalive comments on idle streams
+    SSE_KEEPALIVE_SECONDS = int(os.getenv('SSE_KEEPALIVE_SECONDS', 15))
+
+    # Threads for running independent Firestore queries concurrently
+    QUERY_WORKERS = int(os.getenv('QUERY_WORKERS', 8))
+
+    # Firestore client: gRPC channel keepalive, per-operation timeouts (seconds),
+    # retry deadline and a warm-up read at boot
+    FIRESTORE_KEEPALIVE_TIME_MS = int(os.getenv('FIRESTORE_KEEPALIVE_TIME_MS', 30000))
+    FIRESTORE_KEEPALIVE_TIMEOUT_MS = int(os.getenv('FIRESTORE_KEEPALIVE_TIMEOUT_MS', 10000))
+    FIRESTORE_READ_TIMEOUT = float(os.getenv('FIRESTORE_READ_TIMEOUT', 10))
+    FIRESTORE_QUERY_TIMEOUT = float(os.getenv('FIRESTORE_QUERY_TIMEOUT', 30))
+    FIRESTORE_WRITE_TIMEOUT = float(os.getenv('FIRESTORE_WRITE_TIMEOUT', 20))
+    FIRESTORE_RETRY_DEADLINE = float(os.getenv('FIRESTORE_RETRY_DEADLINE', 30))
+    FIRESTORE_WARMUP = os.getenv('FIRESTORE_WARMUP', 'true').lower() == 'true'
+
+    # Startup: 'eager' builds the app at import; 'lazy' on the first request;
+    # 'background' on a warm-up thread at boot. /healthz answers immediately.
+    STARTUP_MODE = os.getenv('STARTUP_MODE', 'eager')
+
+    # Serving: 'sync' (a thread per in-flight request) or 'gevent' (cooperative,
+    # many in-flight requests per process; run gunicorn with gunicorn.conf.py)
+    SERVER_MODE = os.getenv('SERVER_MODE', 'sync')
+
+    # Requests slower than this (milliseconds) get a Server-Timing breakdown
+    # of their Firestore/Auth time
+    METRICS_SLOW_REQUEST_MS = float(os.getenv('METRICS_SLOW_REQUEST_MS', 500))
+
+    # Buffered responses at least this many bytes are gzip (or brotli, if
+    # installed) compressed for clients that accept it
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))
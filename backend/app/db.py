@@ -0,0 +1,148 @@
+import logging
+import firebase_admin
+import grpc
+from flask import current_app
+from google.api_core import exceptions as core_exceptions
+from google.api_core import gapic_v1
+from google.api_core import retry as retries
+from google.cloud import firestore
+from google.cloud.firestore_v1.services.firestore import client as firestore_client
+from google.cloud.firestore_v1.services.firestore.transports.grpc import FirestoreGrpcTransport
+from .metrics import FirestoreInterceptor
+
+logger = logging.getLogger(__name__)
+
+# Firestore RPCs grouped by the timeout/retry policy they get
+OPERATION_CLASSES = {
+    'read': ('get_document', 'batch_get_documents', 'list_documents', 'list_collection_ids'),
+    'query': ('run_query', 'run_aggregation_query', 'partition_query'),
+    'write': ('commit', 'batch_write', 'begin_transaction', 'rollback',
+              'create_document', 'update_document', 'delete_document'),
+}
+
+RETRYABLE = {
+    'read': (core_exceptions.DeadlineExceeded, core_exceptions.InternalServerError,
+             core_exceptions.ResourceExhausted, core_exceptions.ServiceUnavailable),
+    'query': (core_exceptions.DeadlineExceeded, core_exceptions.InternalServerError,
+              core_exceptions.ResourceExhausted, core_exceptions.ServiceUnavailable),
+    # Only retry writes on errors where the request never reached the backend
+    'write': (core_exceptions.ResourceExhausted, core_exceptions.ServiceUnavailable),
+}
+
+# Writes per batch commit (Firestore's limit)
+BATCH_SIZE = 500
+
+
+def channel_options(config):
+    return [
+        ('grpc.keepalive_time_ms', config['FIRESTORE_KEEPALIVE_TIME_MS']),
+        ('grpc.keepalive_timeout_ms', config['FIRESTORE_KEEPALIVE_TIMEOUT_MS']),
+        ('grpc.keepalive_permit_without_calls', 1),
+        ('grpc.http2.max_pings_without_data', 0),
+        ('grpc.max_send_message_length', -1),
+        ('grpc.max_receive_message_length', -1),
+    ]
+
+
+class ConfiguredClient(firestore.Client):
+    """Firestore client with our own gRPC channel options, per-operation retry/timeouts
+    and call metrics.
+
+    google-cloud-firestore builds its channel lazily with fixed options, so this
+    overrides the (private) _firestore_api hook to build the channel itself.
+    """
+
+    def __init__(self, *args, channel_options=(), policies=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._channel_options = list(channel_options)
+        self._policies = policies or {}
+
+    @property
+    def _firestore_api(self):
+        if self._firestore_api_internal is None and self._emulator_host is None:
+            channel = FirestoreGrpcTransport.create_channel(
+                self._target,
+                credentials=self._credentials,
+                options=self._channel_options,
+            )
+            # Count and time every RPC for /metrics and Server-Timing
+            channel = grpc.intercept_channel(channel, FirestoreInterceptor())
+            self._transport = FirestoreGrpcTransport(host=self._target, channel=channel)
+            self._apply_policies(self._transport)
+            self._firestore_api_internal = firestore_client.FirestoreClient(
+                transport=self._transport, client_options=self._client_options
+            )
+        return super()._firestore_api
+
+    def _apply_policies(self, transport):
+        for operation_class, (timeout, deadline) in self._policies.items():
+            retry = retries.Retry(
+                initial=0.1,
+                maximum=min(deadline, 10.0),
+                multiplier=1.3,
+                predicate=retries.if_exception_type(*RETRYABLE[operation_class]),
+                deadline=deadline,
+            )
+            for name in OPERATION_CLASSES[operation_class]:
+                method = getattr(transport, name)
+                transport._wrapped_methods[method] = gapic_v1.method.wrap_method(
+                    method,
+                    default_retry=retry,
+                    default_timeout=timeout,
+                    client_info=self._client_info,
+                )
+
+
+def create_client(config, firebase_app=None):
+    """Build the application's Firestore client from the Firebase app's credentials"""
+    firebase_app = firebase_app or firebase_admin.get_app()
+    project = firebase_app.project_id
+    if not project:
+        raise ValueError('Project ID is required to access Firestore')
+    policies = {
+        operation_class: (
+            config[f'FIRESTORE_{operation_class.upper()}_TIMEOUT'],
+            config['FIRESTORE_RETRY_DEADLINE'],
+        )
+        for operation_class in OPERATION_CLASSES
+    }
+    return ConfiguredClient(
+        project=project,
+        credentials=firebase_app.credential.get_credential(),
+        channel_options=channel_options(config),
+        policies=policies,
+    )
+
+
+def warm_up(client):
+    """Open the channel and fetch an access token now rather than on the first request"""
+    try:
+        client.collection('_warmup').document('ping').get(retry=None, timeout=10)
+    except Exception as ex:
+        logger.warning(f"Firestore warm-up failed: {ex}")
+
+
+def init_app(app):
+    client = create_client(app.config)
+    if app.config['FIRESTORE_WARMUP']:
+        warm_up(client)
+    app.extensions['firestore'] = client
+    return client
+
+
+def get_db():
+    """The application-scoped Firestore client"""
+    return current_app.extensions['firestore']
+
+
+def commit_in_batches(db, operations):
+    """Run each operation(batch) (one write apiece), committing every BATCH_SIZE writes"""
+    batch, pending = db.batch(), 0
+    for operation in operations:
+        operation(batch)
+        pending += 1
+        if pending == BATCH_SIZE:
+            batch.commit()
+            batch, pending = db.batch(), 0
+    if pending:
+        batch.commit()
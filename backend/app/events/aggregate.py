@@ -0,0 +1,384 @@
+import math
+import zlib
+import numpy as np
+from firebase_admin import firestore
+from google.cloud.firestore_v1 import DELETE_FIELD, SERVER_TIMESTAMP
+from google.cloud.firestore_v1.field_path import FieldPath
+from .archive import archive_chunks, expand_chunk
+from .slots import BITS_FIELDS
+
+# Per-event heatmap aggregate, kept at events/{id}/aggregates/heatmap:
+#   slotCounts   per-slot number of "yes" responses, indexed like SlotIndex
+#   maybeCounts  per-slot number of "maybe" responses
+#   respondents  uid -> {userId, userName, timeSlotBits, maybeSlotBits}, while the roster is small
+#   rosterShards number of roster shard documents holding the roster instead (0: inline)
+#   respondentCount  number of respondents
+#   version      bumped on every change
+#   format       layout version; aggregates in another format are rebuilt
+#   frozen       set while the event is scheduled/closed; response writes are refused
+# A large roster (long grids of short slots, or many respondents) would take
+# the document past Firestore's 1 MiB limit, so it is split by a hash of the
+# uid over events/{id}/aggregates/heatmap-roster-{000, 001, ...}, each holding
+# {respondents: {uid: ...}}. They sit in the same collection so that deleting
+# the event's subcollections takes them along.
+AGGREGATES_COLLECTION = 'aggregates'
+HEATMAP_AGGREGATE_ID = 'heatmap'
+AGGREGATE_FORMAT = 3
+
+# Roster bytes kept inline in the aggregate document
+ROSTER_INLINE_BYTES = 256_000
+# Roster bytes a shard may reach before the roster is split over more shards
+ROSTER_SHARD_MAX_BYTES = 800_000
+
+SLOT_FIELDS = (('timeSlots', 'slotCounts'), ('maybeSlots', 'maybeCounts'))
+
+
+class ResponsesFrozen(Exception):
+    """The event is scheduled or closed, so its responses can no longer change"""
+
+
+def aggregate_ref(event_ref):
+    return event_ref.collection(AGGREGATES_COLLECTION).document(HEATMAP_AGGREGATE_ID)
+
+
+def roster_shard_ref(event_ref, number):
+    return event_ref.collection(AGGREGATES_COLLECTION).document(f"{HEATMAP_AGGREGATE_ID}-roster-{number:03d}")
+
+
+def _shard_of(user_id, shards):
+    # Stable across processes, unlike hash()
+    return zlib.crc32(user_id.encode('utf-8')) % shards
+
+
+def _entry_bytes(index):
+    # Two bitmaps plus ids, name and field names
+    return 2 * ((index.size + 7) // 8) + 128
+
+
+def roster_shard_count(index, respondents):
+    """Shard documents for a roster of this many respondents (0: kept inline)"""
+    size = respondents * _entry_bytes(index)
+    if size <= ROSTER_INLINE_BYTES:
+        return 0
+    # Written half full, so the next split is many respondents away
+    return math.ceil(2 * size / ROSTER_SHARD_MAX_BYTES)
+
+
+def _outgrown(aggregate, index):
+    """Whether one more respondent would take the roster past its current layout"""
+    shards = aggregate.get('rosterShards', 0)
+    size = (aggregate.get('respondentCount', 0) + 1) * _entry_bytes(index)
+    if not shards:
+        return size > ROSTER_INLINE_BYTES
+    return size / shards > ROSTER_SHARD_MAX_BYTES
+
+
+def _merge_roster(aggregate, shard_docs):
+    aggregate['respondents'] = {}
+    for doc in shard_docs:
+        if doc.exists:
+            aggregate['respondents'].update(doc.to_dict().get('respondents', {}))
+    return aggregate
+
+
+def empty_aggregate(index):
+    return {
+        'format': AGGREGATE_FORMAT,
+        'slotCounts': [0] * index.size,
+        'maybeCounts': [0] * index.size,
+        'respondents': {},
+        'respondentCount': 0,
+        'rosterShards': 0,
+        'version': 0
+    }
+
+
+def is_current(aggregate, index):
+    return (aggregate.get('format') == AGGREGATE_FORMAT
+            and len(aggregate.get('slotCounts', [])) == index.size)
+
+
+def _roster_entry(index, user_id, response, masks):
+    entry = {
+        'userId': response.get('userId', user_id),
+        'userName': response.get('userName', 'Unknown User')
+    }
+    for slots_field, _ in SLOT_FIELDS:
+        entry[BITS_FIELDS[slots_field]] = index.pack(masks[slots_field])
+    return entry
+
+
+def apply_response(aggregate, index, user_id, old_response, new_response):
+    """Apply the difference between a user's old and new response to the aggregate in place.
+
+    Only the user's own roster entry is touched, so aggregate['respondents']
+    may hold just part of the roster. Returns the change in respondents
+    (+1, 0 or -1).
+    """
+    old_response = old_response or {}
+    new_response = new_response or {}
+
+    had_slots = False
+    new_masks = {}
+    for slots_field, counts_field in SLOT_FIELDS:
+        old_mask = index.response_mask(old_response, slots_field)
+        new_mask = index.response_mask(new_response, slots_field)
+        counts = np.asarray(aggregate[counts_field], dtype=np.int64)
+        counts += new_mask.astype(np.int64) - old_mask.astype(np.int64)
+        aggregate[counts_field] = counts.tolist()
+        new_masks[slots_field] = new_mask
+        had_slots = had_slots or bool(old_mask.any())
+
+    if any(mask.any() for mask in new_masks.values()):
+        aggregate['respondents'][user_id] = _roster_entry(index, user_id, new_response, new_masks)
+        return 0 if had_slots else 1
+    aggregate['respondents'].pop(user_id, None)
+    return -1 if had_slots else 0
+
+
+def build_aggregate(index, response_docs):
+    """Build an aggregate from scratch out of response snapshots"""
+    aggregate = empty_aggregate(index)
+    user_ids = []
+    responses = []
+    for doc in response_docs:
+        user_ids.append(doc.id)
+        responses.append(doc.to_dict())
+
+    masks = {}
+    for slots_field, counts_field in SLOT_FIELDS:
+        matrix = index.matrix(responses, slots_field)
+        aggregate[counts_field] = matrix.sum(axis=0, dtype=np.int64).tolist()
+        masks[slots_field] = matrix.astype(bool)
+
+    for row, (user_id, response) in enumerate(zip(user_ids, responses)):
+        row_masks = {slots_field: masks[slots_field][row] for slots_field, _ in SLOT_FIELDS}
+        if any(mask.any() for mask in row_masks.values()):
+            aggregate['respondents'][user_id] = _roster_entry(index, user_id, response, row_masks)
+    return aggregate
+
+
+def _responses_query(event_ref):
+    # Transactions only accept queries, not bare collection references
+    return event_ref.collection('responses').order_by(FieldPath.document_id())
+
+
+def _all_response_docs(transaction, event_ref):
+    # Single responses plus any compacted into archive chunks; while a
+    # compaction is between copying and purging, the single document wins
+    seen = set()
+    for doc in transaction.get(_responses_query(event_ref)):
+        seen.add(doc.id)
+        yield doc
+    for chunk in transaction.get(archive_chunks(event_ref).order_by(FieldPath.document_id())):
+        for doc in expand_chunk(chunk):
+            if doc.id not in seen:
+                yield doc
+
+
+def _carry_over(aggregate, snapshot):
+    # A rebuilt aggregate keeps counting versions, stays frozen, and replaces
+    # the old roster shards instead of orphaning them
+    if snapshot.exists:
+        old = snapshot.to_dict()
+        aggregate['version'] = old.get('version', 0)
+        aggregate['frozen'] = old.get('frozen', False)
+        aggregate['rosterShards'] = old.get('rosterShards', 0)
+
+
+def _read_aggregate(transaction, event_ref, index, roster=True):
+    """(aggregate, rewrite); rewrite means the caller has to write it whole.
+
+    That is when it was rebuilt, or (without roster) when one more respondent
+    would outgrow its roster layout. Without roster a sharded roster is only
+    read if it has to be rewritten; 'respondents' starts out empty otherwise.
+    """
+    snapshot = aggregate_ref(event_ref).get(transaction=transaction)
+    if snapshot.exists and is_current(snapshot.to_dict(), index):
+        aggregate = snapshot.to_dict()
+        rewrite = not roster and _outgrown(aggregate, index)
+        shards = aggregate.get('rosterShards', 0)
+        if shards:
+            aggregate['respondents'] = {}
+            if roster or rewrite:
+                refs = [roster_shard_ref(event_ref, number) for number in range(shards)]
+                _merge_roster(aggregate, transaction.get_all(refs))
+        return aggregate, rewrite
+    # No usable aggregate yet (event predates it): build one from the responses
+    aggregate = build_aggregate(index, _all_response_docs(transaction, event_ref))
+    _carry_over(aggregate, snapshot)
+    return aggregate, True
+
+
+def _read_open_aggregate(transaction, event_ref, index):
+    # Checked inside the write transaction, so a write racing a freeze either
+    # commits first (and is in the snapshot) or retries and is refused
+    aggregate, rewrite = _read_aggregate(transaction, event_ref, index, roster=False)
+    if aggregate.get('frozen'):
+        raise ResponsesFrozen(event_ref.id)
+    return aggregate, rewrite
+
+
+def _write_aggregate(transaction, event_ref, index, aggregate, bump_version=True):
+    """Write the whole aggregate (with its full roster), sharding the roster if it is large"""
+    if bump_version:
+        aggregate['version'] = aggregate.get('version', 0) + 1
+    aggregate['updatedAt'] = SERVER_TIMESTAMP
+    respondents = aggregate['respondents']
+    old_shards = aggregate.get('rosterShards', 0)
+    shards = roster_shard_count(index, len(respondents))
+    aggregate['rosterShards'] = shards
+    aggregate['respondentCount'] = len(respondents)
+    if not shards:
+        transaction.set(aggregate_ref(event_ref), aggregate)
+    else:
+        transaction.set(aggregate_ref(event_ref), {
+            field: value for field, value in aggregate.items() if field != 'respondents'
+        })
+        parts = [{} for _ in range(shards)]
+        for user_id, entry in respondents.items():
+            parts[_shard_of(user_id, shards)][user_id] = entry
+        for number, part in enumerate(parts):
+            transaction.set(roster_shard_ref(event_ref, number), {'respondents': part})
+    for number in range(shards, old_shards):
+        transaction.delete(roster_shard_ref(event_ref, number))
+
+
+def _write_response_change(transaction, event_ref, index, aggregate, rewrite, user_id, delta):
+    """Write the aggregate after one user's response changed.
+
+    Only the paths that changed are sent (the user's roster entry goes to its
+    shard when the roster is sharded), so the rest of the roster is not
+    rewritten; otherwise the aggregate is written whole.
+    """
+    if rewrite:
+        _write_aggregate(transaction, event_ref, index, aggregate)
+        return
+    aggregate['version'] = aggregate.get('version', 0) + 1
+    aggregate['updatedAt'] = SERVER_TIMESTAMP
+    aggregate['respondentCount'] = aggregate.get('respondentCount', 0) + delta
+    changes = {
+        field: aggregate[field]
+        for field in ('slotCounts', 'maybeCounts', 'respondentCount', 'version', 'updatedAt')
+    }
+    entry_path = FieldPath('respondents', user_id).to_api_repr()
+    entry = aggregate['respondents'].get(user_id, DELETE_FIELD)
+    shards = aggregate.get('rosterShards', 0)
+    if shards:
+        transaction.update(roster_shard_ref(event_ref, _shard_of(user_id, shards)), {entry_path: entry})
+    else:
+        changes[entry_path] = entry
+    transaction.update(aggregate_ref(event_ref), changes)
+
+
+def save_response(db, event_ref, index, user_id, response_data):
+    """Write a user's (encoded) response and update the event's aggregate in one transaction"""
+    response_ref = event_ref.collection('responses').document(user_id)
+
+    @firestore.transactional
+    def _save(transaction):
+        aggregate, rewrite = _read_open_aggregate(transaction, event_ref, index)
+        if not rewrite:
+            old = response_ref.get(transaction=transaction)
+            delta = apply_response(aggregate, index, user_id, old.to_dict() if old.exists else None, response_data)
+        else:
+            # The full roster already holds the old response; swap it for the new one
+            old = aggregate['respondents'].get(user_id)
+            delta = apply_response(aggregate, index, user_id, old, response_data)
+        transaction.set(response_ref, response_data)
+        _write_response_change(transaction, event_ref, index, aggregate, rewrite, user_id, delta)
+
+    _save(db.transaction())
+
+
+def patch_response(db, event_ref, index, user_id, changes, new_response):
+    """Apply painted/erased slots to a user's response and the aggregate in one transaction.
+
+    changes maps 'timeSlots'/'maybeSlots' to (add_mask, remove_mask); other slot
+    fields are left as they are. new_response() supplies the base document
+    (userId, userName, ...) when the user has not responded yet. Returns the
+    stored response.
+    """
+    response_ref = event_ref.collection('responses').document(user_id)
+
+    @firestore.transactional
+    def _patch(transaction):
+        aggregate, rewrite = _read_open_aggregate(transaction, event_ref, index)
+        old = response_ref.get(transaction=transaction)
+        old = old.to_dict() if old.exists else None
+        response = dict(old) if old else new_response()
+        for slots_field, (add, remove) in changes.items():
+            mask = (index.response_mask(old or {}, slots_field) | add) & ~remove
+            response[BITS_FIELDS[slots_field]] = index.pack(mask)
+            # Old string keys are now in the bitmap; keep only the ones off the grid
+            unknown = [slot for slot in response.get(slots_field) or [] if not index.positions(slot)]
+            if unknown:
+                response[slots_field] = unknown
+            else:
+                response.pop(slots_field, None)
+        response['updatedAt'] = SERVER_TIMESTAMP
+        # A rebuilt aggregate already counts the old response, so the diff is the same
+        delta = apply_response(aggregate, index, user_id, old, response)
+        transaction.set(response_ref, response)
+        _write_response_change(transaction, event_ref, index, aggregate, rewrite, user_id, delta)
+        return response
+
+    return _patch(db.transaction())
+
+
+def rebuild_aggregate(db, event_ref, index):
+    """Recompute an event's aggregate from its responses (repair / backfill)"""
+
+    @firestore.transactional
+    def _rebuild(transaction):
+        old = aggregate_ref(event_ref).get(transaction=transaction)
+        aggregate = build_aggregate(index, _all_response_docs(transaction, event_ref))
+        _carry_over(aggregate, old)
+        _write_aggregate(transaction, event_ref, index, aggregate)
+        return aggregate
+
+    return _rebuild(db.transaction())
+
+
+def set_frozen(db, event_ref, index, frozen, bump_version=False):
+    """Freeze (or unfreeze) an event's responses and return its aggregate.
+
+    The counts do not change, so the version is left alone unless bump_version.
+    """
+
+    @firestore.transactional
+    def _set(transaction):
+        aggregate, rebuilt = _read_aggregate(transaction, event_ref, index)
+        if rebuilt:
+            aggregate['frozen'] = frozen
+            _write_aggregate(transaction, event_ref, index, aggregate, bump_version=bump_version)
+        elif bump_version or aggregate.get('frozen', False) != frozen:
+            aggregate['frozen'] = frozen
+            changes = {'frozen': frozen}
+            if bump_version:
+                aggregate['version'] = aggregate.get('version', 0) + 1
+                aggregate['updatedAt'] = SERVER_TIMESTAMP
+                changes.update(version=aggregate['version'], updatedAt=SERVER_TIMESTAMP)
+            transaction.update(aggregate_ref(event_ref), changes)
+        return aggregate
+
+    return _set(db.transaction())
+
+
+def aggregate_version(event_ref):
+    """The aggregate's version alone (None if there is no aggregate yet), without downloading the roster"""
+    snapshot = aggregate_ref(event_ref).get(field_paths=['version'])
+    return snapshot.get('version') if snapshot.exists else None
+
+
+def load_aggregate(db, event_ref, index):
+    """Read an event's aggregate (one document read, plus one batched read of a sharded roster),
+    building it if missing"""
+    snapshot = aggregate_ref(event_ref).get()
+    if snapshot.exists and is_current(snapshot.to_dict(), index):
+        aggregate = snapshot.to_dict()
+        shards = aggregate.get('rosterShards', 0)
+        if shards:
+            _merge_roster(aggregate, db.get_all([roster_shard_ref(event_ref, number) for number in range(shards)]))
+        return aggregate
+    return rebuild_aggregate(db, event_ref, index)
@@ -0,0 +1,67 @@
+import bisect
+import copy
+
+# Responses of finished events folded into a few documents,
+# events/{id}/responseArchive/{00000, 00001, ...} (see compaction.py):
+#   responses  response id -> response document, exactly as it was stored
+#   userIds    response ids in the chunk (for collection-group lookups by user)
+#   firstId / lastId  id range of the chunk; chunks are in response-id order
+# The event records the chunk boundaries under `archive`, so readers know
+# which chunks to read without a query. (Not called 'responses': collection-
+# group queries on responses must keep finding only single responses.)
+ARCHIVE_COLLECTION = 'responseArchive'
+
+
+class ArchivedResponse:
+    """A response read from an archive chunk, shaped like a DocumentSnapshot for readers"""
+
+    def __init__(self, response_id, data):
+        self.id = response_id
+        self._data = data
+
+    @property
+    def exists(self):
+        return True
+
+    def to_dict(self):
+        return copy.deepcopy(self._data)
+
+
+def is_archived(event_data):
+    return bool(event_data.get('archive'))
+
+
+def archive_boundaries(event_data):
+    """What identifies one archiving of the event: its chunk count and boundaries (None if not archived)"""
+    archive = event_data.get('archive')
+    if not archive:
+        return None
+    return archive.get('chunks', 0), list(archive.get('lastIds', []))
+
+
+def archive_chunks(event_ref):
+    return event_ref.collection(ARCHIVE_COLLECTION)
+
+
+def chunk_id(number):
+    return f"{number:05d}"
+
+
+def expand_chunk(chunk_doc, after=None):
+    """The responses in a chunk snapshot, in id order"""
+    responses = chunk_doc.to_dict().get('responses', {})
+    return [
+        ArchivedResponse(response_id, responses[response_id])
+        for response_id in sorted(responses) if after is None or response_id > after
+    ]
+
+
+def iter_archived(event_ref, event_data, after=None):
+    """Archived responses in id order, reading one chunk document at a time"""
+    last_ids = event_data['archive'].get('lastIds', [])
+    # Chunks whose last id is <= the cursor hold nothing after it
+    first = bisect.bisect_right(last_ids, after) if after else 0
+    for number in range(first, len(last_ids)):
+        chunk = archive_chunks(event_ref).document(chunk_id(number)).get()
+        if chunk.exists:
+            yield from expand_chunk(chunk, after)
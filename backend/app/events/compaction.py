@@ -0,0 +1,166 @@
+import math
+from datetime import datetime, timedelta, timezone
+from google.cloud.firestore_v1 import SERVER_TIMESTAMP, DELETE_FIELD
+from google.cloud.firestore_v1.field_path import FieldPath
+from ..db import commit_in_batches
+from .aggregate import set_frozen
+from .archive import archive_boundaries, archive_chunks, chunk_id, expand_chunk, is_archived
+from .deletion import is_deleting
+from .snapshots import FROZEN_STATUSES
+
+# Folds the responses of finished events into archive chunks (layout in archive.py)
+
+# Stay well clear of Firestore's 1 MiB document limit
+CHUNK_MAX_BYTES = 800_000
+
+
+def _estimated_size(response):
+    # Field names and values; close enough to Firestore's own size accounting
+    size = 32
+    for key, value in response.items():
+        size += len(key) + 1
+        if isinstance(value, (str, bytes)):
+            size += len(value) + 1
+        elif isinstance(value, list):
+            size += sum(len(item) + 1 if isinstance(item, str) else 8 for item in value)
+        else:
+            size += 16
+    return size
+
+
+def build_chunks(docs, chunk_size):
+    """Group response snapshots (in id order) into chunks of at most chunk_size / CHUNK_MAX_BYTES"""
+    chunks = []
+    current, current_size = {}, 0
+    for doc in docs:
+        data = doc.to_dict()
+        size = _estimated_size(data) + len(doc.id)
+        if current and (len(current) >= chunk_size or current_size + size > CHUNK_MAX_BYTES):
+            chunks.append(current)
+            current, current_size = {}, 0
+        current[doc.id] = data
+        current_size += size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def archive_event(db, event_ref, index, chunk_size):
+    """Copy an event's responses into archive chunks and point the event at them.
+
+    The single response documents are left in place; delete them with
+    purge_responses once no reader can still hold the unarchived event.
+    Returns (responses archived, chunks written).
+    """
+    # Writes are refused from here on; the version bump changes the ETags
+    # over the response list along with its storage
+    set_frozen(db, event_ref, index, True, bump_version=True)
+    responses = event_ref.collection('responses').order_by(FieldPath.document_id())
+    chunks = build_chunks(responses.stream(), chunk_size)
+    # One commit per chunk: a batch of several full chunks would pass
+    # Firestore's 10 MiB request limit
+    for number, chunk in enumerate(chunks):
+        archive_chunks(event_ref).document(chunk_id(number)).set(
+            {'responses': chunk, 'userIds': sorted(chunk), 'firstId': min(chunk), 'lastId': max(chunk)}
+        )
+    total = sum(len(chunk) for chunk in chunks)
+    event_ref.update({'archive': {
+        'chunks': len(chunks),
+        'responses': total,
+        'lastIds': [max(chunk) for chunk in chunks],
+        'archivedAt': SERVER_TIMESTAMP
+    }})
+    return total, len(chunks)
+
+
+def purge_responses(db, event_ref, boundaries):
+    """Delete an archived event's single response documents; returns how many were deleted.
+
+    boundaries (see archive_boundaries) is the archive the caller waited out;
+    if the event no longer carries it (reopened, and maybe taking responses
+    again), nothing is deleted and None is returned.
+    """
+    event_doc = event_ref.get()
+    if not event_doc.exists or archive_boundaries(event_doc.to_dict()) != boundaries:
+        return None
+    writer = db.bulk_writer()
+    deleted = 0
+    for doc in event_ref.collection('responses').select([FieldPath.document_id()]).stream():
+        writer.delete(doc.reference)
+        deleted += 1
+    writer.close()
+    return deleted
+
+
+def restore_event(db, event_ref, event_data):
+    """Expand an archived event back into single response documents (before it takes writes again)"""
+    chunk_refs = [
+        archive_chunks(event_ref).document(chunk_id(number))
+        for number in range(event_data['archive'].get('chunks', 0))
+    ]
+    restored = 0
+    for chunk_ref in chunk_refs:
+        chunk = chunk_ref.get()
+        if not chunk.exists:
+            continue
+        # Batched chunk by chunk, so a commit carries at most CHUNK_MAX_BYTES
+        docs = expand_chunk(chunk)
+        commit_in_batches(db, (
+            (lambda batch, doc=doc: batch.set(event_ref.collection('responses').document(doc.id), doc.to_dict()))
+            for doc in docs
+        ))
+        restored += len(docs)
+    # Point readers back at the responses before the chunks go away
+    event_ref.update({'archive': DELETE_FIELD})
+    commit_in_batches(db, ((lambda batch, ref=ref: batch.delete(ref)) for ref in chunk_refs))
+    return restored
+
+
+def _as_datetime(value):
+    # Firestore timestamps come back as (timezone-aware) datetimes
+    return value if isinstance(value, datetime) else None
+
+
+def is_compactable(event_data, today, closed_before):
+    """Past its end date, or scheduled/closed since before closed_before"""
+    if is_deleting(event_data) or is_archived(event_data):
+        return False
+    end_date = event_data.get('endDate')
+    if end_date and end_date < today.isoformat():
+        return True
+    if event_data.get('status') in FROZEN_STATUSES:
+        # The later of the two: a reopened event may carry a stale one from an earlier finish
+        finished = [_as_datetime(event_data.get(field)) for field in ('scheduledAt', 'closedAt')]
+        finished = [value for value in finished if value is not None]
+        return bool(finished) and max(finished) < closed_before
+    return False
+
+
+def find_compactable(db, closed_days, now=None):
+    """Events eligible for compaction, from an endDate query and a status query"""
+    now = now or datetime.now(timezone.utc)
+    today = now.date()
+    closed_before = now - timedelta(days=closed_days)
+    events = db.collection('events')
+    queries = (
+        events.where('endDate', '<', today.isoformat()),
+        events.where('status', 'in', list(FROZEN_STATUSES)),
+    )
+    seen = set()
+    for query in queries:
+        for doc in query.stream():
+            if doc.id not in seen and is_compactable(doc.to_dict(), today, closed_before):
+                seen.add(doc.id)
+                yield doc
+
+
+def estimate_savings(responses, chunk_size):
+    """Document reads (and deletes) saved each time all responses are walked, and the one-off cost"""
+    chunks = math.ceil(responses / chunk_size) if responses else 0
+    return {
+        'responses': responses,
+        'chunks': chunks,
+        'readsSavedPerWalk': responses - chunks,
+        'compactionReads': responses,
+        'compactionWrites': chunks + responses + 2,
+    }
@@ -0,0 +1,60 @@
+import logging
+import threading
+from google.cloud.firestore_v1 import SERVER_TIMESTAMP
+from google.cloud.firestore_v1.field_path import FieldPath
+
+logger = logging.getLogger(__name__)
+
+DELETING = 'deleting'
+
+
+def is_deleting(event_data):
+    return event_data.get('status') == DELETING
+
+
+def mark_deleting(event_ref):
+    """Flag the event so readers stop serving it while the cascade runs"""
+    event_ref.update({'status': DELETING, 'deletingAt': SERVER_TIMESTAMP})
+
+
+def count_responses(event_ref):
+    """Count responses with an aggregation query instead of streaming them"""
+    result = event_ref.collection('responses').count().get()
+    return int(result[0][0].value)
+
+
+def delete_event_tree(db, event_ref):
+    """Delete an event and every document under it with batched BulkWriter deletes.
+
+    Subcollections go first and the event document last, so an interrupted run
+    leaves a 'deleting' event behind that can simply be deleted again.
+    """
+    writer = db.bulk_writer()
+    deleted = 0
+    for collection in event_ref.collections():
+        # Keys-only query: document ids are all a delete needs
+        for doc in collection.select([FieldPath.document_id()]).stream():
+            writer.delete(doc.reference)
+            deleted += 1
+    writer.flush()
+    writer.delete(event_ref)
+    writer.close()
+    return deleted + 1
+
+
+def find_deleting(db):
+    """Events left in 'deleting' by a cascade that never finished (e.g. the process restarted)"""
+    return db.collection('events').where('status', '==', DELETING).stream()
+
+
+def delete_event_in_background(db, event_ref):
+    def _run():
+        try:
+            deleted = delete_event_tree(db, event_ref)
+            logger.info(f"Deleted event {event_ref.id} ({deleted} documents)")
+        except Exception as ex:
+            logger.error(f"Background delete of event {event_ref.id} failed: {ex}")
+
+    thread = threading.Thread(target=_run, name=f"delete-event-{event_ref.id}", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,93 @@
+import logging
+import threading
+from collections import OrderedDict
+from ..cache import TTLCache
+from ..config import Config
+from ..metrics import register_cache
+
+logger = logging.getLogger(__name__)
+
+# events/{id} snapshots (DocumentSnapshot.to_dict() hands out copies, so they are
+# safe to share). Entries live for EVENT_CACHE_TTL seconds and are dropped by
+# every write in this blueprint; other processes' writes show up after the TTL,
+# or straight away for events that have a listener (EVENT_CACHE_WATCH).
+event_cache = register_cache('event', TTLCache(Config.EVENT_CACHE_SIZE, Config.EVENT_CACHE_TTL))
+
+
+class EventWatches:
+    """Firestore listeners keeping the hottest cached events fresh, at most `limit` of them"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._watches = OrderedDict()  # event id -> watch
+        self._lock = threading.Lock()
+
+    def ensure(self, event_ref):
+        evicted = None
+        with self._lock:
+            if event_ref.id in self._watches:
+                self._watches.move_to_end(event_ref.id)
+                return
+            if len(self._watches) >= self.limit:
+                evicted = self._watches.popitem(last=False)[1]
+            self._watches[event_ref.id] = event_ref.on_snapshot(self._refresh(event_ref.id))
+        if evicted is not None:
+            evicted.unsubscribe()
+
+    def _refresh(self, event_id):
+        def on_snapshot(docs, changes, read_time):
+            snapshot = docs[0] if docs else None
+            if snapshot is not None and snapshot.exists:
+                event_cache.set(event_id, snapshot)
+            else:
+                event_cache.pop(event_id)
+        return on_snapshot
+
+    def clear(self):
+        with self._lock:
+            watches, self._watches = list(self._watches.values()), OrderedDict()
+        for watch in watches:
+            try:
+                watch.unsubscribe()
+            except Exception as ex:
+                logger.warning(f"Could not close event listener: {ex}")
+
+
+event_watches = EventWatches(Config.EVENT_CACHE_WATCH_MAX)
+
+
+def load_event(db, event_id):
+    """Read-through lookup of an event snapshot; missing events are not cached"""
+    snapshot = event_cache.get(event_id)
+    if snapshot is not None:
+        return snapshot
+    event_ref = db.collection('events').document(event_id)
+    snapshot = event_ref.get()
+    if snapshot.exists:
+        event_cache.set(event_id, snapshot)
+        if Config.EVENT_CACHE_WATCH:
+            event_watches.ensure(event_ref)
+    return snapshot
+
+
+def invalidate_event(event_id):
+    event_cache.pop(event_id)
+
+
+def load_events(db, event_ids):
+    """Read-through lookup of several events: cache hits, then one batched read for the rest"""
+    snapshots = {}
+    missing = []
+    for event_id in dict.fromkeys(event_ids):
+        snapshot = event_cache.get(event_id)
+        if snapshot is not None:
+            snapshots[event_id] = snapshot
+        else:
+            missing.append(event_id)
+    if missing:
+        refs = [db.collection('events').document(event_id) for event_id in missing]
+        for snapshot in db.get_all(refs):
+            snapshots[snapshot.id] = snapshot
+            if snapshot.exists:
+                event_cache.set(snapshot.id, snapshot)
+    return snapshots
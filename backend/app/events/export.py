@@ -0,0 +1,133 @@
+import csv
+import io
+import json
+import numpy as np
+from ..pagination import chunked
+
+# pyarrow is optional; without it the parquet format is not offered
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+EXPORT_FORMATS = ('csv', 'ndjson', 'parquet')
+EXPORT_SHAPES = ('long', 'wide')
+
+RESPONDENT_COLUMNS = ['userId', 'userName', 'userEmail']
+LONG_COLUMNS = RESPONDENT_COLUMNS + ['slot', 'day', 'hour', 'minute', 'availability']
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def _respondent(doc, response):
+    return [response.get('userId', doc.id), response.get('userName'), response.get('userEmail')]
+
+
+def _unknown_slots(index, response, slots_field):
+    return [slot for slot in response.get(slots_field) or [] if not index.positions(slot)]
+
+
+def long_rows(index, docs):
+    """One row per respondent x slot they marked, as lists in LONG_COLUMNS order"""
+    for doc in docs:
+        response = doc.to_dict()
+        respondent = _respondent(doc, response)
+        for slots_field, availability in (('timeSlots', 'yes'), ('maybeSlots', 'maybe')):
+            for position in np.flatnonzero(index.response_mask(response, slots_field)):
+                day = int(position) // index.slots_per_day
+                hour, minute = index.grid.hour_minute(position)
+                yield respondent + [index.key(position), index.days[day], hour, minute, availability]
+            # Legacy keys that are not on the grid are exported as-is
+            for slot in _unknown_slots(index, response, slots_field):
+                yield respondent + [slot, None, None, None, availability]
+
+
+def wide_columns(index):
+    return RESPONDENT_COLUMNS + [index.key(position) for position in range(index.size)]
+
+
+def wide_rows(index, docs):
+    """One row per respondent with a 'yes' / 'maybe' / '' cell for every slot of the grid"""
+    for doc in docs:
+        response = doc.to_dict()
+        cells = np.full(index.size, '', dtype=object)
+        cells[index.response_mask(response, 'maybeSlots')] = 'maybe'
+        cells[index.response_mask(response, 'timeSlots')] = 'yes'
+        yield _respondent(doc, response) + cells.tolist()
+
+
+def _csv_line(row):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(['' if value is None else value for value in row])
+    return buffer.getvalue()
+
+
+def write_csv(columns, rows):
+    yield _csv_line(columns)
+    for row in rows:
+        yield _csv_line(row)
+
+
+def write_ndjson(columns, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), separators=(',', ':')) + '\n'
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands what was written so far to a generator"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data, self.chunks = b''.join(self.chunks), []
+        return data
+
+
+def write_parquet(columns, rows, batch_size):
+    """Parquet written one row group per batch, so only a batch is ever held in memory"""
+    schema = pyarrow.schema([
+        (column, pyarrow.int32() if column in ('hour', 'minute') else pyarrow.string())
+        for column in columns
+    ])
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    try:
+        for batch in chunked(rows, batch_size):
+            writer.write_table(pyarrow.Table.from_pylist(
+                [dict(zip(columns, row)) for row in batch], schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_body(index, docs, export_format, shape, batch_size):
+    """Generator of the export's body chunks for the given format and shape"""
+    if shape == 'long':
+        columns, rows = LONG_COLUMNS, long_rows(index, docs)
+    else:
+        columns, rows = wide_columns(index), wide_rows(index, docs)
+    if export_format == 'csv':
+        return write_csv(columns, rows)
+    if export_format == 'ndjson':
+        return write_ndjson(columns, rows)
+    return write_parquet(columns, rows, batch_size)
@@ -0,0 +1,131 @@
+import json
+import logging
+import queue
+import threading
+import numpy as np
+from .aggregate import aggregate_ref, is_current
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+def sse_message(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class HeatmapFeed:
+    """One Firestore listener on an event's heatmap aggregate, fanned out to subscribers.
+
+    Each snapshot is turned into a delta of the slots whose counts changed; new
+    subscribers first get the current non-zero counts as an "init" message.
+    """
+
+    def __init__(self, event_ref, index):
+        self.event_ref = event_ref
+        self.index = index
+        self.subscribers = set()
+        self.counts = np.zeros(index.size, dtype=np.int64)
+        self.maybe_counts = np.zeros(index.size, dtype=np.int64)
+        self.version = 0
+        self.total = 0
+        self._lock = threading.Lock()
+        self._watch = aggregate_ref(event_ref).on_snapshot(self._on_snapshot)
+
+    def _cells(self, positions):
+        return [{
+            'slot': self.index.key(position),
+            'count': int(self.counts[position]),
+            'maybeCount': int(self.maybe_counts[position])
+        } for position in positions]
+
+    def _state(self):
+        nonzero = np.flatnonzero(self.counts | self.maybe_counts)
+        return {'version': self.version, 'totalResponses': self.total, 'slots': self._cells(nonzero)}
+
+    def _on_snapshot(self, docs, changes, read_time):
+        aggregate = docs[0].to_dict() if docs and docs[0].exists else None
+        if aggregate is not None and not is_current(aggregate, self.index):
+            return  # an old-format aggregate; wait for the rebuild
+        with self._lock:
+            if aggregate is None:
+                counts = np.zeros(self.index.size, dtype=np.int64)
+                maybe_counts = np.zeros(self.index.size, dtype=np.int64)
+            else:
+                counts = np.asarray(aggregate['slotCounts'], dtype=np.int64)
+                maybe_counts = np.asarray(aggregate['maybeCounts'], dtype=np.int64)
+            changed = np.flatnonzero((counts != self.counts) | (maybe_counts != self.maybe_counts))
+            self.counts, self.maybe_counts = counts, maybe_counts
+            self.version = aggregate.get('version', 0) if aggregate else 0
+            self.total = aggregate.get('respondentCount', 0) if aggregate else 0
+            if not len(changed):
+                return
+            message = sse_message('delta', {
+                'version': self.version,
+                'totalResponses': self.total,
+                'slots': self._cells(changed)
+            })
+            for subscriber in self.subscribers:
+                self._push(subscriber, message)
+
+    def _push(self, subscriber, message):
+        try:
+            subscriber.put_nowait(message)
+        except queue.Full:
+            # Slow client: drop its backlog and resend the full state instead
+            while not subscriber.empty():
+                subscriber.get_nowait()
+            subscriber.put_nowait(sse_message('init', self._state()))
+
+    def add(self):
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            subscriber.put_nowait(sse_message('init', self._state()))
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def remove(self, subscriber):
+        """Drop a subscriber; returns how many are left"""
+        # Under the feed lock, so a snapshot callback never sees the set change mid-iteration
+        with self._lock:
+            self.subscribers.discard(subscriber)
+            return len(self.subscribers)
+
+    def close(self):
+        self._watch.unsubscribe()
+
+
+class HeatmapFeeds:
+    """Process-wide registry of reference-counted heatmap feeds, one per event"""
+
+    def __init__(self):
+        self._feeds = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, event_ref, index):
+        with self._lock:
+            feed = self._feeds.get(event_ref.id)
+            if feed is None:
+                feed = HeatmapFeed(event_ref, index)
+                self._feeds[event_ref.id] = feed
+            return feed.add()
+
+    def unsubscribe(self, event_id, subscriber):
+        with self._lock:
+            feed = self._feeds.get(event_id)
+            if feed is None:
+                return
+            if feed.remove(subscriber):
+                return
+            # Last subscriber gone: tear the listener down
+            del self._feeds[event_id]
+        try:
+            feed.close()
+        except Exception as ex:
+            logger.warning(f"Could not close heatmap listener for {event_id}: {ex}")
+
+    def __len__(self):
+        return len(self._feeds)
+
+
+heatmap_feeds = HeatmapFeeds()
@@ -1,18 +1,51 @@
-from flask import Blueprint, request, jsonify, g
-from firebase_admin import firestore, auth
-from firebase_admin import credentials, initialize_app
+import base64
+import click
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from flask import Blueprint, Response, request, jsonify, g, current_app, stream_with_context
 from google.cloud.firestore_v1 import SERVER_TIMESTAMP
 from google.cloud.firestore_v1 import ArrayUnion
 from pydantic import ValidationError
-from ..middleware import auth_required
+from ..config import Config
+from ..conditional import make_etag, not_modified, with_etag
+from ..db import get_db
+from ..metrics import in_current_context
+from ..middleware import auth_required, authenticate_request
+from ..pagination import (
+    PageParamsError, chunked, encode_page_token, page_params, stream_in_batches,
+    stream_json_array, wants_stream
+)
+from ..profiles import normalize_email, resolve_emails, resolve_profile, resolve_profiles
 from ..schemas.event import EventCreateModel
-from ..schemas.response import ResponseCreateModel
+from ..schemas.response import ResponseCreateModel, ResponsePatchModel
+from ..users.availability import invalidate_availability
+from . import export
+from .aggregate import (
+    ResponsesFrozen, aggregate_version, load_aggregate, patch_response, rebuild_aggregate, save_response,
+    set_frozen
+)
+from .archive import archive_boundaries, is_archived, iter_archived
+from .compaction import archive_event, estimate_savings, find_compactable, purge_responses, restore_event
+from .deletion import (
+    count_responses, delete_event_in_background, delete_event_tree, find_deleting, is_deleting,
+    mark_deleting
+)
+from .event_cache import invalidate_event, load_event
+from .live import heatmap_feeds
+from .slots import BITS_FIELDS, SlotIndex
+from .snapshots import drop_snapshot, frozen_response, is_frozen, load_snapshot_body, write_snapshot
+from .suggestions import suggest_windows
+from .user_index import drop_event_index, index_entry, sync_event_index, user_events
 
-# Firestore initialization (ensure this only runs once)
-# This snippet assumes credentials initialized in app factory
+# The Firestore client is created once in the app factory; handlers use get_db()
 
 events_bp = Blueprint('events', __name__)
 
+# Shared pool for running independent Firestore queries side by side
+query_executor = ThreadPoolExecutor(max_workers=Config.QUERY_WORKERS, thread_name_prefix='firestore-query')
+
 @events_bp.route('', methods=['POST'])
 @auth_required
 def create_event():
@@ -20,78 +53,204 @@ def create_event():
         payload = EventCreateModel(**request.get_json())
     except ValidationError as e:
         return jsonify({'errors': e.errors()}), 422
-    db = firestore.client()
+    db = get_db()
     doc_ref = db.collection('events').document()
-    doc_ref.set({
+    event_data = {
         'name': payload.name,
         'type': payload.type,
         'timezone': payload.timezone,
         'startDate': payload.start_date.isoformat(),
         'endDate': payload.end_date.isoformat(),
+        'slotMinutes': payload.slot_minutes,
         'invitees': payload.invitees,
         'createdBy': g.current_user['uid'],
         'createdAt': SERVER_TIMESTAMP,
-        'status': 'collecting',  # collecting, scheduled, closed
+        'status': 'collecting',  # collecting, scheduled, closed, deleting
         'scheduledDate': None,
         'scheduledTime': None
-    })
+    }
+    doc_ref.set(event_data)
+    _sync_index(db, doc_ref.id, event_data)
     return jsonify({'eventId': doc_ref.id}), 201
 
+def _sync_index(db, event_id, event_data):
+    # The event write already succeeded; a failed index update is logged and
+    # repaired by `flask events backfill-user-index`
+    try:
+        sync_event_index(db, event_id, event_data)
+    except Exception as ex:
+        current_app.logger.error(f"Could not update user event index for {event_id}: {ex}")
+
+def _freeze(db, event_id, event_data):
+    # Lock the responses, then store the finished views so reads are one document.
+    # The status change already succeeded; without a snapshot views are served live.
+    event_ref = db.collection('events').document(event_id)
+    index = SlotIndex(event_data)
+    try:
+        aggregate = set_frozen(db, event_ref, index, True)
+        responses = _decoded_responses(index, _response_docs(event_ref, event_data))
+        write_snapshot(event_ref, event_data, aggregate.get('version'), {
+            'heatmap': _full_heatmap(index, aggregate),
+            'heatmapCompact': _compact_heatmap(index, aggregate),
+            'responses': responses
+        })
+    except Exception as ex:
+        current_app.logger.error(f"Could not snapshot event {event_id}: {ex}")
+
+def _add_owner_info(events, uid, user_email):
+    # Resolve every owner (including the caller) with one batched Auth lookup
+    owners = resolve_profiles([uid] + [e.get('createdBy') for e in events])
+    for e in events:
+        owner = owners.get(e.get('createdBy'))
+        if e['isOwner']:
+            # Add owner info for created events
+            e['ownerEmail'] = user_email
+            e['ownerName'] = owner['name'] if owner else user_email
+        elif owner:
+            # Add owner info for invited events
+            e['ownerEmail'] = owner['email']
+            e['ownerName'] = owner['name']
+        else:
+            e['ownerEmail'] = 'Unknown'
+            e['ownerName'] = 'Unknown'
+    return events
+
+def _event_queries(db, uid, user_email):
+    # Events I created
+    queries = [('created', db.collection('events').where('createdBy', '==', uid))]
+    # Events I'm invited to (by email)
+    if user_email:
+        queries.append(('invited', db.collection('events').where('invitees', 'array_contains', user_email)))
+    return queries
+
+def _event_entry(doc, phase):
+    e = doc.to_dict()
+    if is_deleting(e):
+        return None
+    e['eventId'] = doc.id
+    e['isOwner'] = phase == 'created'
+    return e
+
+def _iter_user_events(db, uid, user_email, cursor=None, batch_size=None):
+    """Yield (phase, event) for events the user created, then events they are invited to"""
+    cursor = cursor or {}
+    phases = _event_queries(db, uid, user_email)
+    names = [name for name, _ in phases]
+    first = names.index(cursor['phase']) if cursor.get('phase') in names else 0
+    for phase, query in phases[first:]:
+        last_id = cursor.get('after') if phase == cursor.get('phase') else None
+        for doc in stream_in_batches(query, last_id, batch_size):
+            if phase == 'invited' and doc.get('createdBy') == uid:
+                continue  # already listed as created
+            e = _event_entry(doc, phase)
+            if e is not None:
+                yield phase, e
+
+def _timed_query(query):
+    started = time.perf_counter()
+    docs = list(query.stream())
+    return docs, (time.perf_counter() - started) * 1000
+
+def _fetch_user_events(db, uid, user_email):
+    """Run the created/invited queries concurrently and merge them, de-duplicated by id.
+
+    Returns (events, timings) where timings maps each sub-query to milliseconds.
+    """
+    futures = [
+        (phase, query_executor.submit(in_current_context(_timed_query), query))
+        for phase, query in _event_queries(db, uid, user_email)
+    ]
+    events = []
+    seen = set()
+    timings = {}
+    for phase, future in futures:
+        docs, timings[phase] = future.result()
+        for doc in docs:
+            if doc.id in seen:
+                continue
+            seen.add(doc.id)
+            e = _event_entry(doc, phase)
+            if e is not None:
+                events.append(e)
+    return events, timings
+
+def _list_indexed_events(db, uid, limit, cursor):
+    """List from users/{uid}/events: one query, owner info already denormalized"""
+    query = user_events(db, uid)
+    if wants_stream():
+        batch_size = current_app.config['STREAM_BATCH_SIZE']
+        rows = (index_entry(doc) for doc in stream_in_batches(query, batch_size=batch_size))
+        return stream_json_array(e for e in rows if not is_deleting(e))
+
+    if limit is None:
+        events = [index_entry(doc) for doc in query.stream()]
+        return jsonify([e for e in events if not is_deleting(e)]), 200
+
+    docs = list(islice(stream_in_batches(query, cursor.get('after'), limit + 1), limit + 1))
+    next_token = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_token = encode_page_token({'after': docs[-1].id})
+    events = [index_entry(doc) for doc in docs]
+    return jsonify({'events': [e for e in events if not is_deleting(e)], 'nextPageToken': next_token}), 200
+
 @events_bp.route('', methods=['GET'])
 @auth_required
 def list_events():
-    db = firestore.client()
+    try:
+        limit, cursor = page_params()
+    except PageParamsError as e:
+        return jsonify({'error': str(e)}), 400
+    db = get_db()
     uid = g.current_user['uid']
-
-    # Events I created
-    created_q = db.collection('events').where('createdBy', '==', uid).stream()
-    # Events I'm invited to (by email)
     user_email = g.current_user.get('email')
-    invited_q = db.collection('events').where('invitees', 'array_contains', user_email).stream() if user_email else []
 
-    events = []
-    for doc in created_q:
-        e = doc.to_dict()
-        e['eventId'] = doc.id
-        e['isOwner'] = True
-        # Add owner info for created events
-        e['ownerEmail'] = user_email
-        try:
-            current_user = auth.get_user(uid)
-            e['ownerName'] = current_user.display_name or current_user.email
-        except:
-            e['ownerName'] = user_email
-        events.append(e)
-
-    for doc in invited_q:
-        if doc.id in [e['eventId'] for e in events]:
-            continue
-        e = doc.to_dict()
-        e['eventId'] = doc.id
-        e['isOwner'] = False
-        # Add owner info for invited events
-        try:
-            owner_user = auth.get_user(e.get('createdBy'))
-            e['ownerEmail'] = owner_user.email
-            e['ownerName'] = owner_user.display_name or owner_user.email
-        except:
-            e['ownerEmail'] = 'Unknown'
-            e['ownerName'] = 'Unknown'
-        events.append(e)
+    if current_app.config['USER_EVENT_INDEX']:
+        return _list_indexed_events(db, uid, limit, cursor)
+
+    if wants_stream():
+        # Write the array incrementally; owners are resolved one batch at a time
+        batch_size = current_app.config['STREAM_BATCH_SIZE']
+        def generate():
+            rows = (e for _, e in _iter_user_events(db, uid, user_email, batch_size=batch_size))
+            for chunk in chunked(rows, batch_size):
+                yield from _add_owner_info(chunk, uid, user_email)
+        return stream_json_array(generate())
+
+    if limit is None:
+        events, timings = _fetch_user_events(db, uid, user_email)
+        response = jsonify(_add_owner_info(events, uid, user_email))
+        response.headers['Server-Timing'] = ', '.join(
+            f'{phase};dur={elapsed:.1f}' for phase, elapsed in timings.items()
+        )
+        return response, 200
 
-    return jsonify(events), 200
+    page = list(islice(_iter_user_events(db, uid, user_email, cursor, batch_size=limit + 1), limit + 1))
+    next_token = None
+    if len(page) > limit:
+        page = page[:limit]
+        phase, last = page[-1]
+        next_token = encode_page_token({'phase': phase, 'after': last['eventId']})
+    events = _add_owner_info([e for _, e in page], uid, user_email)
+    return jsonify({'events': events, 'nextPageToken': next_token}), 200
 
 @events_bp.route('/<event_id>', methods=['GET'])
 @auth_required
 def get_event(event_id):
-    db = firestore.client()
+    db = get_db()
     uid = g.current_user['uid']
     user_email = g.current_user.get('email')
     
-    doc = db.collection('events').document(event_id).get()
-    if not doc.exists:
+    doc = load_event(db, event_id)
+    if not doc.exists or is_deleting(doc.to_dict()):
         return jsonify({'message': 'Event not found'}), 404
     
+    # The body depends on the event version and on who is asking
+    etag = make_etag('event', event_id, doc.update_time, uid, user_email)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    
     e = doc.to_dict()
     e['eventId'] = doc.id
     e['isOwner'] = (e.get('createdBy') == uid)
@@ -99,21 +258,20 @@ def get_event(event_id):
     e['currentUserEmail'] = user_email
     
     # Add owner email information
-    try:
-        owner_user = auth.get_user(e.get('createdBy'))
-        e['ownerEmail'] = owner_user.email
-        e['ownerName'] = owner_user.display_name or owner_user.email
-    except Exception as ex:
-        print(f"Could not get owner info: {ex}")
+    owner = resolve_profile(e.get('createdBy'))
+    if owner:
+        e['ownerEmail'] = owner['email']
+        e['ownerName'] = owner['name']
+    else:
         e['ownerEmail'] = 'Unknown'
         e['ownerName'] = 'Unknown'
     
-    return jsonify(e), 200
+    return with_etag(jsonify(e), etag)
 
 @events_bp.route('/<event_id>', methods=['DELETE'])
 @auth_required
 def delete_event(event_id):
-    db = firestore.client()
+    db = get_db()
     doc_ref = db.collection('events').document(event_id)
     doc = doc_ref.get()
     if not doc.exists:
@@ -121,13 +279,54 @@ def delete_event(event_id):
     event = doc.to_dict()
     if event.get('createdBy') != g.current_user['uid']:
         return jsonify({'message': 'Forbidden'}), 403
-    # Delete responses
-    for resp in doc_ref.collection('responses').stream():
-        doc_ref.collection('responses').document(resp.id).delete()
-    # Delete event
-    doc_ref.delete()
+    # Hide the event from readers first, then cascade with batched deletes
+    mark_deleting(doc_ref)
+    invalidate_event(event_id)
+    try:
+        drop_event_index(db, event_id, event)
+    except Exception as ex:
+        current_app.logger.error(f"Could not update user event index for {event_id}: {ex}")
+    background = request.args.get('background', '').lower() in ('1', 'true', 'yes')
+    if background or count_responses(doc_ref) > current_app.config['DELETE_BACKGROUND_THRESHOLD']:
+        delete_event_in_background(db, doc_ref)
+        return jsonify({'message': 'Event deletion started', 'status': 'deleting'}), 202
+    delete_event_tree(db, doc_ref)
     return jsonify({'message': 'Event deleted'}), 200
 
+def _frozen_error():
+    return jsonify({'error': 'Event is no longer collecting responses; reopen it first'}), 409
+
+def _accepts_responses(event_data):
+    # Archived events are frozen too (see compaction.py) until a reopen restores them
+    return not (is_frozen(event_data) or is_archived(event_data))
+
+def _serve_frozen(event_doc, view):
+    """Serve a view of a scheduled/closed event from its snapshot, or None to serve it live"""
+    # Revalidated every time (a reopen must show up at once), but a match
+    # costs no reads: the ETag only depends on the cached event
+    etag = make_etag('frozen', view, event_doc.id, event_doc.update_time)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    body = load_snapshot_body(event_doc.reference, event_doc.to_dict(), view)
+    if body is None:
+        return None
+    return frozen_response(body, etag)
+
+def _response_docs(event_ref, event_data, last_id=None, batch_size=None):
+    """An event's responses in id order, from the archive chunks once it has been compacted"""
+    if is_archived(event_data):
+        return iter_archived(event_ref, event_data, last_id)
+    return stream_in_batches(event_ref.collection('responses'), last_id, batch_size)
+
+def _decoded_responses(index, docs):
+    responses = []
+    for doc in docs:
+        r = index.decode_response(doc.to_dict())
+        r['responseId'] = doc.id
+        responses.append(r)
+    return responses
+
 @events_bp.route('/<event_id>/responses', methods=['POST'])
 @auth_required
 def create_response(event_id):
@@ -135,9 +334,7 @@ def create_response(event_id):
         payload = ResponseCreateModel(**request.get_json())
     except ValidationError as e:
         return jsonify({'errors': e.errors()}), 422
-    db = firestore.client()
-    ref = db.collection('events').document(event_id).collection('responses').document(g.current_user['uid'])
-    
+    db = get_db()
     response_data = {
         'userId': g.current_user['uid'],
         'userEmail': g.current_user.get('email'),
@@ -151,10 +348,10 @@ def create_response(event_id):
         if payload.maybeSlots:
             response_data['maybeSlots'] = payload.maybeSlots
         # Get user info for display
-        try:
-            user = auth.get_user(g.current_user['uid'])
-            response_data['userName'] = user.display_name or user.email
-        except:
+        user = resolve_profile(g.current_user['uid'])
+        if user:
+            response_data['userName'] = user['name']
+        else:
             response_data['userName'] = g.current_user.get('email', 'Unknown User')
     
     # Handle new RSVP system (for backward compatibility)
@@ -167,29 +364,162 @@ def create_response(event_id):
         response_data['availability'] = payload.availability
         response_data['comments'] = payload.comments or {}
     
-    ref.set(response_data)
+    # Slots are stored as bitmaps over the event's slot grid
+    event_ref = db.collection('events').document(event_id)
+    event_doc = load_event(db, event_id)
+    if not event_doc.exists or is_deleting(event_doc.to_dict()):
+        return jsonify({'message': 'Event not found'}), 404
+    if not _accepts_responses(event_doc.to_dict()):
+        return _frozen_error()
+    index = SlotIndex(event_doc.to_dict())
+    index.encode_response(response_data)
+    
+    try:
+        save_response(db, event_ref, index, g.current_user['uid'], response_data)
+    except ResponsesFrozen:
+        return _frozen_error()
+    invalidate_availability(g.current_user['uid'])
     return jsonify({'responseId': g.current_user['uid']}), 201
 
+@events_bp.route('/<event_id>/responses/me', methods=['PATCH'])
+@auth_required
+def patch_my_response(event_id):
+    """Apply painted/erased slots to the caller's response without resending the full lists"""
+    try:
+        payload = ResponsePatchModel(**(request.get_json() or {}))
+    except ValidationError as e:
+        return jsonify({'errors': e.errors()}), 422
+    db = get_db()
+    uid = g.current_user['uid']
+    
+    event_ref = db.collection('events').document(event_id)
+    event_doc = load_event(db, event_id)
+    if not event_doc.exists or is_deleting(event_doc.to_dict()):
+        return jsonify({'message': 'Event not found'}), 404
+    if not _accepts_responses(event_doc.to_dict()):
+        return _frozen_error()
+    index = SlotIndex(event_doc.to_dict())
+    
+    # Every slot must lie on the event's grid (its date range)
+    changes = {}
+    unknown = []
+    for slots_field in BITS_FIELDS:
+        delta = getattr(payload, slots_field)
+        if delta is None:
+            continue
+        add, unknown_added = index.mask(delta.add)
+        remove, unknown_removed = index.mask(delta.remove)
+        unknown += unknown_added + unknown_removed
+        changes[slots_field] = (add, remove)
+    if unknown:
+        return jsonify({'error': "Slots outside the event's date range", 'slots': unknown}), 422
+    if not changes:
+        return jsonify({'error': 'timeSlots or maybeSlots changes are required'}), 400
+    
+    def new_response():
+        # Only the first save needs the display name
+        user = resolve_profile(uid)
+        return {
+            'userId': uid,
+            'userEmail': g.current_user.get('email'),
+            'userName': user['name'] if user else g.current_user.get('email', 'Unknown User')
+        }
+    
+    try:
+        patch_response(db, event_ref, index, uid, changes, new_response)
+    except ResponsesFrozen:
+        return _frozen_error()
+    invalidate_availability(uid)
+    return jsonify({'responseId': uid}), 200
+
 @events_bp.route('/<event_id>/responses', methods=['GET'])
 @auth_required
 def list_responses(event_id):
-    db = firestore.client()
-    docs = db.collection('events').document(event_id).collection('responses').stream()
-    responses = []
-    for doc in docs:
-        r = doc.to_dict()
-        r['responseId'] = doc.id
-        responses.append(r)
-    return jsonify(responses), 200
+    try:
+        limit, cursor = page_params()
+    except PageParamsError as e:
+        return jsonify({'error': str(e)}), 400
+    db = get_db()
+    event_ref = db.collection('events').document(event_id)
+    event_doc = load_event(db, event_id)
+    if not event_doc.exists or is_deleting(event_doc.to_dict()):
+        return jsonify({'message': 'Event not found'}), 404
+    index = SlotIndex(event_doc.to_dict())
+    
+    if limit is None and not wants_stream() and is_frozen(event_doc.to_dict()):
+        frozen = _serve_frozen(event_doc, 'responses')
+        if frozen:
+            return frozen
+    
+    event_data = event_doc.to_dict()
+    if wants_stream():
+        batch_size = current_app.config['STREAM_BATCH_SIZE']
+        def generate():
+            for doc in _response_docs(event_ref, event_data, batch_size=batch_size):
+                r = index.decode_response(doc.to_dict())
+                r['responseId'] = doc.id
+                yield r
+        return stream_json_array(generate())
+    
+    # Every response write bumps the aggregate version, so reading that one
+    # field tells whether the list changed
+    version = aggregate_version(event_ref)
+    etag = None
+    if version is not None:
+        etag = make_etag('responses', event_id, event_doc.update_time, version, request.query_string.decode())
+        cached = not_modified(etag)
+        if cached:
+            return cached
+    
+    if limit is None:
+        docs = _response_docs(event_ref, event_data)
+    else:
+        docs = list(islice(_response_docs(event_ref, event_data, cursor.get('after'), limit + 1), limit + 1))
+    responses = _decoded_responses(index, docs)
+    
+    if limit is None:
+        return with_etag(jsonify(responses), etag)
+    next_token = None
+    if len(responses) > limit:
+        responses = responses[:limit]
+        next_token = encode_page_token({'after': responses[-1]['responseId']})
+    return with_etag(jsonify({'responses': responses, 'nextPageToken': next_token}), etag)
+
+@events_bp.route('/<event_id>/responses/export', methods=['GET'])
+@auth_required
+def export_responses(event_id):
+    """Stream every response as CSV, NDJSON or Parquet, long (respondent x slot) or wide"""
+    export_format = request.args.get('format', 'csv')
+    shape = request.args.get('shape', 'long')
+    if export_format not in export.EXPORT_FORMATS or shape not in export.EXPORT_SHAPES:
+        return jsonify({'error': 'format must be csv, ndjson or parquet and shape long or wide'}), 400
+    if export_format == 'parquet' and export.pyarrow is None:
+        return jsonify({'error': 'Parquet export needs pyarrow installed on the server'}), 501
+    db = get_db()
+    event_ref = db.collection('events').document(event_id)
+    event_doc = load_event(db, event_id)
+    if not event_doc.exists or is_deleting(event_doc.to_dict()):
+        return jsonify({'message': 'Event not found'}), 404
+    if event_doc.to_dict().get('createdBy') != g.current_user['uid']:
+        return jsonify({'message': 'Only the event owner can export responses'}), 403
+    
+    # Responses are read batch by batch as the body is written, so memory stays flat
+    index = SlotIndex(event_doc.to_dict())
+    batch_size = current_app.config['STREAM_BATCH_SIZE']
+    docs = _response_docs(event_ref, event_doc.to_dict(), batch_size=batch_size)
+    body = export.export_body(index, docs, export_format, shape, batch_size)
+    return Response(stream_with_context(body), mimetype=export.CONTENT_TYPES[export_format], headers={
+        'Content-Disposition': f'attachment; filename="{event_id}-responses-{shape}.{export_format}"'
+    })
 
 @events_bp.route('/<event_id>/invite', methods=['POST'])
 @auth_required
 def invite_user(event_id):
-    db = firestore.client()
+    db = get_db()
     uid = g.current_user['uid']
     doc_ref = db.collection('events').document(event_id)
-    ev = doc_ref.get()
-    if not ev.exists:
+    ev = load_event(db, event_id)
+    if not ev.exists or is_deleting(ev.to_dict()):
         return jsonify({'message': 'Event not found'}), 404
     if ev.to_dict().get('createdBy') != uid:
         return jsonify({'message': 'Forbidden'}), 403
@@ -206,39 +536,105 @@ def invite_user(event_id):
     if not emails:
         return jsonify({'error': 'No emails provided'}), 400
     
-    valid_emails = []
+    # Normalize and de-duplicate, skipping people who are already invited
+    already_invited = {normalize_email(email) for email in ev.to_dict().get('invitees', [])}
+    candidates = []
     invalid_emails = []
-    
+    skipped_emails = []
     for email in emails:
-        try:
-            # Verify the email corresponds to a real user
-            user = auth.get_user_by_email(email)
-            valid_emails.append(email)
-        except auth.UserNotFoundError:
+        if not isinstance(email, str) or not email.strip():
             invalid_emails.append(email)
+            continue
+        email = normalize_email(email)
+        if email in already_invited:
+            skipped_emails.append(email)
+        elif email not in candidates:
+            candidates.append(email)
+    
+    # Verify the emails correspond to real users (batched, cached lookups)
+    users = resolve_emails(candidates)
+    valid_emails = [email for email in candidates if email in users]
+    invalid_emails += [email for email in candidates if email not in users]
     
     if valid_emails:
         doc_ref.update({ 'invitees': ArrayUnion(valid_emails) })
+        invalidate_event(event_id)
+        event_data = ev.to_dict()
+        event_data['invitees'] = list(event_data.get('invitees', [])) + valid_emails
+        _sync_index(db, event_id, event_data)
     
     response_message = f'Successfully invited {len(valid_emails)} user(s)'
     if invalid_emails:
-        response_message += f'. Users not found: {", ".join(invalid_emails)}'
+        response_message += f'. Users not found: {", ".join(str(email) for email in invalid_emails)}'
     
     return jsonify({
         'message': response_message,
         'invited_count': len(valid_emails),
-        'not_found': invalid_emails
+        'not_found': invalid_emails,
+        'already_invited': skipped_emails
     }), 200
 
+def _compact_heatmap(index, aggregate):
+    """Columnar heatmap: day keys once, flat per-slot count arrays and one bitmap per respondent.
+
+    Slot i is slot i % slotsPerDay (slotMinutes long) of days[i // slotsPerDay]. A respondent's
+    timeSlotBits/maybeSlotBits are base64 bitmaps over the same slots, most
+    significant bit first, so the respondents available in a slot are the rows
+    with that bit set.
+    """
+    def encode(bits):
+        return base64.b64encode(bytes(bits or b'')).decode('ascii')
+
+    respondents = aggregate['respondents']
+    return {
+        'format': 'compact',
+        'days': index.days,
+        'slotsPerDay': index.slots_per_day,
+        'slotMinutes': index.minutes,
+        'slotCounts': aggregate['slotCounts'],
+        'maybeCounts': aggregate['maybeCounts'],
+        'respondents': [{
+            'userId': respondents[user_id].get('userId', user_id),
+            'userName': respondents[user_id].get('userName'),
+            'timeSlotBits': encode(respondents[user_id].get('timeSlotBits')),
+            'maybeSlotBits': encode(respondents[user_id].get('maybeSlotBits'))
+        } for user_id in sorted(respondents)],
+        'totalResponses': len(respondents),
+        'maxCount': max(aggregate['slotCounts'], default=0),
+        'maxMaybeCount': max(aggregate['maybeCounts'], default=0)
+    }
+
+def _full_heatmap(index, aggregate):
+    slot_counts = aggregate['slotCounts']  # per-slot count (yes responses)
+    maybe_counts = aggregate['maybeCounts']  # per-slot count (maybe responses)
+    respondents = aggregate['respondents']
+    user_responses = [
+        index.decode_response(dict(respondents[user_id])) for user_id in sorted(respondents)
+    ]
+    
+    # Counts go into the event's cached grid (date range, or generic weekdays if it has none)
+    heatmap_grid = index.grid.heatmap(slot_counts, maybe_counts)
+    
+    return {
+        'heatmapGrid': heatmap_grid,
+        'userResponses': user_responses,
+        'totalResponses': len(user_responses),
+        'maxCount': max(slot_counts, default=0),
+        'maxMaybeCount': max(maybe_counts, default=0)
+    }
+
 @events_bp.route('/<event_id>/heatmap', methods=['GET'])
 @auth_required
 def get_heatmap_data(event_id):
-    """Get heatmap data for When2Meet-style visualization"""
-    db = firestore.client()
+    """Get heatmap data for When2Meet-style visualization (?format=compact for the columnar form)"""
+    heatmap_format = request.args.get('format', 'full')
+    if heatmap_format not in ('full', 'compact'):
+        return jsonify({'error': 'format must be full or compact'}), 400
+    db = get_db()
     
     # Check if user has access to this event
-    event_doc = db.collection('events').document(event_id).get()
-    if not event_doc.exists:
+    event_doc = load_event(db, event_id)
+    if not event_doc.exists or is_deleting(event_doc.to_dict()):
         return jsonify({'message': 'Event not found'}), 404
     
     event_data = event_doc.to_dict()
@@ -252,116 +648,125 @@ def get_heatmap_data(event_id):
     if not (is_owner or is_invited):
         return jsonify({'message': 'Access denied'}), 403
     
-    # Get all responses with time slots
-    responses = db.collection('events').document(event_id).collection('responses').stream()
-    
-    # Build heatmap data
-    slot_counts = {}  # slot -> count (yes responses)
-    maybe_counts = {}  # slot -> count (maybe responses)
-    user_responses = []  # list of {userName, timeSlots, maybeSlots}
-    
-    for response_doc in responses:
-        response_data = response_doc.to_dict()
-        time_slots = response_data.get('timeSlots', [])
-        maybe_slots = response_data.get('maybeSlots', [])
-        user_name = response_data.get('userName', 'Unknown User')
-        
-        if time_slots or maybe_slots:
-            user_responses.append({
-                'userName': user_name,
-                'timeSlots': time_slots,
-                'maybeSlots': maybe_slots,
-                'userId': response_data.get('userId')
-            })
-            
-            # Count each slot
-            for slot in time_slots:
-                slot_counts[slot] = slot_counts.get(slot, 0) + 1
-            
-            for slot in maybe_slots:
-                maybe_counts[slot] = maybe_counts.get(slot, 0) + 1
-    
-    # Generate time grid based on event date range
-    from datetime import datetime, timedelta
+    if is_frozen(event_data):
+        frozen = _serve_frozen(event_doc, 'heatmapCompact' if heatmap_format == 'compact' else 'heatmap')
+        if frozen:
+            return frozen
+    
+    # Versioned by the aggregate; the check reads only its version field
+    event_ref = db.collection('events').document(event_id)
+    version = aggregate_version(event_ref)
+    if version is not None:
+        cached = not_modified(make_etag('heatmap', event_id, event_doc.update_time, version, heatmap_format))
+        if cached:
+            return cached
+    
+    # Counts and roster come from the per-event aggregate (one document read)
+    index = SlotIndex(event_data)
+    aggregate = load_aggregate(db, event_ref, index)
+    etag = make_etag('heatmap', event_id, event_doc.update_time, aggregate.get('version'), heatmap_format)
+    
+    if heatmap_format == 'compact':
+        return with_etag(jsonify(_compact_heatmap(index, aggregate)), etag)
+    return with_etag(jsonify(_full_heatmap(index, aggregate)), etag)
+
+@events_bp.route('/<event_id>/heatmap/stream', methods=['GET'])
+def stream_heatmap(event_id):
+    """Server-Sent Events feed of heatmap count changes"""
+    # EventSource cannot set headers, so the token may also come as ?access_token=
+    error = authenticate_request(allow_query_token=True)
+    if error:
+        return error
+    
+    db = get_db()
+    event_ref = db.collection('events').document(event_id)
+    event_doc = load_event(db, event_id)
+    if not event_doc.exists or is_deleting(event_doc.to_dict()):
+        return jsonify({'message': 'Event not found'}), 404
+    
+    event_data = event_doc.to_dict()
+    is_owner = event_data.get('createdBy') == g.current_user['uid']
+    is_invited = g.current_user.get('email') in event_data.get('invitees', [])
+    if not (is_owner or is_invited):
+        return jsonify({'message': 'Access denied'}), 403
+    
+    index = SlotIndex(event_data)
+    keepalive = current_app.config['SSE_KEEPALIVE_SECONDS']
     
+    def generate():
+        # Subscribed on first iteration, so a response that is closed unread
+        # (HEAD, or a client gone before the first chunk) never registers one
+        # that its finally would not remove. All clients of this event share
+        # one Firestore listener.
+        subscriber = heatmap_feeds.subscribe(event_ref, index)
+        try:
+            while True:
+                try:
+                    yield subscriber.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+        finally:
+            heatmap_feeds.unsubscribe(event_id, subscriber)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@events_bp.route('/<event_id>/suggestions', methods=['GET'])
+@auth_required
+def get_suggestions(event_id):
+    """Suggest the best windows of consecutive hours, ranked by yes then maybe count"""
     try:
-        start_date = datetime.fromisoformat(event_data.get('startDate'))
-        end_date = datetime.fromisoformat(event_data.get('endDate'))
-    except (ValueError, TypeError):
-        # Fallback to generic weekdays if date parsing fails
-        days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-        hours = list(range(24))  # 0-23
-        
-        heatmap_grid = []
-        for day in days:
-            day_data = []
-            for hour in hours:
-                slot_key = f"{day}_{hour}"
-                count = slot_counts.get(slot_key, 0)
-                maybe_count = maybe_counts.get(slot_key, 0)
-                day_data.append({
-                    'slot': slot_key,
-                    'count': count,
-                    'maybeCount': maybe_count,
-                    'day': day,
-                    'hour': hour
-                })
-            heatmap_grid.append({
-                'day': day,
-                'slots': day_data
-            })
-    else:
-        # Generate actual date range
-        hours = list(range(24))  # 0-23
-        heatmap_grid = []
-        
-        current_date = start_date
-        while current_date <= end_date:
-            day_name = current_date.strftime('%A').lower()
-            date_str = current_date.strftime('%Y-%m-%d')
-            day_key = f"{day_name}_{date_str}"
-            
-            day_data = []
-            for hour in hours:
-                slot_key = f"{day_key}_{hour}"
-                # Also check old format for backward compatibility
-                old_slot_key = f"{day_name}_{hour}"
-                count = slot_counts.get(slot_key, slot_counts.get(old_slot_key, 0))
-                maybe_count = maybe_counts.get(slot_key, maybe_counts.get(old_slot_key, 0))
-                
-                day_data.append({
-                    'slot': slot_key,
-                    'count': count,
-                    'maybeCount': maybe_count,
-                    'day': day_key,
-                    'hour': hour
-                })
-            
-            heatmap_grid.append({
-                'day': day_key,
-                'slots': day_data
-            })
-            
-            current_date += timedelta(days=1)
+        hours = int(request.args.get('hours', 1))
+        limit = int(request.args.get('limit', 5))
+        quorum = int(request.args.get('quorum', 1))
+    except ValueError:
+        return jsonify({'error': 'hours, limit and quorum must be integers'}), 400
+    if not 1 <= hours <= 24 or not 1 <= limit <= 50 or quorum < 0:
+        return jsonify({'error': 'hours must be 1-24, limit 1-50 and quorum >= 0'}), 400
+    required = [user_id for user_id in request.args.get('required', '').split(',') if user_id]
+    
+    db = get_db()
+    
+    # Check if user has access to this event
+    event_doc = load_event(db, event_id)
+    if not event_doc.exists or is_deleting(event_doc.to_dict()):
+        return jsonify({'message': 'Event not found'}), 404
+    
+    event_data = event_doc.to_dict()
+    uid = g.current_user['uid']
+    user_email = g.current_user.get('email')
+    
+    is_owner = event_data.get('createdBy') == uid
+    is_invited = user_email in event_data.get('invitees', [])
+    
+    if not (is_owner or is_invited):
+        return jsonify({'message': 'Access denied'}), 403
+    
+    index = SlotIndex(event_data)
+    aggregate = load_aggregate(db, db.collection('events').document(event_id), index)
+    suggestions = suggest_windows(
+        index, aggregate['respondents'], hours * 60 // index.minutes,
+        limit=limit, required=required, quorum=quorum
+    )
     
     return jsonify({
-        'heatmapGrid': heatmap_grid,
-        'userResponses': user_responses,
-        'totalResponses': len(user_responses),
-        'maxCount': max(slot_counts.values()) if slot_counts else 0,
-        'maxMaybeCount': max(maybe_counts.values()) if maybe_counts else 0
+        'hours': hours,
+        'suggestions': suggestions,
+        'totalResponses': len(aggregate['respondents'])
     }), 200
 
 @events_bp.route('/<event_id>/schedule', methods=['POST'])
 @auth_required
 def schedule_event(event_id):
     """Schedule an event at a specific date/time and close availability collection"""
-    db = firestore.client()
+    db = get_db()
     uid = g.current_user['uid']
     
     # Check if user is owner
-    event_doc = db.collection('events').document(event_id).get()
-    if not event_doc.exists:
+    event_doc = load_event(db, event_id)
+    if not event_doc.exists or is_deleting(event_doc.to_dict()):
         return jsonify({'message': 'Event not found'}), 404
     
     event_data = event_doc.to_dict()
@@ -376,12 +781,16 @@ def schedule_event(event_id):
         return jsonify({'error': 'scheduledDate and scheduledTime are required'}), 400
     
     # Update event status
-    db.collection('events').document(event_id).update({
+    updates = {
         'status': 'scheduled',
         'scheduledDate': scheduled_date,
         'scheduledTime': scheduled_time,
         'scheduledAt': SERVER_TIMESTAMP
-    })
+    }
+    db.collection('events').document(event_id).update(updates)
+    invalidate_event(event_id)
+    _sync_index(db, event_id, dict(event_data, **updates))
+    _freeze(db, event_id, dict(event_data, **updates))
     
     return jsonify({
         'message': 'Event scheduled successfully',
@@ -393,12 +802,12 @@ def schedule_event(event_id):
 @auth_required
 def close_event(event_id):
     """Close availability collection without scheduling"""
-    db = firestore.client()
+    db = get_db()
     uid = g.current_user['uid']
     
     # Check if user is owner
-    event_doc = db.collection('events').document(event_id).get()
-    if not event_doc.exists:
+    event_doc = load_event(db, event_id)
+    if not event_doc.exists or is_deleting(event_doc.to_dict()):
         return jsonify({'message': 'Event not found'}), 404
     
     event_data = event_doc.to_dict()
@@ -406,10 +815,14 @@ def close_event(event_id):
         return jsonify({'message': 'Only event owner can close events'}), 403
     
     # Update event status
-    db.collection('events').document(event_id).update({
+    updates = {
         'status': 'closed',
         'closedAt': SERVER_TIMESTAMP
-    })
+    }
+    db.collection('events').document(event_id).update(updates)
+    invalidate_event(event_id)
+    _sync_index(db, event_id, dict(event_data, **updates))
+    _freeze(db, event_id, dict(event_data, **updates))
     
     return jsonify({'message': 'Event closed successfully'}), 200
 
@@ -417,24 +830,136 @@ def close_event(event_id):
 @auth_required
 def reopen_event(event_id):
     """Reopen event for availability collection"""
-    db = firestore.client()
+    db = get_db()
     uid = g.current_user['uid']
     
     # Check if user is owner
-    event_doc = db.collection('events').document(event_id).get()
-    if not event_doc.exists:
+    event_doc = load_event(db, event_id)
+    if not event_doc.exists or is_deleting(event_doc.to_dict()):
         return jsonify({'message': 'Event not found'}), 404
     
     event_data = event_doc.to_dict()
     if event_data.get('createdBy') != uid:
         return jsonify({'message': 'Only event owner can reopen events'}), 403
     
+    # Accept responses again and forget the frozen views before the status flips back
+    event_ref = db.collection('events').document(event_id)
+    if is_archived(event_data):
+        # Writes go to single response documents, so expand the archive first
+        restore_event(db, event_ref, event_data)
+    set_frozen(db, event_ref, SlotIndex(event_data), False)
+    drop_snapshot(event_ref)
+    
     # Update event status
-    db.collection('events').document(event_id).update({
+    updates = {
         'status': 'collecting',
         'scheduledDate': None,
         'scheduledTime': None,
         'reopenedAt': SERVER_TIMESTAMP
-    })
+    }
+    event_ref.update(updates)
+    invalidate_event(event_id)
+    _sync_index(db, event_id, dict(event_data, **updates))
     
     return jsonify({'message': 'Event reopened for availability collection'}), 200
+
+@events_bp.cli.command('rebuild-heatmaps')
+@click.argument('event_ids', nargs=-1)
+def rebuild_heatmaps(event_ids):
+    """Rebuild heatmap aggregates for the given events (all events if none given)"""
+    db = get_db()
+    if event_ids:
+        docs = db.get_all([db.collection('events').document(event_id) for event_id in event_ids])
+    else:
+        docs = db.collection('events').stream()
+    for doc in docs:
+        if not doc.exists:
+            click.echo(f"{doc.id}: not found")
+            continue
+        aggregate = rebuild_aggregate(db, doc.reference, SlotIndex(doc.to_dict()))
+        click.echo(f"{doc.id}: {len(aggregate['respondents'])} respondent(s)")
+
+@events_bp.cli.command('resume-deletes')
+def resume_deletes():
+    """Finish deleting events a background delete left behind (run it after a restart or from cron)"""
+    db = get_db()
+    for doc in find_deleting(db):
+        deleted = delete_event_tree(db, doc.reference)
+        invalidate_event(doc.id)
+        click.echo(f"{doc.id}: deleted {deleted} document(s)")
+
+@events_bp.cli.command('backfill-user-index')
+@click.argument('event_ids', nargs=-1)
+def backfill_user_index(event_ids):
+    """Write users/{uid}/events entries for the given events (all events if none given)"""
+    db = get_db()
+    if event_ids:
+        docs = db.get_all([db.collection('events').document(event_id) for event_id in event_ids])
+    else:
+        docs = stream_in_batches(db.collection('events'), batch_size=current_app.config['STREAM_BATCH_SIZE'])
+    for doc in docs:
+        if not doc.exists:
+            click.echo(f"{doc.id}: not found")
+            continue
+        if is_deleting(doc.to_dict()):
+            continue
+        members = sync_event_index(db, doc.id, doc.to_dict())
+        click.echo(f"{doc.id}: indexed for {members} user(s)")
+
+@events_bp.cli.command('compact-responses')
+@click.argument('event_ids', nargs=-1)
+@click.option('--dry-run', is_flag=True, help='Only report what compaction would save')
+@click.option('--closed-days', type=int, default=None,
+              help='Compact scheduled/closed events finished this many days ago (default COMPACT_CLOSED_DAYS)')
+@click.option('--chunk-size', type=int, default=None,
+              help='Responses per archive document (default COMPACT_CHUNK_SIZE)')
+@click.option('--grace', type=float, default=None,
+              help='Seconds to wait before deleting the originals (default EVENT_CACHE_TTL)')
+def compact_responses(event_ids, dry_run, closed_days, chunk_size, grace):
+    """Fold responses of finished events into archive chunks (events past their end date or
+    closed for a while, or the given events). Run it from cron, e.g. nightly."""
+    db = get_db()
+    config = current_app.config
+    closed_days = config['COMPACT_CLOSED_DAYS'] if closed_days is None else closed_days
+    chunk_size = chunk_size or config['COMPACT_CHUNK_SIZE']
+    grace = config['EVENT_CACHE_TTL'] if grace is None else grace
+    if event_ids:
+        docs = [doc for doc in db.get_all([db.collection('events').document(event_id) for event_id in event_ids])
+                if doc.exists and not is_deleting(doc.to_dict())]
+    else:
+        docs = list(find_compactable(db, closed_days))
+
+    if dry_run:
+        totals = estimate_savings(0, chunk_size)
+        for doc in docs:
+            if is_archived(doc.to_dict()):
+                continue
+            estimate = estimate_savings(count_responses(doc.reference), chunk_size)
+            click.echo(f"{doc.id}: {estimate['responses']} response(s) -> {estimate['chunks']} chunk(s), "
+                       f"{estimate['readsSavedPerWalk']} read(s) saved per full listing")
+            totals = {key: totals[key] + value for key, value in estimate.items()}
+        click.echo(f"total: {totals['responses']} response(s) in {totals['chunks']} chunk(s); "
+                   f"{totals['readsSavedPerWalk']} read(s) saved per full walk of every event, "
+                   f"for a one-off {totals['compactionReads']} read(s) and {totals['compactionWrites']} write(s)")
+        return
+
+    archived = []
+    for doc in docs:
+        event_data = doc.to_dict()
+        if not is_archived(event_data):
+            responses, chunks = archive_event(db, doc.reference, SlotIndex(event_data), chunk_size)
+            invalidate_event(doc.id)
+            click.echo(f"{doc.id}: archived {responses} response(s) into {chunks} chunk(s)")
+            event_data = doc.reference.get().to_dict()
+        archived.append((doc, archive_boundaries(event_data)))
+    if not archived:
+        return
+    # Other processes may still serve the event from their cache without the
+    # archive marker (and read the single responses) until it expires
+    time.sleep(grace)
+    for doc, boundaries in archived:
+        deleted = purge_responses(db, doc.reference, boundaries)
+        if deleted is None:
+            click.echo(f"{doc.id}: reopened since it was archived, responses kept")
+        else:
+            click.echo(f"{doc.id}: deleted {deleted} response document(s)")
@@ -0,0 +1,198 @@
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import cached_property
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import numpy as np
+from ..cache import WeightedLRUCache
+from ..metrics import register_cache
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+SLOT_MINUTES = (15, 30, 60)
+DEFAULT_SLOT_MINUTES = 60
+
+# Most slots (days x slots per day) an event may have: a year of hourly slots,
+# or about 100 days of 15-minute ones. Keeps the aggregate's per-slot counts
+# and each respondent's bitmaps small next to Firestore's 1 MiB document limit.
+MAX_SLOTS = 10_000
+
+# Slots kept across all cached grids; a grid's memory grows with its slot count
+# (a cell dict and a key per slot), so the cache is bounded by that rather
+# than by how many grids it holds
+GRID_CACHE_CELLS = 250_000
+
+
+def slot_label(hour, minute):
+    # Whole hours keep the original "…_14" key; sub-hour slots get a ":MM" suffix
+    return str(hour) if minute == 0 else f"{hour}:{minute:02d}"
+
+
+def _parse_label(label):
+    """(hour, minute) for "14" / "14:30", or None"""
+    hour, _, minute = label.partition(':')
+    if not hour.isdigit() or (minute and not (len(minute) == 2 and minute.isdigit())):
+        return None
+    return int(hour), int(minute or 0)
+
+
+def _zone(name):
+    if not name:
+        return None
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning(f"Unknown event timezone {name!r}; slots are treated as UTC")
+        return None
+
+
+def _missing_slots(day, zone, minutes, slots_per_day):
+    """Slot numbers of `day` whose local start time does not exist (skipped by a DST jump)"""
+    start = datetime.combine(day, datetime.min.time(), zone)
+    end = start + timedelta(days=1)
+    if start.utcoffset() == end.utcoffset():
+        return []
+    missing = []
+    for slot in range(slots_per_day):
+        local = start + timedelta(minutes=slot * minutes)
+        # A wall time inside the gap does not survive a round trip through UTC
+        if local.astimezone(dt_timezone.utc).astimezone(zone).replace(tzinfo=None) != local.replace(tzinfo=None):
+            missing.append(slot)
+    return missing
+
+
+class SlotGrid:
+    """The immutable slot skeleton of an event: day keys, slot keys and the heatmap template.
+
+    Every day has the same number of wall-clock slots (24 * 60 / minutes), so
+    position = day_offset * slots_per_day + slot whatever the timezone does.
+    Slots whose local time is skipped by a DST change are kept but flagged in
+    `exists`; the repeated hour when clocks go back is a single slot.
+    Grids are shared between requests (see slot_grid), so nothing here may be
+    mutated after construction.
+    """
+
+    def __init__(self, start_date, end_date, timezone, minutes):
+        self.minutes = minutes
+        self.slots_per_day = 24 * 60 // minutes
+        self.labels = tuple(slot_label(*divmod(slot * minutes, 60)) for slot in range(self.slots_per_day))
+        self._label_slots = {label: slot for slot, label in enumerate(self.labels)}
+
+        zone = None
+        dates = ()
+        if start_date is None:
+            self.dated = False
+            self.days = tuple(WEEKDAYS)
+            self.weekdays = tuple(WEEKDAYS)
+        else:
+            self.dated = True
+            zone = _zone(timezone)
+            dates = tuple(start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1))
+            self.weekdays = tuple(WEEKDAYS[day.weekday()] for day in dates)
+            self.days = tuple(f"{name}_{day.isoformat()}" for name, day in zip(self.weekdays, dates))
+
+        self.dates = dates
+        self.zone = zone
+        self.size = len(self.days) * self.slots_per_day
+        self.exists = np.ones(self.size, dtype=bool)
+        if zone is not None:
+            for offset, day in enumerate(dates):
+                for slot in _missing_slots(day, zone, minutes, self.slots_per_day):
+                    self.exists[offset * self.slots_per_day + slot] = False
+        self.exists.flags.writeable = False
+
+        self._day_offsets = {day: i for i, day in enumerate(self.days)}
+        self._weekday_offsets = {}
+        for i, day_name in enumerate(self.weekdays):
+            self._weekday_offsets.setdefault(day_name, []).append(i)
+
+        self.keys = tuple(f"{day}_{label}" for day in self.days for label in self.labels)
+        # Per-cell fields of the full heatmap, minus the counts
+        self.cells = tuple(self._cell(position) for position in range(self.size))
+
+    def _cell(self, position):
+        day, slot = divmod(position, self.slots_per_day)
+        hour, minute = divmod(slot * self.minutes, 60)
+        cell = {'slot': self.keys[position], 'day': self.days[day], 'hour': hour}
+        if self.minutes != 60:
+            cell['minute'] = minute
+        if not self.exists[position]:
+            cell['skipped'] = True
+        return cell
+
+    @cached_property
+    def start_times(self):
+        """UTC epoch seconds at which each slot starts (dated grids only).
+
+        Uses the earlier of the two instants for the repeated hour when clocks
+        go back; skipped slots get whatever instant zoneinfo maps them to.
+        """
+        if not self.dated:
+            return None
+        zone = self.zone or dt_timezone.utc
+        starts = np.empty(self.size, dtype=np.int64)
+        for offset, day in enumerate(self.dates):
+            midnight = datetime.combine(day, datetime.min.time())
+            for slot in range(self.slots_per_day):
+                local = midnight + timedelta(minutes=slot * self.minutes)
+                starts[offset * self.slots_per_day + slot] = int(local.replace(tzinfo=zone).timestamp())
+        starts.flags.writeable = False
+        return starts
+
+    def hour_minute(self, position):
+        return divmod((int(position) % self.slots_per_day) * self.minutes, 60)
+
+    def positions(self, slot):
+        """Bit positions for a slot key; old "day_hour" keys cover every matching weekday"""
+        day_key, _, label = slot.rpartition('_')
+        parsed = _parse_label(label)
+        if parsed is None or parsed[0] >= 24:
+            return []
+        slot_number = self._label_slots.get(slot_label(*parsed))
+        if slot_number is None:
+            return []
+        if day_key in self._day_offsets:
+            return [self._day_offsets[day_key] * self.slots_per_day + slot_number]
+        return [day * self.slots_per_day + slot_number for day in self._weekday_offsets.get(day_key, [])]
+
+    def heatmap(self, slot_counts, maybe_counts):
+        """Full-format heatmap grid with the counts filled into the cached cells"""
+        cells = [
+            dict(cell, count=count, maybeCount=maybe_count)
+            for cell, count, maybe_count in zip(self.cells, slot_counts, maybe_counts)
+        ]
+        per_day = self.slots_per_day
+        return [
+            {'day': day_key, 'slots': cells[offset * per_day:(offset + 1) * per_day]}
+            for offset, day_key in enumerate(self.days)
+        ]
+
+
+# (start_date, end_date, timezone, minutes) -> SlotGrid; a grid only depends on those
+grid_cache = register_cache('slot_grids', WeightedLRUCache(GRID_CACHE_CELLS, lambda grid: grid.size))
+
+
+def slot_grid(start_date, end_date, timezone, minutes):
+    key = (start_date, end_date, timezone, minutes)
+    grid = grid_cache.get(key)
+    if grid is None:
+        # Two requests may build the same grid at once; either copy is fine
+        grid = SlotGrid(start_date, end_date, timezone, minutes)
+        grid_cache.set(key, grid)
+    return grid
+
+
+def slot_minutes(event_data):
+    minutes = event_data.get('slotMinutes') or DEFAULT_SLOT_MINUTES
+    return minutes if minutes in SLOT_MINUTES else DEFAULT_SLOT_MINUTES
+
+
+def grid_for_event(event_data):
+    """The shared grid of an event; events without a parseable date range get the weekday grid"""
+    minutes = slot_minutes(event_data)
+    try:
+        start_date = datetime.fromisoformat(event_data.get('startDate')).date()
+        end_date = datetime.fromisoformat(event_data.get('endDate')).date()
+    except (ValueError, TypeError):
+        return slot_grid(None, None, None, minutes)
+    return slot_grid(start_date, end_date, event_data.get('timezone'), minutes)
@@ -0,0 +1,95 @@
+import numpy as np
+from .slot_grid import grid_for_event
+
+# Response fields holding the packed bitmaps, keyed by the slot-list field they replace
+BITS_FIELDS = {'timeSlots': 'timeSlotBits', 'maybeSlots': 'maybeSlotBits'}
+
+
+class SlotIndex:
+    """Maps an event's slot keys (e.g. "monday_2025-03-04_14") onto bit positions.
+
+    Position = day_offset * slots_per_day + slot, so a response becomes a bitmap
+    over the event's date range. Events without a parseable date range fall
+    back to the generic weekday grid ("monday_14"). The layout comes from the
+    event's cached SlotGrid, so building an index per request is cheap.
+    """
+
+    def __init__(self, event_data):
+        self.grid = grid_for_event(event_data)
+        self.dated = self.grid.dated
+        self.days = self.grid.days
+        self.weekdays = self.grid.weekdays
+        self.slots_per_day = self.grid.slots_per_day
+        self.minutes = self.grid.minutes
+        self.size = self.grid.size
+
+    def key(self, position):
+        return self.grid.keys[int(position)]
+
+    def positions(self, slot):
+        """Bit positions for a slot key; old "day_hour" keys cover every matching weekday"""
+        return self.grid.positions(slot)
+
+    def mask(self, slots):
+        """Boolean mask for slot keys, plus the keys that fall outside this event's grid"""
+        mask = np.zeros(self.size, dtype=bool)
+        unknown = []
+        for slot in slots:
+            positions = self.positions(slot)
+            if positions:
+                mask[positions] = True
+            else:
+                unknown.append(slot)
+        return mask, unknown
+
+    def pack(self, mask):
+        return np.packbits(mask).tobytes()
+
+    def unpack(self, bits):
+        if not bits:
+            return np.zeros(self.size, dtype=bool)
+        packed = np.frombuffer(bytes(bits), dtype=np.uint8)
+        return np.unpackbits(packed, count=self.size).astype(bool)
+
+    def keys(self, mask):
+        return [self.key(position) for position in np.flatnonzero(mask)]
+
+    def response_mask(self, response, slots_field):
+        """Availability mask of a stored response, reading both bitmaps and old slot strings"""
+        mask = self.unpack(response.get(BITS_FIELDS[slots_field]))
+        if response.get(slots_field):
+            mask |= self.mask(response[slots_field])[0]
+        return mask
+
+    def encode_response(self, response_data):
+        """Replace slot lists in response_data with packed bitmaps, in place.
+
+        Keys that do not map onto the grid are kept as strings so nothing is lost.
+        """
+        for slots_field, bits_field in BITS_FIELDS.items():
+            slots = response_data.pop(slots_field, None)
+            if not slots:
+                continue
+            mask, unknown = self.mask(slots)
+            response_data[bits_field] = self.pack(mask)
+            if unknown:
+                response_data[slots_field] = unknown
+        return response_data
+
+    def decode_response(self, response):
+        """Expand a stored response back into slot-key lists, in place"""
+        for slots_field, bits_field in BITS_FIELDS.items():
+            if bits_field not in response and slots_field not in response:
+                continue
+            unknown = [
+                slot for slot in response.get(slots_field) or [] if not self.positions(slot)
+            ]
+            response[slots_field] = self.keys(self.response_mask(response, slots_field)) + unknown
+            response.pop(bits_field, None)
+        return response
+
+    def matrix(self, responses, slots_field):
+        """Respondents x slots availability matrix"""
+        if not responses:
+            return np.zeros((0, self.size), dtype=np.uint8)
+        return np.vstack([self.response_mask(r, slots_field) for r in responses]).astype(np.uint8)
@@ -0,0 +1,91 @@
+import gzip
+import logging
+from flask import Response, current_app, request
+from google.cloud.firestore_v1 import SERVER_TIMESTAMP
+from ..conditional import REVALIDATE
+
+logger = logging.getLogger(__name__)
+
+# Read-only copy of a finished event, kept at events/{id}/snapshots/frozen:
+#   event    the event fields it was built for (a snapshot is only served while they match)
+#   version  aggregate version it was built from
+#   bodies   view name -> gzip-compressed JSON body, exactly as the live endpoint returns it
+SNAPSHOTS_COLLECTION = 'snapshots'
+FROZEN_SNAPSHOT_ID = 'frozen'
+FROZEN_STATUSES = ('scheduled', 'closed')
+
+# Views in the order they are kept when the bodies do not all fit in one
+# document (Firestore's limit is 1 MiB); a view left out is served live
+SNAPSHOT_VIEWS = ('heatmapCompact', 'responses', 'heatmap')
+SNAPSHOT_MAX_BYTES = 900_000
+
+EVENT_FIELDS = ('status', 'startDate', 'endDate', 'timezone', 'slotMinutes', 'scheduledDate', 'scheduledTime')
+
+
+def is_frozen(event_data):
+    return event_data.get('status') in FROZEN_STATUSES
+
+
+def snapshot_ref(event_ref):
+    return event_ref.collection(SNAPSHOTS_COLLECTION).document(FROZEN_SNAPSHOT_ID)
+
+
+def _event_fields(event_data):
+    return {field: event_data.get(field) for field in EVENT_FIELDS}
+
+
+def write_snapshot(event_ref, event_data, version, views):
+    """Store the given view bodies (view name -> JSON-serializable object); returns the views kept"""
+    bodies = {}
+    size = 0
+    for view in SNAPSHOT_VIEWS:
+        if view not in views:
+            continue
+        body = gzip.compress(
+            current_app.json.dumps(views[view]).encode('utf-8'),
+            compresslevel=current_app.config['COMPRESS_LEVEL']
+        )
+        if size + len(body) > SNAPSHOT_MAX_BYTES:
+            logger.info(f"Snapshot of {event_ref.id}: {view} ({len(body)} bytes) does not fit, served live")
+            continue
+        bodies[view] = body
+        size += len(body)
+    snapshot_ref(event_ref).set({
+        'event': _event_fields(event_data),
+        'version': version,
+        'bodies': bodies,
+        'frozenAt': SERVER_TIMESTAMP
+    })
+    return sorted(bodies)
+
+
+def load_snapshot_body(event_ref, event_data, view):
+    """The stored gzip body of a view, or None if there is no matching snapshot for it"""
+    if not is_frozen(event_data):
+        return None
+    snapshot = snapshot_ref(event_ref).get()
+    if not snapshot.exists:
+        return None
+    snapshot = snapshot.to_dict()
+    if snapshot.get('event') != _event_fields(event_data):
+        # Left over from an earlier close/schedule
+        return None
+    return snapshot.get('bodies', {}).get(view)
+
+
+def drop_snapshot(event_ref):
+    snapshot_ref(event_ref).delete()
+
+
+def frozen_response(body, etag):
+    """Serve a stored body: as-is to gzip clients, decompressed to the rest"""
+    response = Response(mimetype='application/json')
+    if request.accept_encodings['gzip'] > 0:
+        response.set_data(bytes(body))
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response.set_data(gzip.decompress(bytes(body)))
+    response.vary.add('Accept-Encoding')
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = REVALIDATE
+    return response
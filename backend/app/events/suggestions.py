@@ -0,0 +1,59 @@
+import numpy as np
+
+
+def _full_windows(matrix, length):
+    """Respondents x windows: True where a respondent is free for the whole window.
+
+    Uses prefix sums along the slot axis, so every window costs O(1) per respondent.
+    """
+    respondents, size = matrix.shape
+    prefix = np.zeros((respondents, size + 1), dtype=np.int32)
+    np.cumsum(matrix, axis=1, out=prefix[:, 1:])
+    return (prefix[:, length:] - prefix[:, :-length]) == length
+
+
+def suggest_windows(index, respondents, length, limit=5, required=(), quorum=1):
+    """Rank windows of `length` consecutive slots by yes count, then maybe count.
+
+    A respondent counts as "yes" for a window if every slot in it is a yes, and as
+    "maybe" if every slot is a yes or maybe (but not all yes). `required` user ids
+    must be "yes" for the whole window; windows with fewer than `quorum` yes
+    respondents are dropped. Ties go to the earlier window.
+    """
+    if length > index.size:
+        return []
+
+    user_ids = sorted(respondents)
+    roster = [respondents[user_id] for user_id in user_ids]
+    yes = index.matrix(roster, 'timeSlots').astype(bool)
+    maybe = index.matrix(roster, 'maybeSlots').astype(bool)
+
+    yes_full = _full_windows(yes, length)
+    available_full = _full_windows(yes | maybe, length)
+    maybe_full = available_full & ~yes_full
+    yes_count = yes_full.sum(axis=0)
+    maybe_count = maybe_full.sum(axis=0)
+
+    # Windows touching a wall-clock time skipped by DST cannot be scheduled
+    valid = (yes_count >= quorum) & _full_windows(index.grid.exists[np.newaxis], length)[0]
+    required_rows = [user_ids.index(user_id) for user_id in required if user_id in respondents]
+    if len(required_rows) < len(set(required)):
+        # Someone required has not responded, so no window can work
+        return []
+    if required_rows:
+        valid &= yes_full[required_rows].all(axis=0)
+
+    starts = np.flatnonzero(valid)
+    order = np.lexsort((starts, -maybe_count[starts], -yes_count[starts]))
+    suggestions = []
+    for start in starts[order[:limit]]:
+        suggestions.append({
+            'startSlot': index.key(start),
+            'endSlot': index.key(start + length - 1),
+            'slots': [index.key(position) for position in range(start, start + length)],
+            'yesCount': int(yes_count[start]),
+            'maybeCount': int(maybe_count[start]),
+            'available': [roster[row]['userName'] for row in np.flatnonzero(yes_full[:, start])],
+            'maybe': [roster[row]['userName'] for row in np.flatnonzero(maybe_full[:, start])]
+        })
+    return suggestions
@@ -0,0 +1,87 @@
+import logging
+from google.cloud.firestore_v1 import SERVER_TIMESTAMP
+from ..db import commit_in_batches
+from ..profiles import normalize_email, resolve_emails, resolve_profile
+from .deletion import is_deleting
+
+logger = logging.getLogger(__name__)
+
+# Denormalized per-user event list, users/{uid}/events/{eventId}: the summary
+# the list view shows, so listing is one query instead of a createdBy query
+# plus an invitees array_contains query (and no owner lookups).
+USER_EVENTS_COLLECTION = 'events'
+
+SUMMARY_FIELDS = (
+    'name', 'type', 'timezone', 'startDate', 'endDate', 'status',
+    'scheduledDate', 'scheduledTime', 'createdBy', 'createdAt'
+)
+
+def user_events(db, uid):
+    return db.collection('users').document(uid).collection(USER_EVENTS_COLLECTION)
+
+
+def event_summary(event_id, event_data):
+    summary = {field: event_data.get(field) for field in SUMMARY_FIELDS}
+    summary['eventId'] = event_id
+    summary['inviteeCount'] = len(event_data.get('invitees') or [])
+    owner = resolve_profile(event_data.get('createdBy'))
+    summary['ownerEmail'] = owner['email'] if owner else 'Unknown'
+    summary['ownerName'] = owner['name'] if owner else 'Unknown'
+    summary['indexedAt'] = SERVER_TIMESTAMP
+    return summary
+
+
+def event_members(event_data):
+    """uid -> 'owner' / 'invitee' for everyone who should see the event.
+
+    Invitees are stored as emails; ones without an account are skipped
+    (index_invitations picks them up when they sign up).
+    """
+    emails = [normalize_email(email) for email in event_data.get('invitees') or []]
+    members = {profile['uid']: 'invitee' for profile in resolve_emails(emails).values()}
+    if event_data.get('createdBy'):
+        members[event_data['createdBy']] = 'owner'
+    return members
+
+
+def sync_event_index(db, event_id, event_data):
+    """Write the event's summary into every member's index"""
+    summary = event_summary(event_id, event_data)
+    members = event_members(event_data)
+    commit_in_batches(db, (
+        (lambda batch, uid=uid, role=role:
+            batch.set(user_events(db, uid).document(event_id), dict(summary, role=role)))
+        for uid, role in members.items()
+    ))
+    return len(members)
+
+
+def index_invitations(db, uid, email):
+    """Index the events a new account was invited to before it existed; returns how many"""
+    invited = db.collection('events').where('invitees', 'array_contains', normalize_email(email)).stream()
+    docs = [doc for doc in invited if not is_deleting(doc.to_dict())]
+    commit_in_batches(db, (
+        (lambda batch, doc=doc: batch.set(
+            user_events(db, uid).document(doc.id), dict(event_summary(doc.id, doc.to_dict()), role='invitee')
+        ))
+        for doc in docs
+    ))
+    return len(docs)
+
+
+def drop_event_index(db, event_id, event_data):
+    """Remove the event from every member's index"""
+    members = event_members(event_data)
+    commit_in_batches(db, (
+        (lambda batch, uid=uid: batch.delete(user_events(db, uid).document(event_id)))
+        for uid in members
+    ))
+
+
+def index_entry(doc):
+    """A list_events row from an index document"""
+    e = doc.to_dict()
+    e['eventId'] = doc.id
+    e['isOwner'] = e.pop('role', None) == 'owner'
+    e.pop('indexedAt', None)
+    return e
@@ -0,0 +1,226 @@
+import bisect
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+import grpc
+
+# Seconds; roughly Prometheus' default buckets with a finer low end for backend calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# gRPC method (e.g. "/google.firestore.v1.Firestore/RunQuery") -> read / query / write
+FIRESTORE_OPERATIONS = {
+    'GetDocument': 'read', 'BatchGetDocuments': 'read', 'ListDocuments': 'read',
+    'ListCollectionIds': 'read',
+    'RunQuery': 'query', 'RunAggregationQuery': 'query', 'PartitionQuery': 'query',
+    'Commit': 'write', 'BatchWrite': 'write', 'BeginTransaction': 'write', 'Rollback': 'write',
+    'CreateDocument': 'write', 'UpdateDocument': 'write', 'DeleteDocument': 'write',
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Histogram:
+    """Labelled histogram rendered in the Prometheus text format"""
+
+    def __init__(self, name, documentation, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            for i in range(position, len(self.buckets)):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted(self._series.items())
+        for label_values, values in series:
+            for bound, count in zip(self.buckets, values):
+                labels = _format_labels(self.labels, label_values, [('le', bound)])
+                lines.append(f'{self.name}_bucket{labels} {count}')
+            labels = _format_labels(self.labels, label_values, [('le', '+Inf')])
+            lines.append(f'{self.name}_bucket{labels} {values[-1]}')
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f'{self.name}_sum{labels} {values[-2]}')
+            lines.append(f'{self.name}_count{labels} {values[-1]}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            lines.append(f'{self.name}{_format_labels(self.labels, label_values)} {value}')
+        return lines
+
+
+request_latency = Histogram(
+    'http_request_duration_seconds', 'Time spent serving HTTP requests.',
+    ('method', 'route', 'status')
+)
+backend_latency = Histogram(
+    'backend_call_duration_seconds', 'Time spent in Firestore and Firebase Auth calls.',
+    ('service', 'operation')
+)
+backend_errors = Counter(
+    'backend_call_errors_total', 'Firestore and Firebase Auth calls that raised an error.',
+    ('service', 'operation')
+)
+
+# In-process caches reported on /metrics, name -> TTLCache
+caches = {}
+
+
+def register_cache(name, cache):
+    caches[name] = cache
+    return cache
+
+
+class RequestTrace:
+    """Backend time spent while serving one request, per service"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.services = {}  # service -> [calls, seconds]
+        self._lock = threading.Lock()
+
+    def add(self, service, seconds):
+        with self._lock:
+            totals = self.services.setdefault(service, [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        entries = [
+            f'{service};dur={seconds * 1000:.1f};desc="{calls} calls"'
+            for service, (calls, seconds) in sorted(self.services.items())
+        ]
+        entries.append(f'total;dur={self.elapsed() * 1000:.1f}')
+        return ', '.join(entries)
+
+
+_trace = contextvars.ContextVar('request_trace', default=None)
+
+
+def start_request():
+    _trace.set(RequestTrace())
+
+
+def current_trace():
+    return _trace.get()
+
+
+def end_request():
+    _trace.set(None)
+
+
+def in_current_context(fn):
+    """Wrap fn so it runs with this request's trace, e.g. on an executor thread"""
+    return functools.partial(contextvars.copy_context().run, fn)
+
+
+def record_call(service, operation, seconds, failed=False, trace=None):
+    backend_latency.observe(seconds, service, operation)
+    if failed:
+        backend_errors.inc(service, operation)
+    trace = trace or current_trace()
+    if trace is not None:
+        trace.add(service, seconds)
+
+
+@contextmanager
+def timed_call(service, operation):
+    """Time a backend call made inline, e.g. ``with timed_call('auth', 'get_users'):``"""
+    started = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except Exception:
+        failed = True
+        raise
+    finally:
+        record_call(service, operation, time.perf_counter() - started, failed)
+
+
+class FirestoreInterceptor(grpc.UnaryUnaryClientInterceptor, grpc.UnaryStreamClientInterceptor):
+    """Times every Firestore RPC on the channel, streaming ones until the stream ends"""
+
+    def _intercept(self, continuation, client_call_details, request):
+        method = client_call_details.method
+        if isinstance(method, bytes):
+            method = method.decode('utf-8')
+        name = method.rsplit('/', 1)[-1]
+        operation = FIRESTORE_OPERATIONS.get(name, name)
+        # Done-callbacks run on gRPC threads, so capture the request's trace here
+        trace = current_trace()
+        started = time.perf_counter()
+        call = continuation(client_call_details, request)
+
+        def done(finished):
+            failed = finished.code() not in (None, grpc.StatusCode.OK)
+            record_call('firestore', operation, time.perf_counter() - started, failed, trace)
+
+        call.add_done_callback(done)
+        return call
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        return self._intercept(continuation, client_call_details, request)
+
+    def intercept_unary_stream(self, continuation, client_call_details, request):
+        return self._intercept(continuation, client_call_details, request)
+
+
+def render():
+    """Everything collected so far, in the Prometheus text exposition format"""
+    lines = request_latency.render() + backend_latency.render() + backend_errors.render()
+    for metric, documentation in (
+        ('cache_entries', 'Entries currently held by in-process caches.'),
+        ('cache_hits_total', 'In-process cache hits.'),
+        ('cache_misses_total', 'In-process cache misses.'),
+    ):
+        kind = 'gauge' if metric == 'cache_entries' else 'counter'
+        lines += [f'# HELP {metric} {documentation}', f'# TYPE {metric} {kind}']
+        for name, cache in sorted(caches.items()):
+            stats = cache.stats()
+            value = {'cache_entries': stats['size'], 'cache_hits_total': stats['hits'],
+                     'cache_misses_total': stats['misses']}[metric]
+            lines.append(f'{metric}{{cache="{_escape(name)}"}} {value}')
+    return '\n'.join(lines) + '\n'
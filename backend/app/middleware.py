@@ -1,24 +1,58 @@
+import hashlib
 from functools import wraps
 from flask import request, g, jsonify
 import firebase_admin
 from firebase_admin import auth
+from .cache import TTLCache
+from .config import Config
+from .metrics import register_cache, timed_call
+
+# Verified ID tokens keyed by digest; each entry expires at the token's exp claim
+token_cache = register_cache('token', TTLCache(maxsize=Config.TOKEN_CACHE_SIZE))
+
+def verify_token(token):
+    """Verify a Firebase ID token, reusing earlier verifications until the token expires"""
+    key = hashlib.sha256(token.encode('utf-8')).hexdigest()
+    decoded_token = token_cache.get(key)
+    if decoded_token is None:
+        with timed_call('auth', 'verify_id_token'):
+            decoded_token = auth.verify_id_token(token)
+        if decoded_token.get('exp'):
+            token_cache.set(key, decoded_token, expires_at=decoded_token['exp'])
+    return decoded_token
+
+def authenticate_request(allow_query_token=False):
+    """Authenticate the Bearer token on the current request and set g.current_user.
+
+    allow_query_token also accepts ?access_token=, for clients such as EventSource
+    that cannot send headers. Returns None on success, or an error response tuple
+    to return as-is.
+    """
+    auth_header = request.headers.get('Authorization')
+    if auth_header and auth_header.startswith('Bearer '):
+        token = auth_header.split('Bearer ')[1]
+    elif allow_query_token and request.args.get('access_token'):
+        token = request.args['access_token']
+    else:
+        return jsonify({'error': 'No authorization header'}), 401
+
+    try:
+        decoded_token = verify_token(token)
+    except Exception as e:
+        return jsonify({'error': 'Invalid token'}), 401
+
+    g.current_user = {
+        'uid': decoded_token['uid'],
+        'email': decoded_token.get('email')
+    }
+    return None
 
 def auth_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return jsonify({'error': 'No authorization header'}), 401
+        error = authenticate_request()
+        if error:
+            return error
+        return f(*args, **kwargs)
 
-        token = auth_header.split('Bearer ')[1]
-        try:
-            decoded_token = auth.verify_id_token(token)
-            g.current_user = {
-                'uid': decoded_token['uid'],
-                'email': decoded_token.get('email')
-            }
-            return f(*args, **kwargs)
-        except Exception as e:
-            return jsonify({'error': 'Invalid token'}), 401
-
-    return decorated_function
\ No newline at end of file
+    return decorated_function
@@ -0,0 +1,101 @@
+import base64
+import json
+from flask import Response, current_app, request, stream_with_context
+from google.cloud.firestore_v1.field_path import FieldPath
+from .config import Config
+
+
+class PageParamsError(ValueError):
+    pass
+
+
+def encode_page_token(cursor):
+    raw = json.dumps(cursor, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_page_token(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        cursor = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError):
+        raise PageParamsError('Invalid pageToken')
+    if not isinstance(cursor, dict):
+        raise PageParamsError('Invalid pageToken')
+    return cursor
+
+
+def page_params():
+    """Read limit/pageToken from the query string.
+
+    Returns (limit, cursor); limit is None when the caller did not ask for paging.
+    """
+    limit = request.args.get('limit')
+    token = request.args.get('pageToken')
+    if limit is None and token is None:
+        return None, None
+    try:
+        limit = int(limit) if limit is not None else Config.PAGE_SIZE_DEFAULT
+    except ValueError:
+        raise PageParamsError('limit must be an integer')
+    if not 1 <= limit <= Config.PAGE_SIZE_MAX:
+        raise PageParamsError(f'limit must be between 1 and {Config.PAGE_SIZE_MAX}')
+    return limit, decode_page_token(token) if token else {}
+
+
+def wants_stream():
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def ordered(query):
+    """Order a query by document id so cursors are stable"""
+    return query.order_by(FieldPath.document_id())
+
+
+def after(query, last_id):
+    return query.start_after({FieldPath.document_id(): last_id}) if last_id else query
+
+
+def stream_in_batches(query, last_id=None, batch_size=None):
+    """Stream a query in document-id order, fetching batch_size documents per round trip.
+
+    Each batch resumes from a cursor on the last document seen, so only one batch
+    is held at a time. With no batch_size the query is streamed in one go.
+    """
+    query = ordered(query)
+    if not batch_size:
+        yield from after(query, last_id).stream()
+        return
+    while True:
+        docs = list(after(query, last_id).limit(batch_size).stream())
+        yield from docs
+        if len(docs) < batch_size:
+            return
+        last_id = docs[-1].id
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def stream_json_array(items):
+    """Stream an iterable of JSON-serializable items as one JSON array"""
+
+    def generate():
+        yield '['
+        first = True
+        for item in items:
+            if not first:
+                yield ','
+            first = False
+            yield current_app.json.dumps(item)
+        yield ']'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
@@ -0,0 +1,106 @@
+import logging
+from firebase_admin import auth
+from .cache import TTLCache
+from .config import Config
+from .metrics import register_cache, timed_call
+
+logger = logging.getLogger(__name__)
+
+# auth.get_users accepts at most 100 identifiers per call
+GET_USERS_BATCH_SIZE = 100
+
+# Cached marker for uids that do not exist, so they are not re-fetched every request
+_NOT_FOUND = object()
+
+profile_cache = register_cache(
+    'profile', TTLCache(maxsize=Config.PROFILE_CACHE_SIZE, ttl=Config.PROFILE_CACHE_TTL)
+)
+
+
+def _profile_from_record(user):
+    return {
+        'uid': user.uid,
+        'email': user.email,
+        'name': user.display_name or user.email
+    }
+
+
+def _email_key(email):
+    return f"email:{email}"
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+def remember_user(user):
+    """Store a UserRecord fetched elsewhere so later lookups are free"""
+    profile = _profile_from_record(user)
+    profile_cache.set(user.uid, profile)
+    if user.email:
+        profile_cache.set(_email_key(normalize_email(user.email)), profile)
+    return profile
+
+
+def resolve_profiles(uids):
+    """Resolve uids to profile dicts with one batched Auth call for the cache misses.
+
+    Returns a dict uid -> {'uid', 'email', 'name'}; unknown uids are left out.
+    """
+    profiles = {}
+    missing = []
+    for uid in dict.fromkeys(u for u in uids if u):
+        cached = profile_cache.get(uid)
+        if cached is _NOT_FOUND:
+            continue
+        if cached is None:
+            missing.append(uid)
+        else:
+            profiles[uid] = cached
+
+    for i in range(0, len(missing), GET_USERS_BATCH_SIZE):
+        chunk = missing[i:i + GET_USERS_BATCH_SIZE]
+        try:
+            with timed_call('auth', 'get_users'):
+                result = auth.get_users([auth.UidIdentifier(uid) for uid in chunk])
+        except Exception as ex:
+            logger.warning(f"Could not resolve user profiles: {ex}")
+            continue
+        for user in result.users:
+            profiles[user.uid] = remember_user(user)
+        for identifier in result.not_found:
+            profile_cache.set(identifier.uid, _NOT_FOUND)
+
+    return profiles
+
+
+def resolve_profile(uid):
+    """Resolve a single uid, returning None if the user cannot be found"""
+    return resolve_profiles([uid]).get(uid)
+
+
+def resolve_emails(emails):
+    """Resolve normalized emails to profiles, batching the cache misses into auth.get_users calls.
+
+    Returns a dict email -> profile; emails without an account (or malformed ones)
+    are left out. Auth errors other than "not found" propagate to the caller.
+    """
+    profiles = {}
+    identifiers = []
+    for email in dict.fromkeys(emails):
+        cached = profile_cache.get(_email_key(email))
+        if cached is not None:
+            profiles[email] = cached
+            continue
+        try:
+            identifiers.append(auth.EmailIdentifier(email))
+        except ValueError:
+            continue
+
+    for i in range(0, len(identifiers), GET_USERS_BATCH_SIZE):
+        with timed_call('auth', 'get_users'):
+            result = auth.get_users(identifiers[i:i + GET_USERS_BATCH_SIZE])
+        for user in result.users:
+            profiles[normalize_email(user.email)] = remember_user(user)
+
+    return profiles
@@ -1,7 +1,10 @@
 from flask import Blueprint, request, jsonify, g, current_app
 from firebase_admin import auth
+from ..db import get_db
+from ..events.user_index import index_invitations
 from ..models import UserCreate
-from ..middleware import auth_required
+from ..metrics import timed_call
+from ..middleware import authenticate_request
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -21,11 +24,19 @@ def signup():
         data = UserCreate(**request.json)
         
         # Create user in Firebase Auth
-        user = auth.create_user(
-            email=data.email,
-            password=data.password,
-            display_name=data.username
-        )
+        with timed_call('auth', 'create_user'):
+            user = auth.create_user(
+                email=data.email,
+                password=data.password,
+                display_name=data.username
+            )
+        
+        # Invitations sent before the account existed are not in the user's
+        # event index yet; the account is created either way
+        try:
+            index_invitations(get_db(), user.uid, data.email)
+        except Exception as e:
+            current_app.logger.error(f"Could not index invitations of {user.uid}: {str(e)}")
         
         return jsonify({'uid': user.uid}), 201
     except ValueError as e:
@@ -44,20 +55,9 @@ def get_current_user():
         response.headers.add('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
         return response, 200
     
-    # Apply auth_required logic manually for GET requests
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return jsonify({'error': 'No authorization header'}), 401
-
-    token = auth_header.split('Bearer ')[1]
-    try:
-        decoded_token = auth.verify_id_token(token)
-        g.current_user = {
-            'uid': decoded_token['uid'],
-            'email': decoded_token.get('email')
-        }
-    except Exception as e:
-        return jsonify({'error': 'Invalid token'}), 401
+    error = authenticate_request()
+    if error:
+        return error
         
     try:
         if not hasattr(g, 'current_user'):
@@ -65,7 +65,8 @@ def get_current_user():
             return jsonify({'error': 'No authenticated user'}), 401
             
         current_app.logger.info(f"Getting user data for uid: {g.current_user['uid']}")
-        user = auth.get_user(g.current_user['uid'])
+        with timed_call('auth', 'get_user'):
+            user = auth.get_user(g.current_user['uid'])
         
         response_data = {
             'uid': user.uid,
@@ -1,7 +1,8 @@
-from typing import Annotated, List, Optional, Dict
+from typing import Annotated, List, Literal, Optional, Dict
 from pydantic import BaseModel, validator
 from pydantic.types import StringConstraints
 from datetime import datetime, date
+from ..events.slot_grid import MAX_SLOTS
 
 class EventCreateModel(BaseModel):
     name: Annotated[
@@ -20,6 +21,8 @@ class EventCreateModel(BaseModel):
     start_date: date
     end_date: date
     invitees: Optional[List[str]] = []
+    # Length of one availability slot
+    slot_minutes: Literal[15, 30, 60] = 60
     
     @validator('end_date')
     def validate_date_range(cls, v, values):
@@ -27,6 +30,17 @@ class EventCreateModel(BaseModel):
             raise ValueError('end_date must be after start_date')
         return v
 
+    @validator('slot_minutes', always=True)
+    def validate_slot_count(cls, v, values):
+        if 'start_date' in values and 'end_date' in values:
+            days = (values['end_date'] - values['start_date']).days + 1
+            if days * (24 * 60 // v) > MAX_SLOTS:
+                raise ValueError(
+                    f'{days} days of {v}-minute slots is more than {MAX_SLOTS} slots; '
+                    'shorten the date range or use longer slots'
+                )
+        return v
+
 class TimeSlotAvailabilityModel(BaseModel):
     # Time slots are represented as "day_hour" format (e.g., "monday_14" for Monday 2 PM)
     available_slots: List[str]
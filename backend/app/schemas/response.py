@@ -21,3 +21,12 @@ class ResponseCreateModel(BaseModel):
         if v is not None and v not in ['yes', 'no', 'maybe']:
             raise ValueError('rsvpStatus must be one of: yes, no, maybe')
         return v
+
+class SlotDeltaModel(BaseModel):
+    add: List[str] = []
+    remove: List[str] = []
+
+class ResponsePatchModel(BaseModel):
+    # Slots painted on / erased since the last save
+    timeSlots: Optional[SlotDeltaModel] = None
+    maybeSlots: Optional[SlotDeltaModel] = None
@@ -0,0 +1,80 @@
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+STARTUP_MODES = ('eager', 'lazy', 'background')
+SERVER_MODES = ('sync', 'gevent')
+
+
+class LazyApp:
+    """WSGI app that builds the real Flask app on first use.
+
+    /healthz is answered straight away, without importing Firebase or Firestore.
+    In 'background' mode the app is built on a warm-up thread at boot, and
+    requests that arrive before it is ready wait for it.
+    """
+
+    def __init__(self, factory, background=False):
+        self._factory = factory
+        self._app = None
+        self._lock = threading.Lock()
+        if background:
+            threading.Thread(target=self._warm_up, name='app-warm-up', daemon=True).start()
+
+    @property
+    def ready(self):
+        return self._app is not None
+
+    def _warm_up(self):
+        try:
+            self.load()
+        except Exception as ex:
+            logger.error(f"Background app start failed: {ex}")
+
+    def load(self):
+        if self._app is None:
+            with self._lock:
+                if self._app is None:
+                    self._app = self._factory()
+        return self._app
+
+    def __call__(self, environ, start_response):
+        if environ.get('PATH_INFO') == '/healthz' and not self.ready:
+            body = json.dumps({'status': 'ok', 'ready': False}).encode('utf-8')
+            start_response('200 OK', [
+                ('Content-Type', 'application/json'),
+                ('Content-Length', str(len(body)))
+            ])
+            return [body]
+        return self.load()(environ, start_response)
+
+
+def create_wsgi_app(mode='eager'):
+    """The WSGI entry point for a startup mode: 'eager', 'lazy' or 'background'"""
+    from . import create_app
+
+    if mode not in STARTUP_MODES:
+        raise ValueError(f"STARTUP_MODE must be one of {', '.join(STARTUP_MODES)}")
+    if mode == 'eager':
+        return create_app()
+    return LazyApp(create_app, background=(mode == 'background'))
+
+
+def init_server_mode(mode='sync'):
+    """Prepare the process for a serving mode; call before the app is built.
+
+    'gevent' makes blocking I/O cooperative (Firestore over gRPC, Auth over HTTP,
+    SSE queues), so one process serves many in-flight requests without
+    rewriting the handlers. Under gunicorn's gevent worker the stdlib is already
+    patched and patching again is a no-op.
+    """
+    if mode not in SERVER_MODES:
+        raise ValueError(f"SERVER_MODE must be one of {', '.join(SERVER_MODES)}")
+    if mode == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+        # gRPC's C core needs to hand its polling over to the gevent hub
+        from grpc.experimental import gevent as grpc_gevent
+        grpc_gevent.init_gevent()
@@ -0,0 +1,139 @@
+from datetime import datetime, timezone
+import numpy as np
+from ..cache import TTLCache
+from ..config import Config
+from ..metrics import register_cache
+from ..events.archive import ARCHIVE_COLLECTION
+from ..events.deletion import is_deleting
+from ..events.event_cache import load_events
+from ..events.slots import SlotIndex
+
+# uid -> the user's merged availability across all events, before the
+# from/to window is applied. Dropped when the user saves a response.
+availability_cache = register_cache(
+    'availability', TTLCache(Config.AVAILABILITY_CACHE_SIZE, Config.AVAILABILITY_CACHE_TTL)
+)
+
+
+def _intervals(index, mask):
+    """(start, end) epoch-second pairs covering runs of consecutive slots in mask"""
+    positions = np.flatnonzero(mask & index.grid.exists)
+    if not len(positions):
+        return []
+    starts = index.grid.start_times[positions]
+    step = index.minutes * 60
+    # A run ends where the next slot does not start right after this one
+    # (a gap in the mask, or a DST jump between days)
+    breaks = np.flatnonzero(np.diff(starts) != step) + 1
+    return [
+        (int(run[0]), int(run[-1]) + step)
+        for run in np.split(starts, breaks)
+    ]
+
+
+def collect_availability(db, uid):
+    """The user's yes/maybe slots from every event they responded to, as UTC intervals.
+
+    Two collection-group queries find the responses (single documents, and
+    archive chunks of compacted events); their events come from the event
+    cache or one batched read.
+    """
+    responses = {}
+    chunks = db.collection_group(ARCHIVE_COLLECTION).where('userIds', 'array_contains', uid).stream()
+    for chunk in chunks:
+        responses[chunk.reference.parent.parent.id] = chunk.to_dict()['responses'][uid]
+    # Mid-compaction both exist; they are identical
+    for doc in db.collection_group('responses').where('userId', '==', uid).stream():
+        responses[doc.reference.parent.parent.id] = doc.to_dict()
+    events = load_events(db, list(responses))
+
+    result = {'events': {}, 'intervals': [], 'undated': []}
+    for event_id, response in responses.items():
+        event_doc = events.get(event_id)
+        if event_doc is None or not event_doc.exists or is_deleting(event_doc.to_dict()):
+            continue
+        event_data = event_doc.to_dict()
+        index = SlotIndex(event_data)
+        result['events'][event_id] = {
+            'name': event_data.get('name'),
+            'timezone': event_data.get('timezone'),
+            'status': event_data.get('status'),
+            'slotMinutes': index.minutes
+        }
+        if not index.dated:
+            # Weekday-only grids have no dates to place on a timeline
+            result['undated'].append(event_id)
+            continue
+        yes = index.response_mask(response, 'timeSlots')
+        maybe = index.response_mask(response, 'maybeSlots') & ~yes
+        for availability, mask in (('yes', yes), ('maybe', maybe)):
+            for start, end in _intervals(index, mask):
+                result['intervals'].append((start, end, event_id, availability))
+    result['intervals'].sort()
+    return result
+
+
+def load_availability(db, uid):
+    cached = availability_cache.get(uid)
+    if cached is None:
+        cached = collect_availability(db, uid)
+        availability_cache.set(uid, cached)
+    return cached
+
+
+def invalidate_availability(uid):
+    availability_cache.pop(uid)
+
+
+def find_conflicts(intervals):
+    """Maximal time ranges in which intervals of two or more different events overlap"""
+    boundaries = sorted(
+        [(start, 1, event_id) for start, _, event_id, _ in intervals]
+        + [(end, -1, event_id) for _, end, event_id, _ in intervals]
+    )
+    active = {}
+    conflicts = []
+    for i, (time, delta, event_id) in enumerate(boundaries):
+        active[event_id] = active.get(event_id, 0) + delta
+        if not active[event_id]:
+            del active[event_id]
+        next_time = boundaries[i + 1][0] if i + 1 < len(boundaries) else time
+        if len(active) < 2 or next_time == time:
+            continue
+        event_ids = sorted(active)
+        if conflicts and conflicts[-1]['end'] == time and conflicts[-1]['eventIds'] == event_ids:
+            conflicts[-1]['end'] = next_time
+        else:
+            conflicts.append({'start': time, 'end': next_time, 'eventIds': event_ids})
+    return conflicts
+
+
+def _iso(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def availability_window(availability, start, end):
+    """The cached availability clipped to [start, end), with times as ISO 8601 UTC strings"""
+    intervals = [
+        (max(s, start), min(e, end), event_id, kind)
+        for s, e, event_id, kind in availability['intervals'] if s < end and e > start
+    ]
+    conflicts = find_conflicts(intervals)
+    event_ids = {event_id for _, _, event_id, _ in intervals}
+    return {
+        'from': _iso(start),
+        'to': _iso(end),
+        'events': {
+            event_id: info for event_id, info in availability['events'].items()
+            if event_id in event_ids or event_id in availability['undated']
+        },
+        'intervals': [
+            {'start': _iso(s), 'end': _iso(e), 'eventId': event_id, 'availability': kind}
+            for s, e, event_id, kind in intervals
+        ],
+        'conflicts': [
+            dict(conflict, start=_iso(conflict['start']), end=_iso(conflict['end']))
+            for conflict in conflicts
+        ],
+        'undatedEvents': availability['undated']
+    }
@@ -1,5 +1,9 @@
+import re
+from datetime import datetime, timedelta, timezone
 from flask import Blueprint, jsonify, g, request
-from ..middleware import auth_required
+from ..db import get_db
+from ..middleware import auth_required, authenticate_request
+from .availability import availability_window, load_availability
  
 users_bp = Blueprint('users', __name__)
  
@@ -13,25 +17,48 @@ def get_profile():
         response.headers.add('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
         return response, 200
     
-    # Apply auth_required logic manually for GET requests
-    from firebase_admin import auth
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return jsonify({'error': 'No authorization header'}), 401
-
-    token = auth_header.split('Bearer ')[1]
-    try:
-        decoded_token = auth.verify_id_token(token)
-        g.current_user = {
-            'uid': decoded_token['uid'],
-            'email': decoded_token.get('email')
-        }
-    except Exception as e:
-        return jsonify({'error': 'Invalid token'}), 401
+    error = authenticate_request()
+    if error:
+        return error
     
     user = g.current_user
     return jsonify({
         'uid': user['uid'],
         'email': user.get('email'),
         'name': user.get('name') or user.get('display_name')
-    })
\ No newline at end of file
+    })
+
+# Longest from/to window accepted by /me/availability
+MAX_AVAILABILITY_DAYS = 366
+
+
+def _parse_instant(value, default):
+    """ISO date or datetime query argument as UTC epoch seconds; naive values are UTC"""
+    if not value:
+        return default
+    # An unencoded '+' in "...T10:00:00+01:00" arrives as a space
+    value = re.sub(r' (\d{2}:?\d{2})$', r'+\1', value)
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+@users_bp.route('/me/availability', methods=['GET'])
+@auth_required
+def get_my_availability():
+    """The caller's yes/maybe time across all their events, with overlaps between events.
+
+    ?from= and ?to= are ISO dates or datetimes (default: the next 30 days).
+    """
+    now = datetime.now(timezone.utc)
+    try:
+        start = _parse_instant(request.args.get('from'), int(now.timestamp()))
+        end = _parse_instant(request.args.get('to'), start + int(timedelta(days=30).total_seconds()))
+    except ValueError:
+        return jsonify({'error': 'from and to must be ISO 8601 dates or datetimes'}), 400
+    if not start < end <= start + MAX_AVAILABILITY_DAYS * 86400:
+        return jsonify({'error': f'to must be after from and at most {MAX_AVAILABILITY_DAYS} days later'}), 400
+
+    availability = load_availability(get_db(), g.current_user['uid'])
+    return jsonify(availability_window(availability, start, end))
@@ -0,0 +1,27 @@
+# gunicorn -c gunicorn.conf.py
+#
+# SERVER_MODE=sync    gthread workers: one OS thread per in-flight request
+# SERVER_MODE=gevent  gevent workers: thousands of in-flight requests per process,
+#                     each parked cooperatively while Firestore/Auth answer
+import os
+
+server_mode = os.getenv('SERVER_MODE', 'sync')
+
+wsgi_app = f"app.startup:create_wsgi_app({os.getenv('STARTUP_MODE', 'eager')!r})"
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+
+if server_mode == 'gevent':
+    worker_class = 'gevent'
+    worker_connections = int(os.getenv('GEVENT_CONNECTIONS', 1000))
+else:
+    worker_class = 'gthread'
+    threads = int(os.getenv('GUNICORN_THREADS', 8))
+
+
+def post_fork(server, worker):
+    # Patch before the worker builds the app, so gRPC is set up for gevent
+    # ahead of the Firestore client and its warm-up read
+    from app.startup import init_server_mode
+    init_server_mode(server_mode)
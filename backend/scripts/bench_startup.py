@@ -0,0 +1,66 @@
+"""Measure cold-start cost of the backend in each startup mode.
+
+Every mode runs in a fresh interpreter and reports:
+  import      time to import the package and build the WSGI entry point
+  healthz     time from process start to the first /healthz response
+  first_api   time from process start to the first API response
+
+Usage (from backend/):
+    python scripts/bench_startup.py [--runs 3] [--modes eager,lazy,background]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r'''
+import json, sys, time
+started = time.perf_counter()
+from app.startup import create_wsgi_app
+from werkzeug.test import Client
+wsgi = create_wsgi_app(sys.argv[1])
+imported = time.perf_counter()
+client = Client(wsgi)
+client.get('/healthz')
+healthz = time.perf_counter()
+client.get('/api/v1/users/me')  # 401 without a token, but needs the full app
+first_api = time.perf_counter()
+print(json.dumps({
+    'import': imported - started,
+    'healthz': healthz - started,
+    'first_api': first_api - started,
+}))
+'''
+
+
+def run_once(mode, env):
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD, mode],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--modes', default='eager,lazy,background')
+    parser.add_argument('--warmup', action='store_true',
+                        help='include the Firestore warm-up read (needs network access)')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env['FIRESTORE_WARMUP'] = 'true' if args.warmup else 'false'
+
+    print(f"{'mode':<12}{'import':>10}{'healthz':>10}{'first_api':>12}  (best of {args.runs}, ms)")
+    for mode in args.modes.split(','):
+        runs = [run_once(mode, env) for _ in range(args.runs)]
+        best = {key: min(run[key] for run in runs) * 1000 for key in runs[0]}
+        print(f"{mode:<12}{best['import']:>10.1f}{best['healthz']:>10.1f}{best['first_api']:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
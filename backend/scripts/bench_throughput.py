@@ -0,0 +1,136 @@
+"""Compare request throughput of the sync and gevent serving modes.
+
+Each mode runs gunicorn (one worker, gunicorn.conf.py) on an app whose
+Firestore and Auth are the in-memory fakes from tests/fakes.py with simulated
+network latency, and is loaded by concurrent clients for a fixed time. With
+real latency a sync worker is capped at threads / request time, while a gevent
+worker keeps every request in flight at once.
+
+Usage (from backend/):
+    python scripts/bench_throughput.py [--seconds 10] [--concurrency 64] [--latency-ms 20]
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOKEN = 'bench-token'
+
+
+def bench_app():
+    """gunicorn app factory: the real app with fake Firestore/Auth backends"""
+    import pytest
+    from app import create_app
+    from tests.fakes import FakeAuth, FakeFirestore, transactional
+
+    latency = {'default': float(os.environ.get('BENCH_LATENCY_MS', 20)) / 1000}
+    db = FakeFirestore(latency=latency)
+    db.seed('events/bench', {
+        'name': 'Bench', 'createdBy': 'bench', 'invitees': [],
+        'startDate': '2025-01-01', 'endDate': '2025-01-14', 'status': 'collecting'
+    })
+    auth = FakeAuth(latency=latency)
+    auth.add_user('bench', 'bench@example.com', 'Bench')
+    auth.tokens[TOKEN] = {'uid': 'bench', 'email': 'bench@example.com', 'exp': time.time() + 86400}
+
+    patches = pytest.MonkeyPatch()
+    auth.install(patches)
+    patches.setattr('firebase_admin.firestore.transactional', transactional)
+    app = create_app()
+    app.extensions['firestore'] = db
+    return app
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def local_session():
+    # Talk to the local server directly, whatever proxy the environment sets
+    session = requests.Session()
+    session.trust_env = False
+    return session
+
+
+def start_server(mode, port, args):
+    env = dict(os.environ, SERVER_MODE=mode, PORT=str(port), WEB_CONCURRENCY='1',
+               FIRESTORE_WARMUP='false', BENCH_LATENCY_MS=str(args.latency_ms))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--log-level', 'warning',
+         'scripts.bench_throughput:bench_app()'],
+        cwd=BACKEND_DIR, env=env
+    )
+    session = local_session()
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            session.get(f'http://127.0.0.1:{port}/healthz', timeout=1)
+            return server
+        except requests.RequestException:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f'{mode} server did not start')
+
+
+def load(url, seconds, concurrency):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.time() + seconds
+
+    def client():
+        session = local_session()
+        session.headers['Authorization'] = f'Bearer {TOKEN}'
+        while time.time() < deadline:
+            started = time.perf_counter()
+            response = session.get(url)
+            elapsed = time.perf_counter() - started
+            with lock:
+                if response.status_code == 200:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    return latencies, errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--latency-ms', type=float, default=20,
+                        help='simulated latency of every Firestore/Auth call')
+    parser.add_argument('--path', default='/api/v1/events/bench/heatmap')
+    parser.add_argument('--modes', default='sync,gevent')
+    args = parser.parse_args()
+
+    print(f"{'mode':<8}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+    for mode in args.modes.split(','):
+        port = free_port()
+        server = start_server(mode, port, args)
+        try:
+            latencies, errors = load(f'http://127.0.0.1:{port}{args.path}', args.seconds, args.concurrency)
+        finally:
+            server.terminate()
+            server.wait()
+        count = len(latencies)
+        p50 = latencies[count // 2] * 1000 if count else 0
+        p95 = latencies[int(count * 0.95)] * 1000 if count else 0
+        print(f"{mode:<8}{count:>10}{count / args.seconds:>10.1f}{p50:>10.1f}{p95:>10.1f}{errors:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Synthetic data for the endpoint benchmarks.
+
+Simulated latency per call comes from BENCH_FIRESTORE_LATENCY_MS and
+BENCH_AUTH_LATENCY_MS (defaults 2 and 5 ms), so results approximate a real
+deployment where every round trip costs network time.
+"""
+import os
+import numpy as np
+import pytest
+from app.events.aggregate import rebuild_aggregate
+from app.events.slots import SlotIndex
+from app.events.user_index import sync_event_index
+from tests.fakes import CallRecorder, FakeAuth, FakeFirestore, transactional
+
+RESPONDENTS = 1000
+RANGE_DAYS = 90
+INVITEES = 500
+OWNED_EVENTS = 200
+INVITED_EVENTS = 300
+OTHER_OWNERS = 50
+
+BIG_EVENT = "big-event"
+BIG_EVENT_DATA = {
+    "name": "Quarterly planning",
+    "type": "once",
+    "timezone": "Europe/Warsaw",
+    "startDate": "2025-01-01",
+    "endDate": "2025-03-31",  # 90 days
+    "invitees": [],
+    "createdBy": "owner",
+    "status": "collecting",
+}
+
+
+def _latency():
+    firestore_ms = float(os.getenv("BENCH_FIRESTORE_LATENCY_MS", "2"))
+    auth_ms = float(os.getenv("BENCH_AUTH_LATENCY_MS", "5"))
+    latency = {"read": firestore_ms, "query": firestore_ms, "write": firestore_ms}
+    latency.update({
+        f"auth.{name}": auth_ms
+        for name in ("verify_id_token", "get_user", "get_user_by_email", "get_users")
+    })
+    return {kind: ms / 1000 for kind, ms in latency.items()}
+
+
+def _seed_events(db, auth):
+    auth.add_user("owner", "owner@example.com", "Event Owner")
+    for i in range(OTHER_OWNERS):
+        auth.add_user(f"other{i}", f"other{i}@example.com", f"Other {i}")
+    for i in range(OWNED_EVENTS):
+        db.seed(f"events/owned{i:04d}", dict(BIG_EVENT_DATA, name=f"Owned {i}"))
+    for i in range(INVITED_EVENTS):
+        db.seed(f"events/invited{i:04d}", dict(
+            BIG_EVENT_DATA, name=f"Invited {i}",
+            createdBy=f"other{i % OTHER_OWNERS}", invitees=["owner@example.com"]
+        ))
+
+
+def _seed_big_event(db, auth):
+    index = SlotIndex(BIG_EVENT_DATA)
+    rng = np.random.default_rng(0)
+    db.seed(f"events/{BIG_EVENT}", BIG_EVENT_DATA)
+    for i in range(RESPONDENTS):
+        uid = f"resp{i:04d}"
+        auth.add_user(uid, f"{uid}@example.com", f"Respondent {i}")
+        db.seed(f"events/{BIG_EVENT}/responses/{uid}", {
+            "userId": uid,
+            "userName": f"Respondent {i}",
+            "userEmail": f"{uid}@example.com",
+            "timeSlotBits": index.pack(rng.random(index.size) < 0.2),
+            "maybeSlotBits": index.pack(rng.random(index.size) < 0.05),
+        })
+    rebuild_aggregate(db, db.collection("events").document(BIG_EVENT), index)
+
+
+def _index_events(db):
+    # What `flask events backfill-user-index` does for existing data
+    for doc in db.collection("events").stream():
+        sync_event_index(db, doc.id, doc.to_dict())
+
+
+@pytest.fixture(scope="session")
+def world():
+    """Shared FakeFirestore/FakeAuth with the synthetic data set, built once"""
+    recorder = CallRecorder(latency={})
+    db = FakeFirestore(recorder=recorder)
+    auth = FakeAuth(recorder=recorder)
+    # Seed without simulated latency, and without leaving firestore.transactional patched
+    import firebase_admin.firestore
+    original = firebase_admin.firestore.transactional
+    firebase_admin.firestore.transactional = transactional
+    try:
+        _seed_events(db, auth)
+        _seed_big_event(db, auth)
+    finally:
+        firebase_admin.firestore.transactional = original
+    with pytest.MonkeyPatch.context() as patches:
+        auth.install(patches)
+        _index_events(db)
+    for i in range(INVITEES):
+        auth.add_user(f"guest{i:04d}", f"guest{i:04d}@example.com", f"Guest {i}")
+    recorder.latency.update(_latency())
+    return db, auth
+
+
+@pytest.fixture
+def bench_client(app, world, monkeypatch):
+    db, auth = world
+    monkeypatch.setattr("firebase_admin.firestore.transactional", transactional)
+    auth.install(monkeypatch)
+    app.extensions["firestore"] = db
+    return app.test_client()
@@ -0,0 +1,128 @@
+"""Wall time and Firestore/Auth call counts of the hot endpoints on synthetic data.
+
+Run with ``pytest tests/benchmarks``; the call counts of each round end up in the
+benchmark's extra_info (``--benchmark-json``) and are asserted on, so a change
+that adds round trips fails here even though timings are noisy.
+"""
+import pytest
+from app.events.event_cache import event_cache
+from app.middleware import token_cache
+from app.profiles import profile_cache
+from .conftest import BIG_EVENT, INVITED_EVENTS, INVITEES, OWNED_EVENTS, RESPONDENTS
+
+pytest.importorskip("pytest_benchmark")
+
+ROUNDS = 5
+
+
+def run(benchmark, world, request, setup=None):
+    """Benchmark a request with cold caches, returning the last response and its call counts"""
+    db, auth = world
+    result = {}
+
+    def reset():
+        token_cache.clear()
+        profile_cache.clear()
+        event_cache.clear()
+        if setup:
+            setup()
+        db.recorder.reset()
+        return (), {}
+
+    def target():
+        result['response'] = request()
+        result['calls'] = dict(db.recorder.calls)
+
+    benchmark.pedantic(target, setup=reset, rounds=ROUNDS, iterations=1)
+    benchmark.extra_info.update(result['calls'])
+    return result['response'], result['calls']
+
+
+def headers(world, uid='owner'):
+    _, auth = world
+    return {'Authorization': f'Bearer {auth.issue_token(uid)}'}
+
+
+def test_list_events(benchmark, bench_client, world):
+    bench_client.application.config['USER_EVENT_INDEX'] = True
+    auth_headers = headers(world)
+    res, calls = run(benchmark, world, lambda: bench_client.get('/api/v1/events', headers=auth_headers))
+
+    assert res.status_code == 200
+    assert len(res.get_json()) == OWNED_EVENTS + INVITED_EVENTS + 1  # + the big event
+    # One query on the per-user index; owner info is denormalized there
+    assert calls['query'] == 1
+    assert 'auth.get_users' not in calls
+    assert 'auth.get_user' not in calls
+
+
+def test_get_heatmap_data(benchmark, bench_client, world):
+    auth_headers = headers(world)
+    res, calls = run(
+        benchmark, world, lambda: bench_client.get(f'/api/v1/events/{BIG_EVENT}/heatmap', headers=auth_headers)
+    )
+
+    assert res.status_code == 200
+    assert res.get_json()['totalResponses'] == RESPONDENTS
+    # The event, the aggregate's version for the ETag, the aggregate and one
+    # batched read of its two roster shards; no response documents are read
+    assert calls['read'] == 4
+    assert calls['documents_read'] == 5
+    assert 'query' not in calls
+
+
+def test_get_heatmap_data_revalidated(benchmark, bench_client, world):
+    auth_headers = headers(world)
+    url = f'/api/v1/events/{BIG_EVENT}/heatmap'
+    etag = bench_client.get(url, headers=auth_headers).headers['ETag']
+    res, calls = run(benchmark, world, lambda: bench_client.get(url, headers={**auth_headers, 'If-None-Match': etag}))
+
+    assert res.status_code == 304
+    # The event and the aggregate's version field; the roster is not downloaded
+    assert calls['read'] == 2
+
+
+def test_get_heatmap_data_compact(benchmark, bench_client, world):
+    auth_headers = dict(headers(world), **{'Accept-Encoding': 'gzip'})
+    res, calls = run(benchmark, world, lambda: bench_client.get(
+        f'/api/v1/events/{BIG_EVENT}/heatmap?format=compact', headers=auth_headers
+    ))
+
+    assert res.status_code == 200
+    assert res.headers['Content-Encoding'] == 'gzip'
+    assert calls['read'] == 4
+    benchmark.extra_info['bytes'] = len(res.get_data())
+
+
+def test_create_response(benchmark, bench_client, world):
+    auth_headers = headers(world, 'resp0001')
+    slots = [f"wednesday_2025-01-01_{hour}" for hour in range(9, 17)]
+    res, calls = run(benchmark, world, lambda: bench_client.post(
+        f'/api/v1/events/{BIG_EVENT}/responses', headers=auth_headers, json={'timeSlots': slots}
+    ))
+
+    assert res.status_code == 201
+    # Event, aggregate and old response reads, then one transaction commit
+    assert calls['read'] == 3
+    assert calls['write'] == 1
+    assert 'query' not in calls
+
+
+def test_invite_user(benchmark, bench_client, world):
+    db, _ = world
+    auth_headers = headers(world)
+    emails = [f"guest{i:04d}@example.com" for i in range(INVITEES)]
+
+    def clear_invitees():
+        db.seed(f"events/{BIG_EVENT}", db._docs[f"events/{BIG_EVENT}"] | {'invitees': []})
+
+    res, calls = run(benchmark, world, lambda: bench_client.post(
+        f'/api/v1/events/{BIG_EVENT}/invite', headers=auth_headers, json={'emails': emails}
+    ), setup=clear_invitees)
+
+    assert res.status_code == 200
+    assert res.get_json()['invited_count'] == INVITEES
+    # 100 identifiers per get_users call (+1 for the owner's name in the index),
+    # one update, then the index fan-out in 500-write batches
+    assert calls['auth.get_users'] == INVITEES // 100 + 1
+    assert calls['write'] == 1 + 2
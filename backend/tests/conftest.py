@@ -1,4 +1,10 @@
+import os
 import pytest
+from unittest.mock import MagicMock
+
+# No warm-up read against a real Firestore project during tests
+os.environ.setdefault("FIRESTORE_WARMUP", "false")
+
 from app import create_app
 
 @pytest.fixture
@@ -11,4 +17,38 @@ def app():
 
 @pytest.fixture
 def client(app):
-    return app.test_client()
\ No newline at end of file
+    return app.test_client()
+
+@pytest.fixture
+def db(app):
+    """Replace the app's shared Firestore client with a MagicMock"""
+    from app.events.event_cache import event_cache
+    event_cache.clear()
+    mock_db = MagicMock()
+    app.extensions["firestore"] = mock_db
+    return mock_db
+
+@pytest.fixture
+def fake_db(app, monkeypatch):
+    """Install an in-memory Firestore (see tests/fakes.py) as the app's client"""
+    from app.events.event_cache import event_cache
+    from app.users.availability import availability_cache
+    from tests.fakes import FakeFirestore, transactional
+    event_cache.clear()
+    availability_cache.clear()
+    fake = FakeFirestore()
+    monkeypatch.setattr("firebase_admin.firestore.transactional", transactional)
+    app.extensions["firestore"] = fake
+    return fake
+
+@pytest.fixture
+def fake_auth(monkeypatch):
+    """Patch firebase_admin.auth with an in-memory user store, starting from empty caches"""
+    from tests.fakes import FakeAuth
+    from app.middleware import token_cache
+    from app.profiles import profile_cache
+    token_cache.clear()
+    profile_cache.clear()
+    fake = FakeAuth()
+    fake.install(monkeypatch)
+    return fake
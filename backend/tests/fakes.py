@@ -0,0 +1,590 @@
+"""In-memory stand-ins for the Firestore client and firebase_admin.auth.
+
+Only the parts of the API the app uses are implemented. Every round trip is
+counted (``calls``) and can be slowed down with a simulated per-call latency,
+so tests and benchmarks can assert on how many Firestore/Auth calls a request
+makes without talking to a real project.
+"""
+import copy
+import itertools
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from google.cloud.firestore_v1 import transforms
+from google.cloud.firestore_v1.field_path import FieldPath, parse_field_path
+
+DOCUMENT_ID = FieldPath.document_id()
+
+# Documents per BulkWriter batch, as in google-cloud-firestore
+BULK_WRITER_BATCH_SIZE = 20
+
+
+class CallRecorder:
+    """Counts calls by kind and sleeps for the configured latency of each one"""
+
+    def __init__(self, latency=None):
+        self.latency = latency or {}
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, kind, **counts):
+        with self._lock:
+            self.calls[kind] += 1
+            self.calls.update(counts)
+        delay = self.latency.get(kind, self.latency.get('default', 0))
+        if delay:
+            time.sleep(delay)
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+
+
+# --- Firestore ---------------------------------------------------------------
+
+def _get_field(data, field_path):
+    value = data
+    for part in parse_field_path(field_path):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _set_field(data, field_path, value):
+    parts = parse_field_path(field_path)
+    for part in parts[:-1]:
+        data = data.setdefault(part, {})
+    data[parts[-1]] = value
+
+
+def _delete_field(data, field_path):
+    parts = parse_field_path(field_path)
+    for part in parts[:-1]:
+        data = data.get(part)
+        if not isinstance(data, dict):
+            return
+    data.pop(parts[-1], None)
+
+
+def _apply_transform(current, value, now):
+    if value is transforms.SERVER_TIMESTAMP:
+        return now
+    if isinstance(value, transforms.ArrayUnion):
+        result = list(current) if isinstance(current, list) else []
+        result += [item for item in value.values if item not in result]
+        return result
+    if isinstance(value, transforms.ArrayRemove):
+        return [item for item in (current or []) if item not in value.values]
+    if isinstance(value, transforms.Increment):
+        return (current if isinstance(current, (int, float)) else 0) + value.value
+    if isinstance(value, dict):
+        base = current if isinstance(current, dict) else {}
+        return {key: _apply_transform(base.get(key), item, now) for key, item in value.items()}
+    return copy.deepcopy(value)
+
+
+class FakeSnapshot:
+    def __init__(self, reference, data, update_time=None, create_time=None):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+        self.update_time = update_time
+        self.create_time = create_time
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data)
+
+    def get(self, field_path):
+        return copy.deepcopy(_get_field(self._data or {}, field_path))
+
+
+class FakeDocumentReference:
+    def __init__(self, db, path):
+        self._db = db
+        self.path = path
+        self.id = path.rsplit('/', 1)[-1]
+
+    def __eq__(self, other):
+        return isinstance(other, FakeDocumentReference) and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+    @property
+    def parent(self):
+        return FakeCollectionReference(self._db, self.path.rsplit('/', 1)[0])
+
+    def collection(self, name):
+        return FakeCollectionReference(self._db, f"{self.path}/{name}")
+
+    def collections(self):
+        self._db.recorder.record('read')
+        return [self.collection(name) for name in self._db._subcollections(self.path)]
+
+    def get(self, field_paths=None, transaction=None, retry=None, timeout=None):
+        self._db.recorder.record('read', documents_read=1)
+        snapshot = self._db._snapshot(self)
+        if field_paths is not None and snapshot.exists:
+            # Only the requested fields come back, like a projected read
+            data = {}
+            for field_path in field_paths:
+                value = snapshot.get(field_path)
+                if value is not None:
+                    *parents, last = field_path.split('.')
+                    node = data
+                    for part in parents:
+                        node = node.setdefault(part, {})
+                    node[last] = value
+            snapshot._data = data
+        return snapshot
+
+    def set(self, data, merge=False, **kwargs):
+        self._db._commit([('set', self, data, merge)])
+
+    def update(self, data, **kwargs):
+        self._db._commit([('update', self, data, False)])
+
+    def delete(self, **kwargs):
+        self._db._commit([('delete', self, None, False)])
+
+    def on_snapshot(self, callback):
+        return self._db._watch(self, callback)
+
+
+class FakeQuery:
+    def __init__(self, db, path, filters=(), orders=(), cursor=None, limit=None, all_descendants=False):
+        self._db = db
+        self._path = path
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._cursor = cursor
+        self._limit = limit
+        self._all_descendants = all_descendants
+
+    def _copy(self, **changes):
+        state = {
+            'filters': self._filters, 'orders': self._orders, 'cursor': self._cursor,
+            'limit': self._limit, 'all_descendants': self._all_descendants
+        }
+        state.update(changes)
+        return FakeQuery(self._db, self._path, **state)
+
+    def where(self, field_path=None, op_string=None, value=None, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path, direction='ASCENDING'):
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def start_after(self, document_fields):
+        if isinstance(document_fields, FakeSnapshot):
+            document_fields = {
+                field: (document_fields.id if field == DOCUMENT_ID else document_fields.get(field))
+                for field, _ in self._orders
+            }
+        return self._copy(cursor=dict(document_fields))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def select(self, field_paths):
+        return self
+
+    def count(self, alias=None):
+        return FakeAggregationQuery(self)
+
+    def _matches(self, doc_id, data):
+        for field_path, op, value in self._filters:
+            actual = doc_id if field_path == DOCUMENT_ID else _get_field(data, field_path)
+            if op == '==' and actual != value:
+                return False
+            if op == '!=' and actual == value:
+                return False
+            if op == 'in' and actual not in value:
+                return False
+            if op == 'array_contains' and value not in (actual or []):
+                return False
+            if op == 'array_contains_any' and not set(value) & set(actual or []):
+                return False
+            if op in ('<', '<=', '>', '>='):
+                if actual is None:
+                    return False
+                if not {'<': actual < value, '<=': actual <= value,
+                        '>': actual > value, '>=': actual >= value}[op]:
+                    return False
+        return True
+
+    def _sort_key(self, doc_id, data, orders):
+        key = []
+        for field_path, direction in orders:
+            value = doc_id if field_path == DOCUMENT_ID else _get_field(data, field_path)
+            key.append((value is not None, value))
+        return key
+
+    def _results(self):
+        docs = [
+            (path, data) for path, data in self._db._collection_docs(self._path, self._all_descendants)
+            if self._matches(path.rsplit('/', 1)[-1], data)
+        ]
+        orders = list(self._orders)
+        if all(field_path != DOCUMENT_ID for field_path, _ in orders):
+            orders.append((DOCUMENT_ID, 'ASCENDING'))
+        for field_path, direction in reversed(orders):
+            docs.sort(
+                key=lambda item: self._sort_key(item[0].rsplit('/', 1)[-1], item[1], [(field_path, direction)]),
+                reverse=(direction == 'DESCENDING')
+            )
+        if self._cursor:
+            cursor = [
+                (self._cursor.get(field_path).id if hasattr(self._cursor.get(field_path), 'id')
+                 else self._cursor.get(field_path))
+                for field_path, _ in orders if field_path in self._cursor
+            ]
+            fields = [(f, d) for f, d in orders if f in self._cursor]
+
+            def past_cursor(item):
+                values = self._sort_key(item[0].rsplit('/', 1)[-1], item[1], fields)
+                for (_, value), bound, (_, direction) in zip(values, cursor, fields):
+                    if value == bound:
+                        continue
+                    return (value > bound) == (direction == 'ASCENDING')
+                return False
+
+            docs = [item for item in docs if past_cursor(item)]
+        if self._limit is not None:
+            docs = docs[:self._limit]
+        return [self._db._snapshot(FakeDocumentReference(self._db, path)) for path, _ in docs]
+
+    def stream(self, transaction=None, retry=None, timeout=None):
+        results = self._results()
+        self._db.recorder.record('query', documents_read=max(len(results), 1))
+        return iter(results)
+
+    def get(self, transaction=None, retry=None, timeout=None):
+        return list(self.stream(transaction=transaction))
+
+
+class FakeAggregationQuery:
+    def __init__(self, query):
+        self._query = query
+
+    def get(self, transaction=None, retry=None, timeout=None):
+        count = len(self._query._results())
+        self._query._db.recorder.record('query', documents_read=1)
+        return [[SimpleNamespace(alias='field_1', value=count)]]
+
+
+class FakeCollectionReference(FakeQuery):
+    def __init__(self, db, path):
+        super().__init__(db, path)
+        self.id = path.rsplit('/', 1)[-1]
+
+    @property
+    def parent(self):
+        # The document a subcollection hangs off, None for a top-level collection
+        return FakeDocumentReference(self._db, self._path.rsplit('/', 1)[0]) if '/' in self._path else None
+
+    def document(self, document_id=None):
+        return FakeDocumentReference(self._db, f"{self._path}/{document_id or uuid.uuid4().hex[:20]}")
+
+    def add(self, data):
+        ref = self.document()
+        ref.set(data)
+        return None, ref
+
+    def list_documents(self):
+        self._db.recorder.record('read')
+        return [FakeDocumentReference(self._db, path) for path, _ in self._db._collection_docs(self._path)]
+
+
+class FakeTransaction:
+    """Buffers writes and commits them when the transactional function returns"""
+
+    def __init__(self, db):
+        self._db = db
+        self._writes = []
+
+    def get(self, ref_or_query, **kwargs):
+        if isinstance(ref_or_query, FakeDocumentReference):
+            return iter([ref_or_query.get()])
+        return ref_or_query.stream()
+
+    def get_all(self, references, **kwargs):
+        return iter(self._db.get_all(references))
+
+    def set(self, reference, data, merge=False):
+        self._writes.append(('set', reference, data, merge))
+
+    def update(self, reference, data, **kwargs):
+        self._writes.append(('update', reference, data, False))
+
+    def delete(self, reference, **kwargs):
+        self._writes.append(('delete', reference, None, False))
+
+    def commit(self):
+        writes, self._writes = self._writes, []
+        if writes:
+            self._db._commit(writes)
+
+
+FakeWriteBatch = FakeTransaction
+
+
+def transactional(to_wrap):
+    """Drop-in for firestore.transactional that works with FakeTransaction"""
+
+    def wrapper(transaction, *args, **kwargs):
+        if not isinstance(transaction, FakeTransaction):
+            raise TypeError('transactional() needs a FakeTransaction; use FakeFirestore.transaction()')
+        result = to_wrap(transaction, *args, **kwargs)
+        transaction.commit()
+        return result
+
+    return wrapper
+
+
+class FakeBulkWriter:
+    def __init__(self, db):
+        self._db = db
+        self._writes = []
+
+    def create(self, reference, data):
+        self._writes.append(('set', reference, data, False))
+
+    def set(self, reference, data, merge=False):
+        self._writes.append(('set', reference, data, merge))
+
+    def update(self, reference, data):
+        self._writes.append(('update', reference, data, False))
+
+    def delete(self, reference):
+        self._writes.append(('delete', reference, None, False))
+
+    def flush(self):
+        writes, self._writes = self._writes, []
+        for start in range(0, len(writes), BULK_WRITER_BATCH_SIZE):
+            self._db._commit(writes[start:start + BULK_WRITER_BATCH_SIZE])
+
+    def close(self):
+        self.flush()
+
+
+class FakeWatch:
+    def __init__(self, db, path, callback):
+        self._db = db
+        self._path = path
+        self._callback = callback
+
+    def unsubscribe(self):
+        self._db._unwatch(self._path, self)
+
+
+class FakeFirestore:
+    """Dict-backed Firestore client: documents live in a flat {path: data} map"""
+
+    def __init__(self, latency=None, recorder=None):
+        self.recorder = recorder or CallRecorder(latency)
+        self._docs = {}
+        self._times = {}
+        self._watches = {}
+        self._lock = threading.RLock()
+        self._clock = itertools.count(1)
+        self._epoch = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    @property
+    def calls(self):
+        return self.recorder.calls
+
+    def collection(self, path):
+        return FakeCollectionReference(self, path)
+
+    def collection_group(self, collection_id):
+        return FakeQuery(self, collection_id, all_descendants=True)
+
+    def document(self, path):
+        return FakeDocumentReference(self, path)
+
+    def transaction(self, **kwargs):
+        return FakeTransaction(self)
+
+    def batch(self):
+        return FakeWriteBatch(self)
+
+    def bulk_writer(self, **kwargs):
+        return FakeBulkWriter(self)
+
+    def get_all(self, references, field_paths=None, transaction=None, **kwargs):
+        references = list(references)
+        self.recorder.record('read', documents_read=len(references))
+        return [self._snapshot(ref) for ref in references]
+
+    def collections(self):
+        return [self.collection(name) for name in sorted({path.split('/', 1)[0] for path in self._docs})]
+
+    def seed(self, path, data):
+        """Store a document directly, without counting a call"""
+        with self._lock:
+            self._docs[path] = copy.deepcopy(data)
+            self._times[path] = self._tick()
+
+    # Internals
+
+    def _tick(self):
+        return self._epoch + timedelta(microseconds=next(self._clock))
+
+    def _snapshot(self, ref):
+        with self._lock:
+            data = self._docs.get(ref.path)
+            times = self._times.get(ref.path)
+            return FakeSnapshot(ref, copy.deepcopy(data), times, times)
+
+    def _collection_docs(self, path, all_descendants=False):
+        with self._lock:
+            items = list(self._docs.items())
+        if all_descendants:
+            return [
+                (doc_path, data) for doc_path, data in items
+                if doc_path.rsplit('/', 2)[-2] == path
+            ]
+        depth = path.count('/') + 1
+        return [
+            (doc_path, data) for doc_path, data in items
+            if doc_path.startswith(path + '/') and doc_path.count('/') == depth
+        ]
+
+    def _subcollections(self, path):
+        prefix = path + '/'
+        with self._lock:
+            names = {p[len(prefix):].split('/', 1)[0] for p in self._docs if p.startswith(prefix)}
+        return sorted(names)
+
+    def _commit(self, writes):
+        self.recorder.record('write', documents_written=len(writes))
+        changed = []
+        with self._lock:
+            now = self._tick()
+            for op, ref, data, merge in writes:
+                current = self._docs.get(ref.path)
+                if op == 'delete':
+                    self._docs.pop(ref.path, None)
+                    self._times.pop(ref.path, None)
+                elif op == 'update' and current is None:
+                    raise LookupError(f"No document to update: {ref.path}")
+                else:
+                    base = copy.deepcopy(current) if (op == 'update' or merge) and current else {}
+                    for field_path, value in data.items():
+                        if value is transforms.DELETE_FIELD:
+                            _delete_field(base, field_path)
+                        elif op == 'update':
+                            _set_field(base, field_path, _apply_transform(_get_field(base, field_path), value, now))
+                        else:
+                            base[field_path] = _apply_transform(base.get(field_path), value, now)
+                    self._docs[ref.path] = base
+                    self._times[ref.path] = now
+                changed.append(ref)
+        for ref in changed:
+            self._notify(ref)
+
+    def _watch(self, ref, callback):
+        watch = FakeWatch(self, ref.path, callback)
+        with self._lock:
+            self._watches.setdefault(ref.path, []).append(watch)
+        callback([self._snapshot(ref)], [], None)
+        return watch
+
+    def _unwatch(self, path, watch):
+        with self._lock:
+            watches = self._watches.get(path, [])
+            if watch in watches:
+                watches.remove(watch)
+
+    def _notify(self, ref):
+        with self._lock:
+            watches = list(self._watches.get(ref.path, []))
+        for watch in watches:
+            watch._callback([self._snapshot(ref)], [], None)
+
+
+# --- Auth --------------------------------------------------------------------
+
+class FakeAuth:
+    """The firebase_admin.auth functions the app calls, backed by a dict of users"""
+
+    def __init__(self, latency=None, recorder=None):
+        self.recorder = recorder or CallRecorder(latency)
+        self.users = {}
+        self.tokens = {}
+
+    @property
+    def calls(self):
+        return self.recorder.calls
+
+    def add_user(self, uid, email=None, display_name=None):
+        user = SimpleNamespace(uid=uid, email=email, display_name=display_name)
+        self.users[uid] = user
+        return user
+
+    def issue_token(self, uid, ttl=3600):
+        """A token verify_id_token accepts for uid, expiring in ttl seconds"""
+        user = self.users[uid]
+        token = f"token-{uid}-{uuid.uuid4().hex[:8]}"
+        self.tokens[token] = {'uid': uid, 'email': user.email, 'exp': time.time() + ttl}
+        return token
+
+    def _by_email(self, email):
+        for user in self.users.values():
+            if user.email and user.email.lower() == email.lower():
+                return user
+        return None
+
+    def verify_id_token(self, id_token, *args, **kwargs):
+        self.recorder.record('auth.verify_id_token')
+        from firebase_admin import auth
+        if id_token not in self.tokens:
+            raise auth.InvalidIdTokenError('Unknown token')
+        return dict(self.tokens[id_token])
+
+    def get_user(self, uid, app=None):
+        self.recorder.record('auth.get_user')
+        from firebase_admin import auth
+        if uid not in self.users:
+            raise auth.UserNotFoundError(f'No user record found for {uid}')
+        return self.users[uid]
+
+    def get_user_by_email(self, email, app=None):
+        self.recorder.record('auth.get_user_by_email')
+        from firebase_admin import auth
+        user = self._by_email(email)
+        if user is None:
+            raise auth.UserNotFoundError(f'No user record found for {email}')
+        return user
+
+    def get_users(self, identifiers, app=None):
+        if len(identifiers) > 100:
+            raise ValueError('identifiers must have <= 100 items')
+        self.recorder.record('auth.get_users')
+        found, not_found = [], []
+        for identifier in identifiers:
+            if hasattr(identifier, 'uid'):
+                user = self.users.get(identifier.uid)
+            else:
+                user = self._by_email(identifier.email)
+            if user is None:
+                not_found.append(identifier)
+            elif user not in found:
+                found.append(user)
+        return SimpleNamespace(users=found, not_found=not_found)
+
+    def install(self, monkeypatch):
+        """Patch firebase_admin.auth so the app talks to this fake"""
+        for name in ('verify_id_token', 'get_user', 'get_user_by_email', 'get_users'):
+            monkeypatch.setattr(f'firebase_admin.auth.{name}', getattr(self, name))
@@ -0,0 +1,92 @@
+from app.events.aggregate import apply_response, empty_aggregate, load_aggregate, rebuild_aggregate, save_response
+from app.events.slots import SlotIndex
+
+EVENT = {"startDate": "2025-03-03", "endDate": "2025-03-09"}
+
+def test_apply_response_applies_slot_diff():
+    index = SlotIndex(EVENT)
+    aggregate = empty_aggregate(index)
+    apply_response(aggregate, index, "u1", None, index.encode_response({
+        "userId": "u1", "userName": "Ann",
+        "timeSlots": ["monday_2025-03-03_9", "monday_2025-03-03_10"],
+        "maybeSlots": ["monday_2025-03-03_11"]
+    }))
+    # Old string-based responses are still understood
+    apply_response(aggregate, index, "u2", None, {
+        "userId": "u2", "userName": "Bob", "timeSlots": ["monday_2025-03-03_9"]
+    })
+    assert aggregate["slotCounts"][9] == 2
+    assert aggregate["slotCounts"][10] == 1
+    assert sum(aggregate["slotCounts"]) == 3
+
+    # u1 moves 10 -> 12 and drops the maybe; only the difference is applied
+    apply_response(aggregate, index, "u1", aggregate["respondents"]["u1"], index.encode_response({
+        "userId": "u1", "userName": "Ann",
+        "timeSlots": ["monday_2025-03-03_9", "monday_2025-03-03_12"]
+    }))
+    assert [i for i, n in enumerate(aggregate["slotCounts"]) if n] == [9, 12]
+    assert sum(aggregate["maybeCounts"]) == 0
+
+    # A response without slots removes the user from the roster
+    apply_response(aggregate, index, "u2", aggregate["respondents"]["u2"], {"userId": "u2", "rsvpStatus": "no"})
+    assert set(aggregate["respondents"]) == {"u1"}
+    assert aggregate["slotCounts"][9] == 1
+    assert index.decode_response(dict(aggregate["respondents"]["u1"]))["timeSlots"] == [
+        "monday_2025-03-03_9", "monday_2025-03-03_12"
+    ]
+
+def test_save_response_updates_only_the_changed_paths(fake_db, monkeypatch):
+    from tests.fakes import FakeTransaction
+    index = SlotIndex(EVENT)
+    fake_db.seed("events/e1", EVENT)
+    event_ref = fake_db.document("events/e1")
+    # No aggregate yet: it is built and written whole
+    save_response(fake_db, event_ref, index, "u1", index.encode_response({"userId": "u1", "timeSlots": ["monday_2025-03-03_9"]}))
+
+    updates = []
+    update = FakeTransaction.update
+    monkeypatch.setattr(FakeTransaction, "update", lambda self, ref, data, **kwargs: (
+        updates.append(sorted(data)), update(self, ref, data, **kwargs)
+    ))
+    save_response(fake_db, event_ref, index, "u-2", index.encode_response({"userId": "u-2", "timeSlots": ["monday_2025-03-03_9"]}))
+    save_response(fake_db, event_ref, index, "u1", {"userId": "u1", "rsvpStatus": "no"})
+
+    assert updates == [
+        ["maybeCounts", "respondentCount", "respondents.`u-2`", "slotCounts", "updatedAt", "version"],
+        ["maybeCounts", "respondentCount", "respondents.u1", "slotCounts", "updatedAt", "version"],
+    ]
+    aggregate = load_aggregate(fake_db, event_ref, index)
+    assert set(aggregate["respondents"]) == {"u-2"}
+    assert aggregate["slotCounts"][9] == 1
+    assert aggregate["version"] == 3
+
+def test_large_roster_is_sharded_out_of_the_aggregate(fake_db, monkeypatch):
+    import app.events.aggregate as aggregate_module
+    index = SlotIndex(EVENT)  # 168 slots: about 170 bytes per roster entry
+    monkeypatch.setattr(aggregate_module, "ROSTER_INLINE_BYTES", 500)
+    monkeypatch.setattr(aggregate_module, "ROSTER_SHARD_MAX_BYTES", 800)
+    fake_db.seed("events/e1", EVENT)
+    event_ref = fake_db.document("events/e1")
+    uids = [f"u{i}" for i in range(10)]
+    for uid in uids:
+        save_response(fake_db, event_ref, index, uid, index.encode_response({"userId": uid, "timeSlots": ["monday_2025-03-03_9"]}))
+
+    # Inline up to two respondents, two shards from the third, five from the tenth
+    stored = fake_db.document("events/e1/aggregates/heatmap").get().to_dict()
+    assert "respondents" not in stored
+    assert (stored["rosterShards"], stored["respondentCount"]) == (5, 10)
+    shards = [fake_db.document(f"events/e1/aggregates/heatmap-roster-{n:03d}").get().to_dict() for n in range(5)]
+    assert sorted(uid for shard in shards for uid in shard["respondents"]) == uids
+    aggregate = load_aggregate(fake_db, event_ref, index)
+    assert sorted(aggregate["respondents"]) == uids
+    assert aggregate["slotCounts"][9] == 10
+
+    save_response(fake_db, event_ref, index, "u3", {"userId": "u3", "rsvpStatus": "no"})
+    aggregate = load_aggregate(fake_db, event_ref, index)
+    assert "u3" not in aggregate["respondents"] and aggregate["respondentCount"] == 9
+
+    # A rebuild that fits inline again leaves no shards behind
+    monkeypatch.setattr(aggregate_module, "ROSTER_INLINE_BYTES", 10_000)
+    rebuild_aggregate(fake_db, event_ref, index)
+    assert len(fake_db.document("events/e1/aggregates/heatmap").get().to_dict()["respondents"]) == 9
+    assert not fake_db.document("events/e1/aggregates/heatmap-roster-000").get().exists
@@ -5,7 +5,7 @@ from types import SimpleNamespace
 from unittest.mock import patch
 
 @patch("firebase_admin.auth.create_user")
-def test_signup(mock_create_user, client):
+def test_signup(mock_create_user, client, db):
     # pretend create_user returns an object with a uid
     mock_create_user.return_value = SimpleNamespace(uid="fake-uid-123")
     res = client.post('/api/v1/auth/signup', json={
@@ -0,0 +1,51 @@
+def test_availability_merges_events_and_reports_conflicts(fake_db, fake_auth, client):
+    fake_auth.add_user("abc", "abc@example.com", "Ann")
+    headers = {"Authorization": f"Bearer {fake_auth.issue_token('abc')}"}
+    fake_db.seed("events/utc", {"name": "Standup", "createdBy": "abc", "timezone": "UTC",
+                                "startDate": "2025-03-03", "endDate": "2025-03-04"})
+    fake_db.seed("events/waw", {"name": "Retro", "createdBy": "abc", "timezone": "Europe/Warsaw",
+                                "startDate": "2025-03-03", "endDate": "2025-03-04", "slotMinutes": 30})
+    client.post("/api/v1/events/utc/responses", headers=headers, json={
+        "timeSlots": ["monday_2025-03-03_9", "monday_2025-03-03_10"], "maybeSlots": ["monday_2025-03-03_11"]
+    })
+    # 11:30-12:30 in Warsaw (UTC+1) is 10:30-11:30 UTC
+    client.patch("/api/v1/events/waw/responses/me", headers=headers, json={
+        "timeSlots": {"add": ["monday_2025-03-03_11:30", "monday_2025-03-03_12"]}
+    })
+
+    fake_db.recorder.reset()
+    res = client.get("/api/v1/users/me/availability?from=2025-03-03&to=2025-03-04", headers=headers)
+    assert res.status_code == 200
+    data = res.get_json()
+    assert [(i["eventId"], i["start"], i["end"], i["availability"]) for i in data["intervals"]] == [
+        ("utc", "2025-03-03T09:00:00Z", "2025-03-03T11:00:00Z", "yes"),
+        ("waw", "2025-03-03T10:30:00Z", "2025-03-03T11:30:00Z", "yes"),
+        ("utc", "2025-03-03T11:00:00Z", "2025-03-03T12:00:00Z", "maybe"),
+    ]
+    assert data["conflicts"] == [
+        {"start": "2025-03-03T10:30:00Z", "end": "2025-03-03T11:30:00Z", "eventIds": ["utc", "waw"]}
+    ]
+    assert data["events"]["waw"]["slotMinutes"] == 30
+    # Single responses and archive chunks
+    assert fake_db.calls["query"] == 2
+
+    # Served from the cache until the user responds again
+    client.get("/api/v1/users/me/availability?from=2025-03-03&to=2025-03-04", headers=headers)
+    assert fake_db.calls["query"] == 2
+    client.post("/api/v1/events/utc/responses", headers=headers, json={"timeSlots": ["monday_2025-03-03_9"]})
+    data = client.get("/api/v1/users/me/availability?from=2025-03-03&to=2025-03-04", headers=headers).get_json()
+    assert fake_db.calls["query"] == 4
+    assert data["conflicts"] == []
+
+    res = client.get("/api/v1/users/me/availability?from=2025-03-04&to=2025-03-03", headers=headers)
+    assert res.status_code == 400
+
+
+def test_availability_window_accepts_unencoded_offsets(fake_db, fake_auth, client):
+    fake_auth.add_user("abc", "abc@example.com", "Ann")
+    headers = {"Authorization": f"Bearer {fake_auth.issue_token('abc')}"}
+    # The '+' of the offset is not URL-encoded, so it reaches the server as a space
+    res = client.get("/api/v1/users/me/availability?from=2025-03-03T10:00:00+01:00&to=2025-03-04T10:00:00%2B01:00",
+                     headers=headers)
+    assert res.status_code == 200
+    assert (res.get_json()["from"], res.get_json()["to"]) == ("2025-03-03T09:00:00Z", "2025-03-04T09:00:00Z")
@@ -0,0 +1,72 @@
+def test_compaction_archives_responses_behind_the_same_api(app, fake_db, fake_auth, client):
+    fake_auth.add_user("abc", "abc@example.com", "Ann")
+    headers = {"Authorization": f"Bearer {fake_auth.issue_token('abc')}"}
+    fake_db.seed("events/old", {"createdBy": "abc", "status": "collecting",
+                                "startDate": "2020-03-02", "endDate": "2020-03-03"})
+    fake_db.seed("events/new", {"createdBy": "abc", "status": "collecting",
+                                "startDate": "2999-03-02", "endDate": "2999-03-03"})
+    for uid in ("u1", "u2", "u3"):
+        fake_db.seed(f"events/old/responses/{uid}", {"userId": uid, "userName": uid, "timeSlots": ["monday_2020-03-02_9"]})
+    before = client.get("/api/v1/events/old/responses", headers=headers).get_json()
+    heatmap = client.get("/api/v1/events/old/heatmap", headers=headers).get_json()
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["events", "compact-responses", "--dry-run", "--chunk-size", "2"])
+    assert "old: 3 response(s) -> 2 chunk(s), 1 read(s) saved" in result.output
+    assert "new:" not in result.output
+    assert fake_db.document("events/old/responses/u1").get().exists
+
+    result = runner.invoke(args=["events", "compact-responses", "--chunk-size", "2", "--grace", "0"])
+    assert "old: archived 3 response(s) into 2 chunk(s)" in result.output
+    assert not fake_db.document("events/old/responses/u1").get().exists
+
+    # Same shapes, two chunk reads instead of three responses
+    fake_db.recorder.reset()
+    assert client.get("/api/v1/events/old/responses", headers=headers).get_json() == before
+    assert fake_db.calls["documents_read"] <= 4  # event, aggregate, 2 chunks
+    page = client.get("/api/v1/events/old/responses?limit=2", headers=headers).get_json()
+    rest = client.get(f"/api/v1/events/old/responses?pageToken={page['nextPageToken']}", headers=headers).get_json()
+    assert [r["responseId"] for r in page["responses"] + rest["responses"]] == ["u1", "u2", "u3"]
+    assert client.get("/api/v1/events/old/heatmap", headers=headers).get_json() == heatmap
+    assert client.post("/api/v1/events/old/responses", headers=headers,
+                       json={"timeSlots": ["monday_2020-03-02_9"]}).status_code == 409
+
+    # Reopening expands the archive again
+    client.post("/api/v1/events/old/reopen", headers=headers)
+    assert fake_db.document("events/old/responses/u2").get().exists
+    assert not fake_db.document("events/old/responseArchive/00000").get().exists
+    assert client.get("/api/v1/events/old/responses", headers=headers).get_json() == before
+
+
+def test_purge_skips_events_reopened_during_the_grace_period(fake_db, fake_auth, client):
+    from app.events.archive import archive_boundaries
+    from app.events.compaction import archive_event, purge_responses
+    from app.events.slots import SlotIndex
+    fake_auth.add_user("abc", "abc@example.com", "Ann")
+    headers = {"Authorization": f"Bearer {fake_auth.issue_token('abc')}"}
+    event = {"createdBy": "abc", "status": "collecting", "startDate": "2020-03-02", "endDate": "2020-03-03"}
+    fake_db.seed("events/old", event)
+    fake_db.seed("events/old/responses/u1", {"userId": "u1", "userName": "u1", "timeSlots": ["monday_2020-03-02_9"]})
+    event_ref = fake_db.document("events/old")
+    archive_event(fake_db, event_ref, SlotIndex(event), 500)
+    boundaries = archive_boundaries(event_ref.get().to_dict())
+
+    # Reopened and answered again before the purge runs
+    client.post("/api/v1/events/old/reopen", headers=headers)
+    client.post("/api/v1/events/old/responses", headers=headers, json={"timeSlots": ["monday_2020-03-02_10"]})
+
+    assert purge_responses(fake_db, event_ref, boundaries) is None
+    responses = client.get("/api/v1/events/old/responses", headers=headers).get_json()
+    assert sorted(r["responseId"] for r in responses) == ["abc", "u1"]
+
+
+def test_compaction_age_counts_from_the_latest_finish():
+    from datetime import datetime, timedelta, timezone
+    from app.events.compaction import is_compactable
+    now = datetime(2025, 6, 1, tzinfo=timezone.utc)
+    closed_before = now - timedelta(days=30)
+    # Scheduled long ago, reopened, then closed yesterday
+    event = {"status": "closed", "endDate": "2999-01-01",
+             "scheduledAt": now - timedelta(days=90), "closedAt": now - timedelta(days=1)}
+    assert not is_compactable(event, now.date(), closed_before)
+    assert is_compactable(dict(event, closedAt=now - timedelta(days=31)), now.date(), closed_before)
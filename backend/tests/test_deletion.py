@@ -0,0 +1,33 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, call
+from app.events.deletion import delete_event_tree
+
+def test_delete_event_tree_deletes_children_before_event():
+    db = MagicMock()
+    writer = db.bulk_writer.return_value
+    responses = MagicMock()
+    responses.select.return_value.stream.return_value = [
+        SimpleNamespace(reference=f"resp-{i}") for i in range(3)
+    ]
+    aggregates = MagicMock()
+    aggregates.select.return_value.stream.return_value = [SimpleNamespace(reference="agg")]
+    event_ref = MagicMock()
+    event_ref.collections.return_value = [responses, aggregates]
+
+    assert delete_event_tree(db, event_ref) == 5
+    assert writer.mock_calls == [
+        call.delete("resp-0"), call.delete("resp-1"), call.delete("resp-2"), call.delete("agg"),
+        call.flush(), call.delete(event_ref), call.close()
+    ]
+
+
+def test_resume_deletes_finishes_interrupted_deletes(app, fake_db):
+    fake_db.seed("events/gone", {"status": "deleting"})
+    fake_db.seed("events/gone/responses/u1", {"userId": "u1"})
+    fake_db.seed("events/kept", {"status": "collecting"})
+
+    result = app.test_cli_runner().invoke(args=["events", "resume-deletes"])
+    assert "gone: deleted 2 document(s)" in result.output
+    assert not fake_db.document("events/gone").get().exists
+    assert not fake_db.document("events/gone/responses/u1").get().exists
+    assert fake_db.document("events/kept").get().exists
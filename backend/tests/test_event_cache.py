@@ -0,0 +1,29 @@
+from app.config import Config
+from app.events.event_cache import event_cache, event_watches, load_event
+
+def test_event_reads_are_cached_until_a_write(fake_db, fake_auth, client):
+    fake_auth.add_user("abc", "abc@example.com", "Ann")
+    fake_db.seed("events/e1", {"createdBy": "abc", "status": "collecting"})
+    headers = {"Authorization": f"Bearer {fake_auth.issue_token('abc')}"}
+
+    assert client.get("/api/v1/events/e1", headers=headers).status_code == 200
+    fake_db.recorder.reset()
+    client.get("/api/v1/events/e1", headers=headers)
+    assert fake_db.calls["read"] == 0
+
+    # Writes through the API drop the entry, so the next read sees them
+    client.post("/api/v1/events/e1/close", headers=headers)
+    assert client.get("/api/v1/events/e1", headers=headers).get_json()["status"] == "closed"
+
+def test_listener_keeps_cached_event_fresh(fake_db, monkeypatch):
+    monkeypatch.setattr(Config, "EVENT_CACHE_WATCH", True)
+    fake_db.seed("events/e1", {"status": "collecting"})
+    try:
+        load_event(fake_db, "e1")
+        # A write from elsewhere (another process) reaches the cache via the listener
+        fake_db.document("events/e1").update({"status": "scheduled"})
+        assert event_cache.get("e1").to_dict()["status"] == "scheduled"
+        fake_db.document("events/e1").delete()
+        assert event_cache.get("e1") is None
+    finally:
+        event_watches.clear()
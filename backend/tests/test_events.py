@@ -1,10 +1,9 @@
 from unittest.mock import patch
 
 @patch("firebase_admin.auth.verify_id_token")
-@patch("firebase_admin.firestore.client")
-def test_create_event(mock_db, mock_auth, client):
+def test_create_event(mock_auth, client, db):
     mock_auth.return_value = {"uid": "abc"}
-    mock_collection = mock_db.return_value.collection.return_value
+    mock_collection = db.collection.return_value
     mock_doc = mock_collection.document.return_value
     mock_doc.id = "event123"
 
@@ -18,4 +17,148 @@ def test_create_event(mock_db, mock_auth, client):
     })
 
     assert res.status_code == 201
-    assert res.get_json()["eventId"] == "event123"
\ No newline at end of file
+    assert res.get_json()["eventId"] == "event123"
+
+@patch("app.events.routes.sync_event_index")
+@patch("firebase_admin.auth.get_users")
+@patch("firebase_admin.auth.verify_id_token")
+def test_invite_resolves_emails_in_one_batch(mock_auth, mock_get_users, mock_sync, client, db):
+    from types import SimpleNamespace
+    from app.profiles import profile_cache
+    profile_cache.clear()
+    mock_auth.return_value = {"uid": "abc"}
+    event = db.collection.return_value.document.return_value
+    event.get.return_value.exists = True
+    event.get.return_value.to_dict.return_value = {"createdBy": "abc", "invitees": ["old@example.com"]}
+    mock_get_users.return_value = SimpleNamespace(users=[
+        SimpleNamespace(uid="u1", email="ann@example.com", display_name="Ann"),
+        SimpleNamespace(uid="u2", email="bob@example.com", display_name="Bob"),
+    ], not_found=[])
+
+    res = client.post("/api/v1/events/event123/invite", headers={
+        "Authorization": "Bearer token"
+    }, json={
+        "emails": [" Ann@Example.com", "ann@example.com", "bob@example.com", "OLD@example.com", "who@example.com"]
+    })
+
+    data = res.get_json()
+    assert res.status_code == 200
+    assert mock_get_users.call_count == 1
+    assert len(mock_get_users.call_args[0][0]) == 3
+    assert data["invited_count"] == 2
+    assert data["not_found"] == ["who@example.com"]
+    assert data["already_invited"] == ["old@example.com"]
+
+
+@patch("firebase_admin.auth.verify_id_token")
+def test_heatmap_honors_if_none_match(mock_auth, client, db):
+    from app.events.aggregate import empty_aggregate
+    from app.events.slots import SlotIndex
+    mock_auth.return_value = {"uid": "abc"}
+    event_data = {"createdBy": "abc", "startDate": "2025-03-03", "endDate": "2025-03-04"}
+    aggregate = empty_aggregate(SlotIndex(event_data))
+    aggregate["version"] = 7
+    event = db.collection.return_value.document.return_value
+    event.get.return_value.exists = True
+    event.get.return_value.update_time = "2025-03-01T00:00:00Z"
+    event.get.return_value.to_dict.return_value = event_data
+    aggregate_doc = event.collection.return_value.document.return_value.get.return_value
+    aggregate_doc.exists = True
+    aggregate_doc.to_dict.return_value = aggregate
+    aggregate_doc.get.side_effect = aggregate.get
+    headers = {"Authorization": "Bearer token"}
+
+    res = client.get("/api/v1/events/event123/heatmap", headers=headers)
+    assert res.status_code == 200
+    etag = res.headers["ETag"]
+
+    res = client.get("/api/v1/events/event123/heatmap", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.data == b""
+
+    aggregate["version"] = 8
+    res = client.get("/api/v1/events/event123/heatmap", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 200
+
+
+def test_compact_heatmap_is_gzipped(fake_db, fake_auth, client):
+    import base64, gzip, json
+    fake_auth.add_user("abc", "abc@example.com", "Ann")
+    fake_db.seed("events/e1", {"createdBy": "abc", "startDate": "2025-03-03", "endDate": "2025-03-09"})
+    res = client.post("/api/v1/events/e1/responses", headers={
+        "Authorization": f"Bearer {fake_auth.issue_token('abc')}"
+    }, json={"timeSlots": ["monday_2025-03-03_9", "tuesday_2025-03-04_10"]})
+    assert res.status_code == 201
+
+    res = client.get("/api/v1/events/e1/heatmap?format=compact", headers={
+        "Authorization": f"Bearer {fake_auth.issue_token('abc')}",
+        "Accept-Encoding": "gzip"
+    })
+
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert res.headers["ETag"].startswith('W/')
+    data = json.loads(gzip.decompress(res.get_data()))
+    assert data["days"][0] == "monday_2025-03-03"
+    assert [i for i, n in enumerate(data["slotCounts"]) if n] == [9, 34]
+    bits = base64.b64decode(data["respondents"][0]["timeSlotBits"])
+    assert bits[1] == 0b01000000  # slot 9, most significant bit first
+
+    # The weak ETag still revalidates
+    res = client.get("/api/v1/events/e1/heatmap?format=compact", headers={
+        "Authorization": f"Bearer {fake_auth.issue_token('abc')}",
+        "If-None-Match": res.headers["ETag"]
+    })
+    assert res.status_code == 304
+
+
+def test_patch_response_applies_slot_delta(fake_db, fake_auth, client):
+    fake_auth.add_user("abc", "abc@example.com", "Ann")
+    fake_db.seed("events/e1", {"createdBy": "abc", "startDate": "2025-03-03", "endDate": "2025-03-09"})
+    headers = {"Authorization": f"Bearer {fake_auth.issue_token('abc')}"}
+    client.post("/api/v1/events/e1/responses", headers=headers, json={
+        "timeSlots": ["monday_2025-03-03_9", "monday_2025-03-03_10"]
+    })
+
+    res = client.patch("/api/v1/events/e1/responses/me", headers=headers, json={
+        "timeSlots": {"add": ["monday_2025-03-03_11"], "remove": ["monday_2025-03-03_9"]},
+        "maybeSlots": {"add": ["monday_2025-03-03_12"]}
+    })
+    assert res.status_code == 200
+
+    response = client.get("/api/v1/events/e1/responses", headers=headers).get_json()[0]
+    assert response["timeSlots"] == ["monday_2025-03-03_10", "monday_2025-03-03_11"]
+    assert response["maybeSlots"] == ["monday_2025-03-03_12"]
+    aggregate = fake_db.document("events/e1/aggregates/heatmap").get().to_dict()
+    assert [i for i, n in enumerate(aggregate["slotCounts"]) if n] == [10, 11]
+    assert aggregate["maybeCounts"][12] == 1
+
+    # Slots outside the date range are rejected
+    res = client.patch("/api/v1/events/e1/responses/me", headers=headers, json={
+        "timeSlots": {"add": ["monday_2025-04-07_9"]}
+    })
+    assert res.status_code == 422
+    assert res.get_json()["slots"] == ["monday_2025-04-07_9"]
+
+
+def test_export_streams_long_and_wide_rows(fake_db, fake_auth, client):
+    import csv, io, json
+    fake_auth.add_user("abc", "abc@example.com", "Ann")
+    fake_db.seed("events/e1", {"createdBy": "abc", "startDate": "2025-03-03", "endDate": "2025-03-04"})
+    headers = {"Authorization": f"Bearer {fake_auth.issue_token('abc')}"}
+    client.post("/api/v1/events/e1/responses", headers=headers, json={
+        "timeSlots": ["monday_2025-03-03_9"], "maybeSlots": ["tuesday_2025-03-04_10"]
+    })
+
+    res = client.get("/api/v1/events/e1/responses/export?format=csv", headers=headers)
+    assert res.is_streamed
+    rows = list(csv.DictReader(io.StringIO(res.get_data(as_text=True))))
+    assert [(r["slot"], r["hour"], r["availability"]) for r in rows] == [
+        ("monday_2025-03-03_9", "9", "yes"), ("tuesday_2025-03-04_10", "10", "maybe")
+    ]
+
+    res = client.get("/api/v1/events/e1/responses/export?format=ndjson&shape=wide", headers=headers)
+    row = json.loads(res.get_data(as_text=True).splitlines()[0])
+    assert len(row) == 3 + 48
+    assert row["userName"] == "Ann"
+    assert row["monday_2025-03-03_9"] == "yes" and row["tuesday_2025-03-04_10"] == "maybe"
+    assert row["monday_2025-03-03_8"] == ""
@@ -0,0 +1,79 @@
+import json
+from unittest.mock import MagicMock
+from app.events.aggregate import empty_aggregate
+from app.events.live import HeatmapFeeds
+from app.events.slots import SlotIndex
+
+def _snapshot(aggregate):
+    doc = MagicMock(exists=True)
+    doc.to_dict.return_value = aggregate
+    return [doc]
+
+def _message(subscriber):
+    event, data = subscriber.get_nowait().strip().split("\n")
+    return event.split(": ")[1], json.loads(data.split(": ", 1)[1])
+
+def test_feed_shares_listener_sends_deltas_and_tears_down():
+    index = SlotIndex({"startDate": "2025-03-03", "endDate": "2025-03-03"})
+    event_ref = MagicMock(id="event123")
+    watch = MagicMock()
+    event_ref.collection.return_value.document.return_value.on_snapshot.return_value = watch
+    feeds = HeatmapFeeds()
+
+    first = feeds.subscribe(event_ref, index)
+    second = feeds.subscribe(event_ref, index)
+    assert event_ref.collection.return_value.document.return_value.on_snapshot.call_count == 1
+    assert _message(first) == ("init", {"version": 0, "totalResponses": 0, "slots": []})
+    _message(second)
+
+    on_snapshot = event_ref.collection.return_value.document.return_value.on_snapshot.call_args[0][0]
+    aggregate = empty_aggregate(index)
+    aggregate["slotCounts"][9] = 2
+    aggregate["version"] = 3
+    on_snapshot(_snapshot(aggregate), [], None)
+    event, data = _message(second)
+    assert event == "delta"
+    assert data["slots"] == [{"slot": "monday_2025-03-03_9", "count": 2, "maybeCount": 0}]
+
+    feeds.unsubscribe("event123", first)
+    assert not watch.unsubscribe.called
+    feeds.unsubscribe("event123", second)
+    assert watch.unsubscribe.called
+    assert len(feeds) == 0
+
+def test_unsubscribe_waits_for_a_running_snapshot_callback():
+    import threading
+    index = SlotIndex({"startDate": "2025-03-03", "endDate": "2025-03-03"})
+    event_ref = MagicMock(id="event123")
+    feeds = HeatmapFeeds()
+    first = feeds.subscribe(event_ref, index)
+    second = feeds.subscribe(event_ref, index)
+    feed = feeds._feeds["event123"]
+
+    # A disconnect while the watch thread fans a delta out must not touch the set underneath it
+    feed._lock.acquire()
+    done = threading.Event()
+    threading.Thread(target=lambda: (feeds.unsubscribe("event123", first), done.set())).start()
+    assert not done.wait(0.1)
+    assert first in feed.subscribers
+    feed._lock.release()
+    assert done.wait(1)
+    assert feed.subscribers == {second}
+
+def test_stream_subscribes_only_while_it_is_read(app, fake_db, fake_auth, client):
+    from app.events.live import heatmap_feeds
+    app.config["SSE_KEEPALIVE_SECONDS"] = 0.01
+    fake_auth.add_user("abc", "abc@example.com", "Ann")
+    fake_db.seed("events/e1", {"createdBy": "abc", "startDate": "2025-03-03", "endDate": "2025-03-03"})
+    url = f"/api/v1/events/e1/heatmap/stream?access_token={fake_auth.issue_token('abc')}"
+
+    res = client.head(url)
+    res.close()
+    assert res.status_code == 200
+    assert "e1" not in heatmap_feeds._feeds
+
+    res = client.get(url, buffered=False)
+    assert next(iter(res.response)).startswith(b"event: init")
+    assert "e1" in heatmap_feeds._feeds
+    res.close()
+    assert "e1" not in heatmap_feeds._feeds
@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+import grpc
+from app import metrics
+
+def test_metrics_reports_route_latency(client):
+    client.get("/healthz")
+    res = client.get("/metrics")
+
+    body = res.get_data(as_text=True)
+    assert res.status_code == 200
+    assert res.headers["Content-Type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{method="GET",route="/healthz",status="200"}' in body
+    assert 'cache_entries{cache="token"}' in body
+
+@patch("firebase_admin.auth.get_users")
+@patch("firebase_admin.auth.verify_id_token")
+def test_slow_requests_get_server_timing(mock_auth, mock_get_users, app, client, db):
+    from app.middleware import token_cache
+    token_cache.clear()
+    app.config["METRICS_SLOW_REQUEST_MS"] = 0
+    mock_auth.return_value = {"uid": "abc", "email": "abc@example.com"}
+    db.collection.return_value.document.return_value.get.return_value.exists = False
+
+    res = client.get("/api/v1/events/missing", headers={"Authorization": "Bearer token"})
+
+    assert res.status_code == 404
+    timing = res.headers["Server-Timing"]
+    assert 'auth;dur=' in timing and 'desc="1 calls"' in timing
+    assert 'total;dur=' in timing
+    assert 'backend_call_duration_seconds_count{service="auth",operation="verify_id_token"}' in metrics.render()
+
+def test_firestore_interceptor_times_rpcs():
+    class Call:
+        def add_done_callback(self, callback):
+            callback(self)
+
+        def code(self):
+            return grpc.StatusCode.OK
+
+    details = SimpleNamespace(method="/google.firestore.v1.Firestore/RunQuery")
+    trace = metrics.RequestTrace()
+    token = metrics._trace.set(trace)
+    try:
+        metrics.FirestoreInterceptor().intercept_unary_stream(lambda d, r: Call(), details, object())
+    finally:
+        metrics._trace.reset(token)
+
+    assert trace.services["firestore"][0] == 1
+    assert 'backend_call_duration_seconds_count{service="firestore",operation="query"}' in metrics.render()
@@ -0,0 +1,31 @@
+import pytest
+from types import SimpleNamespace
+from app.pagination import PageParamsError, decode_page_token, encode_page_token, stream_in_batches
+
+class FakeQuery:
+    """Just enough of a Firestore query to page by document id"""
+    def __init__(self, ids, after=None, limit=None, calls=None):
+        self.ids, self._after, self._limit = ids, after, limit
+        self.calls = calls if calls is not None else []
+    def order_by(self, field):
+        return self
+    def start_after(self, fields):
+        return FakeQuery(self.ids, next(iter(fields.values())), self._limit, self.calls)
+    def limit(self, n):
+        return FakeQuery(self.ids, self._after, n, self.calls)
+    def stream(self):
+        self.calls.append(self._after)
+        ids = [i for i in sorted(self.ids) if self._after is None or i > self._after]
+        return iter(SimpleNamespace(id=i) for i in ids[:self._limit])
+
+def test_stream_in_batches_resumes_from_cursor():
+    query = FakeQuery([f"d{i:02d}" for i in range(7)])
+    assert [d.id for d in stream_in_batches(query, batch_size=3)] == [f"d{i:02d}" for i in range(7)]
+    assert query.calls == [None, "d02", "d05"]
+    assert [d.id for d in stream_in_batches(query, last_id="d04")] == ["d05", "d06"]
+
+def test_page_token_round_trip():
+    token = encode_page_token({"phase": "invited", "after": "abc"})
+    assert decode_page_token(token) == {"phase": "invited", "after": "abc"}
+    with pytest.raises(PageParamsError):
+        decode_page_token("not a token")
@@ -0,0 +1,25 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+from app.profiles import resolve_profiles, profile_cache
+
+@patch("firebase_admin.auth.get_users")
+def test_resolve_profiles_batches_and_caches(mock_get_users):
+    profile_cache.clear()
+    mock_get_users.return_value = SimpleNamespace(
+        users=[
+            SimpleNamespace(uid="u1", email="a@example.com", display_name="Ann"),
+            SimpleNamespace(uid="u2", email="b@example.com", display_name=None),
+        ],
+        not_found=[SimpleNamespace(uid="gone")]
+    )
+
+    profiles = resolve_profiles(["u1", "u2", "u1", "gone"])
+    assert mock_get_users.call_count == 1
+    assert len(mock_get_users.call_args[0][0]) == 3
+    assert profiles["u1"]["name"] == "Ann"
+    assert profiles["u2"]["name"] == "b@example.com"
+    assert "gone" not in profiles
+
+    # Second lookup is served entirely from the cache
+    assert resolve_profiles(["u1", "u2", "gone"]).keys() == {"u1", "u2"}
+    assert mock_get_users.call_count == 1
@@ -0,0 +1,70 @@
+from app.events.slots import SlotIndex
+
+def test_encode_decode_round_trip_with_legacy_keys():
+    index = SlotIndex({"startDate": "2025-03-03", "endDate": "2025-03-16"})
+    assert index.size == 14 * 24
+
+    response = index.encode_response({
+        "timeSlots": ["tuesday_2025-03-04_14", "monday_8", "nonsense"],
+    })
+    assert isinstance(response["timeSlotBits"], bytes)
+    assert len(response["timeSlotBits"]) == index.size // 8
+    # Keys outside the grid are kept verbatim
+    assert response["timeSlots"] == ["nonsense"]
+
+    decoded = index.decode_response(response)
+    assert decoded["timeSlots"] == [
+        "monday_2025-03-03_8", "tuesday_2025-03-04_14", "monday_2025-03-10_8", "nonsense"
+    ]
+    assert "timeSlotBits" not in decoded
+
+
+def test_grid_is_shared_and_supports_sub_hour_slots():
+    event = {"startDate": "2025-03-03", "endDate": "2025-03-04", "slotMinutes": 15}
+    index = SlotIndex(event)
+    assert index.grid is SlotIndex(dict(event)).grid
+    assert index.size == 2 * 96
+
+    # Whole hours keep their old keys, quarter hours get a suffix
+    assert index.key(4 * 14) == "monday_2025-03-03_14"
+    assert index.key(4 * 14 + 2) == "monday_2025-03-03_14:30"
+    assert index.positions("tuesday_2025-03-04_9:45") == [96 + 4 * 9 + 3]
+    assert index.positions("monday_2025-03-03_9:40") == []
+    cell = index.grid.heatmap([0] * index.size, [0] * index.size)[0]["slots"][4 * 14 + 2]
+    assert (cell["hour"], cell["minute"]) == (14, 30)
+
+
+def test_grid_flags_slots_skipped_by_dst():
+    # Clocks in Warsaw jump from 02:00 to 03:00 on 2025-03-30
+    index = SlotIndex({"startDate": "2025-03-29", "endDate": "2025-03-30",
+                       "timezone": "Europe/Warsaw", "slotMinutes": 30})
+    assert index.slots_per_day == 48
+    assert [index.key(p) for p in range(index.size) if not index.grid.exists[p]] == [
+        "sunday_2025-03-30_2", "sunday_2025-03-30_2:30"
+    ]
+    grid = index.grid.heatmap([0] * index.size, [0] * index.size)
+    assert grid[1]["slots"][4]["skipped"] is True
+    assert "skipped" not in grid[0]["slots"][4]
+
+
+def test_grid_cache_is_bounded_by_cells():
+    from app.cache import WeightedLRUCache
+    cache = WeightedLRUCache(300, len)
+    cache.set("a", "x" * 100)
+    cache.set("b", "x" * 150)
+    cache.get("a")
+    cache.set("c", "x" * 100)  # over 300: evicts b, the least recently used
+    assert (cache.get("a"), cache.get("b")) == ("x" * 100, None)
+    assert cache.stats()["weight"] == 200
+    cache.set("huge", "x" * 301)  # larger than the whole cache: not kept
+    assert cache.get("huge") is None and len(cache) == 2
+
+
+def test_event_schema_caps_the_slot_count():
+    import pytest
+    from pydantic import ValidationError
+    from app.schemas.event import EventCreateModel
+    event = {"name": "Long", "type": "once", "timezone": "UTC", "start_date": "2025-01-01", "end_date": "2025-12-31"}
+    assert EventCreateModel(**event).slot_minutes == 60  # 8760 hourly slots
+    with pytest.raises(ValidationError, match="more than 10000 slots"):
+        EventCreateModel(**event, slot_minutes=15)
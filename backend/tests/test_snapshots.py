@@ -0,0 +1,36 @@
+def test_closed_event_is_served_from_its_snapshot(fake_db, fake_auth, client):
+    fake_auth.add_user("abc", "abc@example.com", "Ann")
+    headers = {"Authorization": f"Bearer {fake_auth.issue_token('abc')}"}
+    fake_db.seed("events/e1", {"name": "Retro", "createdBy": "abc", "status": "collecting",
+                               "startDate": "2025-03-03", "endDate": "2025-03-04"})
+    client.post("/api/v1/events/e1/responses", headers=headers, json={"timeSlots": ["monday_2025-03-03_9"]})
+    live = client.get("/api/v1/events/e1/heatmap", headers=headers).get_json()
+
+    client.post("/api/v1/events/e1/close", headers=headers)
+    assert client.post("/api/v1/events/e1/responses", headers=headers,
+                       json={"timeSlots": ["monday_2025-03-03_10"]}).status_code == 409
+
+    fake_db.recorder.reset()
+    res = client.get("/api/v1/events/e1/heatmap", headers=headers)
+    assert res.get_json() == live
+    assert res.headers["Cache-Control"] == "private, no-cache"
+    assert fake_db.calls["read"] == 1  # the snapshot; the event is cached
+    res = client.get("/api/v1/events/e1/responses", headers={**headers, "Accept-Encoding": "gzip"})
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert 'query' not in fake_db.calls
+
+    # Revalidation needs no snapshot read
+    etag = res.headers["ETag"]
+    fake_db.recorder.reset()
+    res = client.get("/api/v1/events/e1/responses", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 304
+    assert fake_db.calls["read"] == 0
+
+    # Reopening drops the snapshot and accepts responses again
+    client.post("/api/v1/events/e1/reopen", headers=headers)
+    assert not fake_db.document("events/e1/snapshots/frozen").get().exists
+    assert client.post("/api/v1/events/e1/responses", headers=headers,
+                       json={"timeSlots": ["monday_2025-03-03_10"]}).status_code == 201
+    res = client.get("/api/v1/events/e1/heatmap", headers=headers)
+    assert res.headers["Cache-Control"] == "private, no-cache"
+    assert res.get_json()["heatmapGrid"][0]["slots"][10]["count"] == 1
@@ -0,0 +1,24 @@
+import pytest
+from werkzeug.test import Client
+from app.startup import LazyApp, init_server_mode
+
+def test_lazy_app_answers_healthz_without_building_app(app):
+    built = []
+    def factory():
+        built.append(True)
+        return app
+    lazy = Client(LazyApp(factory))
+
+    res = lazy.get("/healthz")
+    assert res.status_code == 200
+    assert res.get_json() == {"status": "ok", "ready": False}
+    assert built == []
+
+    assert lazy.get("/api/v1/users/me").status_code == 401
+    assert lazy.get("/healthz").get_json() == {"status": "ok"}
+    assert built == [True]
+
+def test_init_server_mode_rejects_unknown_modes():
+    init_server_mode("sync")  # nothing to set up
+    with pytest.raises(ValueError):
+        init_server_mode("asyncio")
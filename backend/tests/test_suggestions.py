@@ -0,0 +1,30 @@
+from app.events.slots import SlotIndex
+from app.events.suggestions import suggest_windows
+
+def test_suggest_windows_ranks_by_yes_then_maybe():
+    index = SlotIndex({"startDate": "2025-03-03", "endDate": "2025-03-04"})
+    respondents = {
+        "u1": index.encode_response({"userName": "Ann", "timeSlots": [
+            "monday_2025-03-03_9", "monday_2025-03-03_10", "monday_2025-03-03_11",
+            "tuesday_2025-03-04_14", "tuesday_2025-03-04_15"
+        ]}),
+        "u2": index.encode_response({"userName": "Bob", "timeSlots": [
+            "monday_2025-03-03_10", "monday_2025-03-03_11",
+            "tuesday_2025-03-04_14", "tuesday_2025-03-04_15"
+        ]}),
+        "u3": index.encode_response({"userName": "Cy", "timeSlots": [
+            "monday_2025-03-03_10", "monday_2025-03-03_11",
+        ], "maybeSlots": ["tuesday_2025-03-04_14", "tuesday_2025-03-04_15"]}),
+    }
+
+    suggestions = suggest_windows(index, respondents, 2, limit=3)
+    assert [s["startSlot"] for s in suggestions] == [
+        "monday_2025-03-03_10", "tuesday_2025-03-04_14", "monday_2025-03-03_9"
+    ]
+    assert suggestions[0]["yesCount"] == 3
+    assert suggestions[1]["yesCount"] == 2 and suggestions[1]["maybe"] == ["Cy"]
+
+    # Required attendees and quorum filter the candidates
+    suggestions = suggest_windows(index, respondents, 2, required=["u3"], quorum=3)
+    assert [s["startSlot"] for s in suggestions] == ["monday_2025-03-03_10"]
+    assert suggest_windows(index, respondents, 2, required=["nobody"]) == []
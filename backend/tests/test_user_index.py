@@ -0,0 +1,48 @@
+def test_user_index_follows_event_changes(app, fake_db, fake_auth, client):
+    app.config["USER_EVENT_INDEX"] = True
+    fake_auth.add_user("owner", "owner@example.com", "Olga")
+    fake_auth.add_user("guest", "guest@example.com", "Gus")
+    owner = {"Authorization": f"Bearer {fake_auth.issue_token('owner')}"}
+    guest = {"Authorization": f"Bearer {fake_auth.issue_token('guest')}"}
+    fake_db.seed("events/e1", {"name": "Standup", "createdBy": "owner", "invitees": [], "status": "collecting"})
+
+    client.post("/api/v1/events/e1/invite", headers=owner, json={"emails": ["Guest@example.com"]})
+    client.post("/api/v1/events/e1/close", headers=owner)
+
+    fake_db.recorder.reset()
+    events = client.get("/api/v1/events", headers=guest).get_json()
+    assert fake_db.calls["query"] == 1
+    assert events == [{
+        "eventId": "e1", "name": "Standup", "status": "closed", "isOwner": False,
+        "ownerEmail": "owner@example.com", "ownerName": "Olga", "inviteeCount": 1,
+        "createdBy": "owner", "type": None, "timezone": None, "startDate": None, "endDate": None,
+        "scheduledDate": None, "scheduledTime": None, "createdAt": None
+    }]
+    assert client.get("/api/v1/events", headers=owner).get_json()[0]["isOwner"] is True
+
+    client.delete("/api/v1/events/e1", headers=owner)
+    assert client.get("/api/v1/events", headers=guest).get_json() == []
+
+def test_backfill_user_index(app, fake_db, fake_auth):
+    fake_auth.add_user("owner", "owner@example.com", "Olga")
+    fake_auth.add_user("guest", "guest@example.com", "Gus")
+    fake_db.seed("events/old", {"name": "Old", "createdBy": "owner", "invitees": ["guest@example.com", "gone@example.com"]})
+
+    result = app.test_cli_runner().invoke(args=["events", "backfill-user-index"])
+
+    assert "old: indexed for 2 user(s)" in result.output
+    assert fake_db.document("users/guest/events/old").get().to_dict()["role"] == "invitee"
+
+def test_signup_indexes_earlier_invitations(app, fake_db, fake_auth, client, monkeypatch):
+    from types import SimpleNamespace
+    app.config["USER_EVENT_INDEX"] = True
+    fake_auth.add_user("owner", "owner@example.com", "Olga")
+    fake_db.seed("events/e1", {"name": "Standup", "createdBy": "owner", "invitees": ["new@example.com"]})
+    monkeypatch.setattr("firebase_admin.auth.create_user", lambda **kwargs: SimpleNamespace(uid="new"))
+
+    res = client.post("/api/v1/auth/signup", json={"email": "New@example.com", "password": "pw", "username": "Nia"})
+
+    assert res.status_code == 201
+    fake_auth.add_user("new", "new@example.com", "Nia")
+    events = client.get("/api/v1/events", headers={"Authorization": f"Bearer {fake_auth.issue_token('new')}"}).get_json()
+    assert [(e["eventId"], e["isOwner"], e["ownerName"]) for e in events] == [("e1", False, "Olga")]
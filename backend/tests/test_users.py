@@ -9,4 +9,18 @@ def test_get_profile(mock_verify, client):
         "Authorization": "Bearer test-token"
     })
     assert res.status_code == 200
-    assert res.get_json()["email"] == "me@example.com"
\ No newline at end of file
+    assert res.get_json()["email"] == "me@example.com"
+
+@patch("firebase_admin.auth.verify_id_token")
+def test_verified_token_is_cached_until_exp(mock_verify, client):
+    import time
+    from app.middleware import token_cache
+    token_cache.clear()
+    mock_verify.return_value = {"uid": "abc", "email": "me@example.com", "exp": time.time() + 3600}
+    headers = {"Authorization": "Bearer cached-token"}
+
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 200
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 200
+    assert mock_verify.call_count == 1
+    assert token_cache.stats()["hits"] == 1
+    assert token_cache.stats()["misses"] == 1
@@ -63,6 +63,10 @@ export const authAPI = {
   getCurrentUser: () => api.get('/auth/me'),
 };
 
+export const usersAPI = {
+  getMyAvailability: (params) => api.get('/users/me/availability', { params }),
+};
+
 // Profile API functions
 export const fetchProfile = async () => {
   const response = await api.get('/auth/me');
@@ -75,6 +79,8 @@ export const eventsAPI = {
   getEvent: (eventId) => api.get(`/events/${eventId}`),
   deleteEvent: (eventId) => api.delete(`/events/${eventId}`),
   submitResponse: (eventId, data) => api.post(`/events/${eventId}/responses`, data),
+  // data: { timeSlots: { add: [...], remove: [...] }, maybeSlots: { ... } }
+  patchMyResponse: (eventId, data) => api.patch(`/events/${eventId}/responses/me`, data),
   getResponses: (eventId) => api.get(`/events/${eventId}/responses`),
   inviteUsers: (eventId, data) => api.post(`/events/${eventId}/invite`, data),
   getHeatmapData: (eventId) => api.get(`/events/${eventId}/heatmap`),
@@ -165,13 +165,13 @@ export default function Dashboard() {
                 </Typography>
                 <Typography color="textSecondary" gutterBottom>
                   {event.isOwner 
-                    ? `Invitees: ${event.invitees?.length || 0}` 
+                    ? `Invitees: ${event.inviteeCount ?? event.invitees?.length ?? 0}` 
                     : `Owner: ${event.ownerName || event.ownerEmail || 'Unknown'}`
                   }
                 </Typography>
                 {!event.isOwner && (
                   <Typography color="textSecondary" variant="body2" gutterBottom>
-                    Invited people: {event.invitees?.length || 0}
+                    Invited people: {event.inviteeCount ?? event.invitees?.length ?? 0}
                   </Typography>
                 )}
                 <Box sx={{ mt: 1 }}>